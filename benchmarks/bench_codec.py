@@ -0,0 +1,62 @@
+# Compares the JSON backends on tests/fixtures/sample_session.jsonl scaled up,
+# decoding log lines and encoding events, and checks every backend's output
+# against the stdlib's. Usage: python benchmarks/bench_codec.py [events]
+import json
+import sys
+import time
+from pathlib import Path
+
+from cc_obs import codec
+
+FIXTURE = Path(__file__).parents[1] / "tests" / "fixtures" / "sample_session.jsonl"
+
+
+def build_events(count: int) -> list[dict]:
+    sample = [json.loads(line) for line in FIXTURE.read_text().splitlines()]
+    events = []
+    while len(events) < count:
+        for event in sample:
+            seq = len(events) + 1
+            events.append({**event, "tool_use_id": f"toolu_{seq:08d}", "_seq": seq})
+    return events[:count]
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    events = build_events(count)
+    expected = [json.dumps(e, separators=(",", ":")).encode() for e in events]
+    size_mb = sum(len(line) + 1 for line in expected) / 1024 / 1024
+    print(f"{count} events, {size_mb:.1f} MB")
+
+    # The stdlib first, as the baseline
+    baseline = None
+    for name in reversed(codec.BACKENDS):
+        try:
+            codec.set_backend(name)
+        except ImportError:
+            print(f"{name:<8} not installed")
+            continue
+        encoded = [codec.dumps(e) for e in events]
+        assert encoded == expected, f"{name} output differs from the stdlib's"
+        assert [codec.loads(line) for line in expected] == events
+        decode = best_of(lambda: [codec.loads(line) for line in expected])
+        encode = best_of(lambda: [codec.dumps(e) for e in events])
+        baseline = baseline or (decode, encode)
+        print(
+            f"{name:<8} decode {size_mb / decode:7.1f} MB/s"
+            f"  encode {size_mb / encode:7.1f} MB/s"
+            f"  ({baseline[0] / decode:.2f}x / {baseline[1] / encode:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Times read_log over a synthetic session log with 1, 2, 4, ... worker
+# processes, up to the CPU count or max_workers.
+# Usage: python benchmarks/bench_parse.py [size_mb] [max_workers]
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cc_obs.eventlog import append_event
+from cc_obs.reader import read_log
+
+
+def build_log(log_dir: Path, size_mb: int) -> int:
+    # Writing through append_event is too slow for hundreds of MB; stamp one
+    # batch of realistic records and repeat it with fresh sequence numbers
+    sample = log_dir / "sample"
+    config = {"segment_bytes": 1 << 40}
+    for i in range(200):
+        append_event(
+            str(sample),
+            {
+                "session_id": "bench",
+                "cwd": "/project",
+                "hook_event_name": "PostToolUse",
+                "tool_name": "Bash",
+                "tool_use_id": f"toolu_{i:06d}",
+                "tool_input": {"command": f"grep -rn pattern src/{i}"},
+                "tool_response": {"stdout": "match\n" * (i % 40), "stderr": ""},
+            },
+            config,
+        )
+    records = read_log(sample)
+    target = size_mb * 1024 * 1024
+    written = seq = 0
+    with open(log_dir / "events.jsonl", "wb") as f:
+        while written < target:
+            for record in records:
+                seq += 1
+                line = json.dumps({**record, "_seq": seq}).encode() + b"\n"
+                f.write(line)
+                written += len(line)
+    return seq
+
+
+def main() -> None:
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    cpus = os.cpu_count() or 1
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else cpus
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp)
+        count = build_log(log_dir, size_mb)
+        shutil.rmtree(log_dir / "sample")
+        print(f"{size_mb} MB, {count} events, {cpus} CPU(s)")
+        workers = 1
+        baseline = None
+        while True:
+            start = time.perf_counter()
+            events = read_log(log_dir, workers=workers)
+            elapsed = time.perf_counter() - start
+            assert len(events) == count
+            baseline = baseline or elapsed
+            print(
+                f"workers={workers:<3} {elapsed:7.2f}s  "
+                f"{size_mb / elapsed:7.1f} MB/s  x{baseline / elapsed:.2f}"
+            )
+            if workers >= max_workers:
+                break
+            workers = min(workers * 2, max_workers)
+
+
+if __name__ == "__main__":
+    main()
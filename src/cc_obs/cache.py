@@ -0,0 +1,111 @@
+import base64
+import hashlib
+import json
+import os
+import time
+
+from cc_obs.eventlog import strip_fields
+
+# Memoized results of `cc-obs wrap --cache`, one JSON file per key. Entries
+# are shared across sessions; a hit refreshes the file's mtime, which is what
+# size eviction orders by.
+CACHE_DIR = "cache"
+
+
+def cache_key(cmd: list[str], raw: bytes, ignore: list[str]) -> str:
+    # JSON input is normalized (ignored fields removed, keys sorted) so that
+    # per-call noise like tool_use_id doesn't defeat the cache
+    try:
+        event = json.loads(raw)
+    except ValueError:
+        event = None
+    if isinstance(event, dict):
+        raw = json.dumps(
+            strip_fields(event, ignore), sort_keys=True, separators=(",", ":")
+        ).encode()
+    digest = hashlib.sha256(json.dumps(cmd).encode())
+    digest.update(b"\0")
+    digest.update(raw)
+    return digest.hexdigest()
+
+
+def lookup(cache_dir: str, key: str, ttl_s: float) -> dict | None:
+    path = os.path.join(cache_dir, key + ".json")
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if ttl_s and time.time() - entry.get("created", 0) > ttl_s:
+        _unlink(path)
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return {
+        "exit_code": entry["exit_code"],
+        "duration_ms": entry["duration_ms"],
+        "stdout": base64.b64decode(entry["stdout"]),
+        "stderr": base64.b64decode(entry["stderr"]),
+    }
+
+
+def store(
+    cache_dir: str,
+    key: str,
+    exit_code: int,
+    duration_ms: float,
+    stdout: bytes,
+    stderr: bytes,
+    max_bytes: int,
+) -> None:
+    entry = {
+        "created": time.time(),
+        "exit_code": exit_code,
+        "duration_ms": duration_ms,
+        "stdout": base64.b64encode(stdout).decode(),
+        "stderr": base64.b64encode(stderr).decode(),
+    }
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, key + ".json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+    if max_bytes:
+        evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir: str, max_bytes: int) -> int:
+    # Least recently used first, until the cache fits in max_bytes
+    entries = []
+    try:
+        names = os.listdir(cache_dir)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _unlink(path)
+        total -= size
+        removed += 1
+    return removed
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
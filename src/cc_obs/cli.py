@@ -30,30 +30,119 @@ def main(argv: list[str] | None = None) -> None:
         action="store_true",
         help="Run non-interactively with default settings",
     )
+    p_install.add_argument(
+        "--profile",
+        help="Events to observe: full (default), minimal, agents-only or tools:A,B",
+    )
 
     # log
     sub.add_parser("log", help="Observer hook handler (reads stdin)")
 
+    # collectord
+    sub.add_parser(
+        "collectord", help="Run the local event collector daemon (foreground)"
+    )
+
+    # warmd
+    sub.add_parser(
+        "warmd", help="Run the warm Python hook server for wrap --warm (foreground)"
+    )
+
     # wrap
     p_wrap = sub.add_parser("wrap", help="Wrap a hook command with timing")
     p_wrap.add_argument("--name", default="", help="Display label for the wrapped hook")
+    p_wrap.add_argument(
+        "--capture-bytes",
+        type=int,
+        default=64 * 1024,
+        help="Output kept per stream in the log (head and tail); default 65536",
+    )
+    p_wrap.add_argument(
+        "--budget-ms",
+        type=float,
+        help="Latency budget; runs that take longer are flagged in the log",
+    )
+    p_wrap.add_argument(
+        "--timeout-ms",
+        type=float,
+        help="Kill the hook after this long and exit 124, keeping partial output",
+    )
+    p_wrap.add_argument(
+        "--cache",
+        action="store_true",
+        help="Replay the stored result when the same command sees the same input",
+    )
+    p_wrap.add_argument(
+        "--warm",
+        action="store_true",
+        help="Run a Python hook in a process forked by cc-obs warmd, if it is running",
+    )
     p_wrap.add_argument(
         "cmd", nargs=argparse.REMAINDER, help="Command to wrap (after --)"
     )
 
+    # span
+    p_span = sub.add_parser(
+        "span", help="Record a step of a wrapped hook as a child span"
+    )
+    span_sub = p_span.add_subparsers(dest="span_action", required=True)
+    p_span_start = span_sub.add_parser("start", help="Start a span and print its id")
+    p_span_start.add_argument("name", help="Span name")
+    p_span_start.add_argument(
+        "--parent", help="Parent span id (default: $CC_OBS_SPAN_ID, the hook itself)"
+    )
+    p_span_end = span_sub.add_parser("end", help="End a span")
+    p_span_end.add_argument("span_id", help="Id printed by span start")
+    p_span_end.add_argument(
+        "--error", action="store_true", help="Mark the step as failed"
+    )
+
     # view
     p_view = sub.add_parser("view", help="Generate and open HTML viewer")
     p_view.add_argument(
         "--no-open", action="store_true", help="Generate without opening browser"
     )
     p_view.add_argument("--log-file", help="Read events from a specific JSONL file")
+    p_view.add_argument(
+        "--from-seq", type=int, help="Only include events with _seq >= this"
+    )
+    p_view.add_argument(
+        "--to-seq", type=int, help="Only include events with _seq <= this"
+    )
+    p_view.add_argument(
+        "--session", help="Session id or prefix (default: most recent session)"
+    )
+    p_view.add_argument(
+        "--inline-blobs",
+        action="store_true",
+        help="Embed full blob contents instead of previews",
+    )
 
     # clear
     p_clear = sub.add_parser("clear", help="Delete log and view files")
     p_clear.add_argument("--quiet", action="store_true", help="Suppress output")
+    p_clear.add_argument(
+        "--all",
+        action="store_true",
+        dest="all_sessions",
+        help="Also delete every session's log in sessions/",
+    )
 
     # status
-    sub.add_parser("status", help="Print session summary")
+    p_status = sub.add_parser("status", help="Print session summary")
+    p_status.add_argument(
+        "--session", help="Session id or prefix (default: most recent session)"
+    )
+
+    # show
+    p_show = sub.add_parser("show", help="Print the events for one tool call")
+    p_show.add_argument("tool_use_id", help="tool_use_id of the call to look up")
+    p_show.add_argument(
+        "--session", help="Session id or prefix (default: most recent session)"
+    )
+
+    # sessions
+    sub.add_parser("sessions", help="List logged sessions")
 
     args = parser.parse_args(argv)
 
@@ -70,10 +159,19 @@ def main(argv: list[str] | None = None) -> None:
                 global_install=args.global_install,
                 uninstall=args.uninstall,
                 no_prompt=args.no_prompt,
+                profile=args.profile,
             )
         case "log":
             from cc_obs.commands.log import run
 
+            run()
+        case "collectord":
+            from cc_obs.commands.collectord import run
+
+            run()
+        case "warmd":
+            from cc_obs.commands.warmd import run
+
             run()
         case "wrap":
             from cc_obs.commands.wrap import run
@@ -81,16 +179,46 @@ def main(argv: list[str] | None = None) -> None:
             cmd = args.cmd
             if cmd and cmd[0] == "--":
                 cmd = cmd[1:]
-            run(cmd, name=args.name)
+            run(
+                cmd,
+                name=args.name,
+                capture_bytes=args.capture_bytes,
+                budget_ms=args.budget_ms,
+                timeout_ms=args.timeout_ms,
+                cache=args.cache,
+                warm=args.warm,
+            )
+        case "span":
+            from cc_obs.commands.span import run
+
+            if args.span_action == "start":
+                run("start", args.name, parent=args.parent)
+            else:
+                run("end", args.span_id, error=args.error)
         case "view":
             from cc_obs.commands.view import run
 
-            run(no_open=args.no_open, log_file=args.log_file)
+            run(
+                no_open=args.no_open,
+                log_file=args.log_file,
+                from_seq=args.from_seq,
+                to_seq=args.to_seq,
+                session=args.session,
+                inline=args.inline_blobs,
+            )
         case "clear":
             from cc_obs.commands.clear import run
 
-            run(quiet=args.quiet)
+            run(quiet=args.quiet, all_sessions=args.all_sessions)
         case "status":
             from cc_obs.commands.status import run
 
+            run(session=args.session)
+        case "show":
+            from cc_obs.commands.show import run
+
+            run(args.tool_use_id, session=args.session)
+        case "sessions":
+            from cc_obs.commands.sessions import run
+
             run()
@@ -0,0 +1,171 @@
+import functools
+import json
+import os
+import re
+from collections.abc import Callable
+
+# Keeps typing off the hook path; only checkers need Any
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any
+
+# JSON for the hot paths: event ingestion, log reading and the viewer's data.
+# orjson or msgspec is used when installed, but only where its result is the
+# stdlib's: for JSON data, dumps() returns exactly json.dumps(obj,
+# separators=(",", ":")) encoded, and loads() returns what json.loads would
+# (or raises its error), so logs never depend on which backend wrote them.
+BACKEND_ENV = "CC_OBS_JSON"
+BACKENDS = ("orjson", "msgspec", "json")
+
+# Substring checks (C speed, unlike a regex over every line) run on a copy
+# with every digit turned into 0
+_ZERO_DIGITS = bytes.maketrans(b"123456789", b"000000000")
+# Integers past 64 bits, which orjson turns into floats
+_LONG_INT = b"0" * 20
+_LONG_NEGATIVE_INT = b"-" + b"0" * 19
+# Number tokens the fast encoders spell differently: 1e16 for 1e+16, and
+# 0.00001 for 1e-05. They also write null for NaN and infinity. A number can
+# start the output too, when it's the whole document.
+_SMALL_FLOATS = tuple(
+    delim + sign + b"0.0000" for delim in (b":", b",", b"[") for sign in (b"", b"-")
+)
+_SMALL_FLOAT_STARTS = (b"0.0000", b"-0.0000")
+
+_STDLIB_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+_backend: str | None = None
+_fast_loads: "Callable[[bytes | str], Any] | None" = None
+_exact_ints = True
+_fast_dumps: Callable[[object], bytes] | None = None
+_encode_errors: tuple[type[Exception], ...] = ()
+
+
+def set_backend(name: str | None = None) -> str:
+    # None picks the first available of $CC_OBS_JSON and BACKENDS; naming a
+    # backend that isn't installed raises ImportError
+    global _backend, _fast_loads, _fast_dumps, _encode_errors, _exact_ints
+    if name is None:
+        choice = os.environ.get(BACKEND_ENV)
+        names = [choice, *BACKENDS] if choice in BACKENDS else BACKENDS
+    elif name in BACKENDS:
+        names = [name]
+    else:
+        raise ValueError(f"unknown JSON backend: {name}")
+    for candidate in names:
+        try:
+            _fast_loads, _fast_dumps, _encode_errors = _load(candidate)
+        except ImportError:
+            if name is not None:
+                raise
+            continue
+        _backend = candidate
+        _exact_ints = candidate != "orjson"
+        return candidate
+    # Unreachable: the stdlib backend always loads
+    raise ImportError("no JSON backend")
+
+
+def backend() -> str:
+    return _backend or set_backend()
+
+
+def loads(data: bytes | str) -> "Any":
+    if _backend is None:
+        set_backend()
+    if _fast_loads is not None:
+        if not _exact_ints:
+            if isinstance(data, str):
+                data = data.encode("utf-8", "surrogatepass")
+            zeroed = data.translate(_ZERO_DIGITS)
+            if _LONG_INT in zeroed or _LONG_NEGATIVE_INT in zeroed:
+                return json.loads(data)
+        try:
+            return _fast_loads(data)
+        except ValueError:
+            # NaN, lone surrogates, non-UTF-8 input, or actually invalid: the
+            # stdlib decides, and raises its own error
+            pass
+    return json.loads(data)
+
+
+def dumps(obj: object) -> bytes:
+    if _backend is None:
+        set_backend()
+    if _fast_dumps is not None:
+        try:
+            out = _fast_dumps(obj)
+        except _encode_errors:
+            out = None
+        if out is not None and not _inexact(out):
+            if out.isascii() and b"\x7f" not in out:
+                return out
+            # Fast encoders write UTF-8; the stdlib escapes to ASCII
+            return _non_ascii().sub(_escape, out.decode()).encode()
+    return _STDLIB_ENCODER.encode(obj).encode()
+
+
+def _inexact(out: bytes) -> bool:
+    # Whether a fast encoder's output may differ from the stdlib's. Matches
+    # inside strings only cost a fallback.
+    if b"null" in out:
+        return True
+    if b"0.0000" in out and (
+        out.startswith(_SMALL_FLOAT_STARTS)
+        or any(token in out for token in _SMALL_FLOATS)
+    ):
+        return True
+    zeroed = out.translate(_ZERO_DIGITS)
+    i = zeroed.find(b"0e")
+    while i != -1:
+        # An exponent is a number token's if what precedes the digits before
+        # it is a separator (or nothing) rather than more of a string
+        start = i
+        while start and zeroed[start - 1] in b"0.-":
+            start -= 1
+        if not start or zeroed[start - 1] in b":,[":
+            return True
+        i = zeroed.find(b"0e", i + 2)
+    return False
+
+
+@functools.cache
+def _non_ascii() -> re.Pattern:
+    # Compiled on first use: the hooks run the stdlib backend, which never
+    # needs it, and compiling it costs more than all of their imports
+    return re.compile("[\x7f-\U0010ffff]")
+
+
+def _escape(match: re.Match) -> str:
+    code = ord(match.group())
+    if code > 0xFFFF:
+        code -= 0x10000
+        high, low = 0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF)
+        return f"\\u{high:04x}\\u{low:04x}"
+    return f"\\u{code:04x}"
+
+
+def _load(name: str) -> tuple:
+    if name == "orjson":
+        import orjson
+
+        # Subclasses, dataclasses and datetimes go to the (absent) default hook
+        # and so fail over to the stdlib, which is what decides how they encode
+        option = (
+            orjson.OPT_PASSTHROUGH_SUBCLASS
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        return (
+            orjson.loads,
+            functools.partial(orjson.dumps, option=option),
+            (orjson.JSONEncodeError,),
+        )
+    if name == "msgspec":
+        import msgspec
+
+        return (
+            msgspec.json.Decoder().decode,
+            msgspec.json.Encoder().encode,
+            (msgspec.EncodeError, TypeError, ValueError),
+        )
+    return None, None, ()
@@ -1,10 +1,21 @@
+import shutil
 import sys
 from pathlib import Path
 
-from cc_obs.project import events_path, view_path
+from cc_obs.project import (
+    cache_dir,
+    events_path,
+    manifest_path,
+    segments_dir,
+    sessions_dir,
+    state_path,
+    tool_index_path,
+    transcript_cache_path,
+    view_path,
+)
 
 
-def run(quiet: bool = False) -> None:
+def run(quiet: bool = False, all_sessions: bool = False) -> None:
     root = Path.cwd()
     if not (root / ".claude").is_dir():
         if not quiet:
@@ -13,13 +24,31 @@ def run(quiet: bool = False) -> None:
         return
 
     deleted = []
-    for path in [events_path(root), view_path(root)]:
+    for path in [
+        events_path(root),
+        manifest_path(root),
+        state_path(root),
+        tool_index_path(root),
+        transcript_cache_path(root),
+        view_path(root),
+    ]:
         if path.exists():
             path.unlink()
             deleted.append(path.name)
+    directories = [segments_dir(root), cache_dir(root)]
+    # Hooks installed before per-session logs run `cc-obs clear --quiet` at
+    # every SessionStart, so session logs are only deleted when asked for
+    if all_sessions:
+        directories.append(sessions_dir(root))
+    for directory in directories:
+        if directory.is_dir():
+            shutil.rmtree(directory)
+            deleted.append(directory.name)
 
     if not quiet:
         if deleted:
             print(f"Cleared: {', '.join(deleted)}")
         else:
             print("Nothing to clear")
+        if not all_sessions and sessions_dir(root).is_dir():
+            print("Kept session logs in sessions/ (--all deletes them)")
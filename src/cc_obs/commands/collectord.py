@@ -0,0 +1,153 @@
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from cc_obs.codec import loads
+from cc_obs.commands.log import COLLECTOR_SOCKET, record_events
+from cc_obs.eventlog import stamp_event
+from cc_obs.project import obs_dir
+
+# Group commit: the writer waits this long after the first pending event for
+# more to arrive, then appends the whole batch with one locked write.
+BATCH_WINDOW_S = 0.005
+MAX_BATCH = 512
+ACK_TIMEOUT_S = 5.0
+
+
+class _Pending:
+    def __init__(self, event: dict) -> None:
+        self.event = event
+        self.done = threading.Event()
+        self.written = False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "CollectorServer"
+
+    def handle(self) -> None:
+        raw = self.rfile.read()
+        if not raw:
+            return
+        try:
+            event = loads(raw)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(event, dict):
+            return
+
+        stamp_event(event)
+        pending = _Pending(event)
+        self.server.pending.put(pending)
+        # No ack if the batch failed: the client sees EOF and appends directly
+        if pending.done.wait(ACK_TIMEOUT_S) and pending.written:
+            self.wfile.write(b"\n")
+
+
+class CollectorServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    # Parallel tool calls connect in bursts; a short backlog would push clients
+    # onto the direct-append fallback.
+    request_queue_size = 128
+
+    def __init__(self, log_dir: str) -> None:
+        self.log_dir = log_dir
+        self.sock_path = os.path.join(log_dir, COLLECTOR_SOCKET)
+        self.pending: queue.Queue[_Pending | None] = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        os.makedirs(log_dir, exist_ok=True)
+        super().__init__(self.sock_path, _Handler)
+        self._writer.start()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pending.put(None)
+        self._writer.join()
+        try:
+            os.unlink(self.sock_path)
+        except FileNotFoundError:
+            pass
+
+    def _write_loop(self) -> None:
+        while True:
+            first = self.pending.get()
+            if first is None:
+                return
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + BATCH_WINDOW_S
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = (
+                        self.pending.get(timeout=remaining)
+                        if remaining > 0
+                        else self.pending.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            # Whatever a batch raises, the writer has to survive it: once this
+            # thread is gone every client would wait out its ack timeout
+            written = False
+            try:
+                record_events(self.log_dir, [p.event for p in batch])
+                written = True
+            except Exception:  # noqa: BLE001
+                print("cc-obs collectord: write failed:", file=sys.stderr)
+                traceback.print_exc()
+            for p in batch:
+                p.written = written
+                p.done.set()
+            if stop:
+                return
+
+
+def is_live(sock_path: str) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(sock_path)
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def run() -> None:
+    root = Path.cwd()
+    if not (root / ".claude").is_dir():
+        print("No .claude directory found", file=sys.stderr)
+        sys.exit(1)
+
+    log_dir = obs_dir(root)
+    sock_path = log_dir / COLLECTOR_SOCKET
+    if sock_path.exists():
+        if is_live(str(sock_path)):
+            print("cc-obs collectord is already running", file=sys.stderr)
+            sys.exit(1)
+        sock_path.unlink()
+
+    server = CollectorServer(str(log_dir))
+    signal.signal(
+        signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start()
+    )
+    print(f"Listening on {sock_path.relative_to(root)}")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -23,6 +23,29 @@ HOOK_EVENTS = [
 
 CC_OBS_MARKER = "cc-obs"
 CC_OBS_WRAP_PREFIX = "cc-obs wrap "
+# Dedicated console script with a minimal import graph; see README "Hook latency"
+CC_OBS_LOG_COMMAND = "cc-obs-log"
+
+# Events that fire on every tool call (PostToolUseFailure replaces PostToolUse)
+TOOL_CALL_EVENTS = ["PreToolUse", "PostToolUse"]
+TOOL_EVENTS = [*TOOL_CALL_EVENTS, "PostToolUseFailure", "PermissionRequest"]
+LIFECYCLE_EVENTS = [
+    "SessionStart",
+    "Stop",
+    "UserPromptSubmit",
+    "SubagentStart",
+    "SubagentStop",
+    "PreCompact",
+]
+
+# Named install profiles: which events get an observer hook, with which matcher.
+# "tools:A,B" is parsed by profile_matchers.
+PROFILES = {
+    "full": "Every event, every tool",
+    "minimal": "Session and subagent lifecycle only; no per-tool-call hooks",
+    "agents-only": "Subagent lifecycle plus Task tool calls",
+    "tools:NAME,...": "Lifecycle events plus tool calls for the named tools only",
+}
 
 
 @dataclass
@@ -47,6 +70,7 @@ class InstallConfig:
     uninstall: bool = False
     existing_hook_choices: list[HookWrapChoice] = field(default_factory=list)
     agents: list[AgentChoice] = field(default_factory=list)
+    profile: str = "full"
 
 
 def _is_already_wrapped(entry: dict) -> bool:
@@ -65,33 +89,52 @@ def _is_pure_cc_obs(entry: dict) -> bool:
     return False
 
 
-def _make_hooks() -> dict:
+def profile_matchers(profile: str) -> dict[str, str]:
+    if profile == "full":
+        return {event: "" for event in HOOK_EVENTS}
+    if profile == "minimal":
+        return {event: "" for event in LIFECYCLE_EVENTS}
+    if profile == "agents-only":
+        events = ["SessionStart", "Stop", "SubagentStart", "SubagentStop"]
+        return {
+            **{event: "" for event in events},
+            **{event: "Task" for event in TOOL_EVENTS},
+        }
+    if profile.startswith("tools:"):
+        tools = [t.strip() for t in profile[len("tools:") :].split(",") if t.strip()]
+        if tools:
+            return {
+                **{event: "" for event in LIFECYCLE_EVENTS},
+                **{event: "|".join(tools) for event in TOOL_EVENTS},
+            }
+    raise ValueError(
+        f"Unknown profile {profile!r}; expected one of: {', '.join(PROFILES)}"
+    )
+
+
+def tool_call_cost(matchers: dict[str, str]) -> str:
+    # Observer processes spawned per tool call, ignoring permission prompts
+    per_call = [matchers[e] for e in TOOL_CALL_EVENTS if e in matchers]
+    if not per_call:
+        return "0 per tool call"
+    if all(m == "" for m in per_call):
+        return f"{len(per_call)} per tool call"
+    tools = sorted({t for m in per_call for t in m.split("|")})
+    return f"{len(per_call)} per {', '.join(tools)} call, 0 for other tools"
+
+
+def _make_hooks(profile: str = "full") -> dict:
     hooks: dict[str, list] = {}
 
-    for event in HOOK_EVENTS:
-        if event == "SessionStart":
-            hooks[event] = [
-                {
-                    "matcher": "startup",
-                    "hooks": [
-                        {
-                            "type": "command",
-                            "command": "cc-obs clear --quiet && cc-obs log",
-                        }
-                    ],
-                },
-                {
-                    "matcher": "resume|clear|compact",
-                    "hooks": [{"type": "command", "command": "cc-obs log"}],
-                },
-            ]
-        else:
-            hooks[event] = [
-                {
-                    "matcher": "",
-                    "hooks": [{"type": "command", "command": "cc-obs log"}],
-                },
-            ]
+    # SessionStart gets the same single entry as every other event: each
+    # session logs into its own directory, so nothing is cleared at startup.
+    for event, matcher in profile_matchers(profile).items():
+        hooks[event] = [
+            {
+                "matcher": matcher,
+                "hooks": [{"type": "command", "command": CC_OBS_LOG_COMMAND}],
+            },
+        ]
 
     return hooks
 
@@ -123,7 +166,10 @@ def _merge_hooks(
         for c in choices:
             choices_by_key[(c.event, c.command)] = c
 
-    for event, new_entries in new_hooks.items():
+    # Events outside the profile still lose their old observer entries, so
+    # switching to a smaller profile removes hooks
+    for event in HOOK_EVENTS:
+        new_entries = new_hooks.get(event, [])
         current = existing_hooks.get(event, [])
         kept = []
         for e in current:
@@ -143,7 +189,10 @@ def _merge_hooks(
                 break
             else:
                 kept.append(e)
-        existing_hooks[event] = new_entries + kept
+        if new_entries or kept:
+            existing_hooks[event] = new_entries + kept
+        else:
+            existing_hooks.pop(event, None)
 
     result["hooks"] = existing_hooks
     return result
@@ -199,7 +248,7 @@ def execute_install(root: Path, config: InstallConfig) -> None:
         for md in (root / ".claude").rglob("*.md"):
             unwrap_file(md)
     else:
-        new_hooks = _make_hooks()
+        new_hooks = _make_hooks(config.profile)
         updated = _merge_hooks(
             existing, new_hooks, choices=config.existing_hook_choices or None
         )
@@ -214,6 +263,9 @@ def execute_install(root: Path, config: InstallConfig) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(updated, indent=2) + "\n")
     print(f"{action} cc-obs hooks in {path.relative_to(root)}")
+    if not config.uninstall:
+        cost = tool_call_cost(profile_matchers(config.profile))
+        print(f"Profile {config.profile}: {cost} (hook processes)")
 
 
 def run(
@@ -221,16 +273,27 @@ def run(
     global_install: bool = False,
     uninstall: bool = False,
     no_prompt: bool = False,
+    profile: str | None = None,
 ) -> None:
     root = Path.cwd()
 
+    if profile is not None:
+        try:
+            profile_matchers(profile)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+
     if not no_prompt and not uninstall and sys.stdin.isatty():
         from cc_obs.commands.install_prompt import gather_choices
 
-        config = gather_choices(root)
+        config = gather_choices(root, profile=profile)
     else:
         config = InstallConfig(
-            project=project, global_install=global_install, uninstall=uninstall
+            project=project,
+            global_install=global_install,
+            uninstall=uninstall,
+            profile=profile or "full",
         )
 
     if config.global_install:
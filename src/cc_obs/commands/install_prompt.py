@@ -9,6 +9,9 @@ from cc_obs.commands.install import (
     HookWrapChoice,
     InstallConfig,
     CC_OBS_MARKER,
+    PROFILES,
+    profile_matchers,
+    tool_call_cost,
 )
 from cc_obs.commands.wrap_agent import _split_frontmatter
 from cc_obs.project import settings_path
@@ -18,7 +21,7 @@ def _file_label(path: Path) -> str:
     return "update" if path.exists() else "create"
 
 
-def gather_choices(root: Path) -> InstallConfig:
+def gather_choices(root: Path, profile: str | None = None) -> InstallConfig:
     local_path = settings_path(root, project=False)
     project_path = settings_path(root, project=True)
     global_path = Path.home() / ".claude" / "settings.json"
@@ -57,6 +60,8 @@ def gather_choices(root: Path) -> InstallConfig:
     if target_path.exists():
         existing = json.loads(target_path.read_text())
 
+    if profile is None:
+        profile = _ask_profile()
     hook_choices = _ask_existing_hooks(existing)
     agents = _ask_agents(root)
 
@@ -65,9 +70,43 @@ def gather_choices(root: Path) -> InstallConfig:
         global_install=global_install,
         existing_hook_choices=hook_choices,
         agents=agents,
+        profile=profile,
     )
 
 
+def _ask_profile() -> str:
+    choices = []
+    for name, description in PROFILES.items():
+        if name.startswith("tools:"):
+            label = f"tools — {description}"
+            value = "tools:"
+        else:
+            cost = tool_call_cost(profile_matchers(name))
+            label = f"{name} — {description} ({cost})"
+            value = name
+        choices.append(questionary.Choice(label, value=value))
+
+    profile = questionary.select(
+        "Which events should cc-obs observe?", choices=choices
+    ).ask()
+    if profile is None:
+        raise SystemExit(1)
+
+    while profile == "tools:":
+        tools = questionary.text(
+            "  Tool names (comma-separated, e.g. Bash,Task):"
+        ).ask()
+        if tools is None:
+            raise SystemExit(1)
+        try:
+            # Blank or only commas names no tools: ask again
+            profile_matchers(f"tools:{tools.strip()}")
+        except ValueError:
+            continue
+        profile = f"tools:{tools.strip()}"
+    return profile
+
+
 def _ask_existing_hooks(settings: dict) -> list[HookWrapChoice]:
     choices = []
     hooks = settings.get("hooks", {})
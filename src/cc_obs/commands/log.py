@@ -1,53 +1,108 @@
+# This module backs the `cc-obs-log` hook entry point, so it sticks to
+# builtins and cheap stdlib imports: no pathlib, datetime or argparse.
+import fcntl
 import json
+import os
 import sys
-from datetime import datetime, timezone
-from pathlib import Path
 
-from cc_obs.project import events_path, obs_dir
+from cc_obs.codec import loads, set_backend
+from cc_obs.config import load_config
+from cc_obs.eventlog import (
+    append_events,
+    append_side_records,
+    log_dir_for,
+    open_session,
+    process_start_ns,
+    read_state,
+    stamp_event,
+    write_state,
+)
+
+COLLECTOR_SOCKET = "collector.sock"
+COLLECTOR_TIMEOUT_S = 2.0
+# Per-transcript byte offset up to which tool_use ids have been attributed
+TRANSCRIPT_CACHE = "transcripts.json"
 
 
 def run() -> None:
+    # One event per process: importing orjson or msgspec would cost more than
+    # it saves. The collector, which sees every event, gets the fast backend.
+    set_backend("json")
     raw = sys.stdin.buffer.read()
     if not raw:
         return
 
     try:
-        event = json.loads(raw)
+        event = loads(raw)
     except json.JSONDecodeError:
         return
 
     cwd = event.get("cwd")
-    root = Path(cwd) if cwd else None
-    if root is None or not (root / ".claude").is_dir():
+    if not cwd or not os.path.isdir(os.path.join(cwd, ".claude")):
         return
 
-    out_dir = obs_dir(root)
-    out_dir.mkdir(parents=True, exist_ok=True)
+    started = process_start_ns()
+    if started is not None:
+        event["_start_ns"] = started
+        # Splice the field into the payload rather than re-serializing it; the
+        # object is known to be non-empty since it has a cwd
+        raw = raw.rstrip()[:-1] + b',"_start_ns":%d}' % started
 
-    out_file = events_path(root)
+    obs_dir = log_dir_for(cwd)
+    if _send_to_collector(obs_dir, raw):
+        return
 
-    seq = 1
-    if out_file.exists():
-        with open(out_file, "rb") as f:
-            seq = sum(1 for _ in f) + 1
+    stamp_event(event)
+    record_events(obs_dir, [event])
 
-    event["_ts"] = datetime.now(timezone.utc).isoformat()
-    event["_seq"] = seq
 
-    with open(out_file, "a") as f:
-        f.write(json.dumps(event, separators=(",", ":")) + "\n")
+def record_events(obs_dir: str, events: list[dict]) -> None:
+    config = load_config(obs_dir)
+    by_session: dict[str, list[dict]] = {}
+    for event in events:
+        by_session.setdefault(open_session(obs_dir, event, config), []).append(event)
 
-    if event.get("hook_event_name") == "SubagentStop":
-        _enrich_agent_tool_uses(out_file, event)
+    for log_dir, session_events in by_session.items():
+        append_events(log_dir, session_events, config)
+        for event in session_events:
+            if event.get("hook_event_name") == "SubagentStop":
+                _enrich_agent_tool_uses(log_dir, event, config)
 
 
-def _enrich_agent_tool_uses(events_file: Path, stop_event: dict) -> None:
-    transcript_path = stop_event.get("agent_transcript_path")
-    if not transcript_path:
-        return
+def _send_to_collector(obs_dir: str, payload: bytes) -> bool:
+    sock_path = os.path.join(obs_dir, COLLECTOR_SOCKET)
+    if not os.path.exists(sock_path):
+        return False
 
-    transcript = Path(transcript_path)
-    if not transcript.exists():
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(COLLECTOR_TIMEOUT_S)
+    try:
+        try:
+            sock.connect(sock_path)
+            sock.sendall(payload)
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            # Daemon not running (stale socket) or went away mid-send; a
+            # truncated payload is discarded by the daemon, so append directly.
+            return False
+        try:
+            # Ack arrives once the daemon's group commit has hit the log. On
+            # timeout the event may still be written, so don't append twice.
+            ack = sock.recv(1)
+        except OSError:
+            return True
+        # Closed without an ack: the daemon rejected the event or failed to
+        # write its batch
+        return bool(ack)
+    finally:
+        sock.close()
+
+
+def _enrich_agent_tool_uses(log_dir: str, stop_event: dict, config: dict) -> None:
+    transcript = stop_event.get("agent_transcript_path")
+    if not transcript or not os.path.exists(transcript):
         return
 
     agent_id = stop_event.get("agent_id")
@@ -55,45 +110,66 @@ def _enrich_agent_tool_uses(events_file: Path, stop_event: dict) -> None:
     if not agent_id:
         return
 
-    tool_use_ids = _extract_tool_use_ids(transcript)
+    tool_use_ids = _new_tool_use_ids(log_dir, transcript)
     if not tool_use_ids:
         return
 
-    lines = events_file.read_text().splitlines()
-    updated = []
-    changed = False
-    for line in lines:
-        try:
-            ev = json.loads(line)
-        except json.JSONDecodeError:
-            updated.append(line)
-            continue
-
-        if ev.get("tool_use_id") in tool_use_ids:
-            ev["_agent_id"] = agent_id
-            ev["_agent_type"] = agent_type
-            updated.append(json.dumps(ev, separators=(",", ":")))
-            changed = True
-        else:
-            updated.append(line)
-
-    if changed:
-        events_file.write_text("\n".join(updated) + "\n")
+    # Attribution is appended as a side record instead of rewriting the tool
+    # events in place; readers apply it when loading the log.
+    append_side_records(
+        log_dir,
+        [
+            {
+                "_attr": agent_id,
+                "_agent_type": agent_type,
+                "tool_use_ids": sorted(tool_use_ids),
+            }
+        ],
+        config,
+    )
+
+
+def _new_tool_use_ids(log_dir: str, transcript: str) -> set[str]:
+    # Only the part of the transcript appended since the last SubagentStop is
+    # parsed; ids before the cached offset already have attribution records.
+    fd = os.open(os.path.join(log_dir, TRANSCRIPT_CACHE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        cache = read_state(fd)
+        entry = cache.get(transcript) or {}
+        st = os.stat(transcript)
+        start = entry.get("offset", 0)
+        # A replaced or truncated transcript is rescanned from the beginning
+        if entry.get("ino") != st.st_ino or start > st.st_size:
+            start = 0
+        ids, offset = _extract_tool_use_ids(transcript, start)
+        cache[transcript] = {"ino": st.st_ino, "offset": offset}
+        write_state(fd, cache)
+    finally:
+        os.close(fd)
+    return ids
 
 
-def _extract_tool_use_ids(transcript: Path) -> set[str]:
+def _extract_tool_use_ids(transcript: str, start: int = 0) -> tuple[set[str], int]:
     ids: set[str] = set()
-    for line in transcript.read_text().splitlines():
-        try:
-            entry = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        message = entry.get("message")
-        if not message:
-            continue
-        for block in message.get("content", []):
-            if isinstance(block, dict) and block.get("type") == "tool_use":
-                tool_id = block.get("id")
-                if tool_id:
-                    ids.add(tool_id)
-    return ids
+    offset = start
+    with open(transcript, "rb") as f:
+        f.seek(start)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Still being written; pick it up on the next scan
+                break
+            offset += len(line)
+            try:
+                entry = loads(line)
+            except json.JSONDecodeError:
+                continue
+            message = entry.get("message")
+            if not message:
+                continue
+            for block in message.get("content", []):
+                if isinstance(block, dict) and block.get("type") == "tool_use":
+                    tool_id = block.get("id")
+                    if tool_id:
+                        ids.add(tool_id)
+    return ids, offset
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+from cc_obs.project import obs_dir
+from cc_obs.reader import format_size, list_sessions
+
+
+def run() -> None:
+    root = Path.cwd()
+    if not (root / ".claude").is_dir():
+        print("No .claude directory found", file=sys.stderr)
+        sys.exit(1)
+
+    sessions = list_sessions(obs_dir(root))
+    if not sessions:
+        print("No sessions logged yet")
+        return
+
+    for s in sessions:
+        started = (s.get("started") or "")[:19].replace("T", " ")
+        model = s.get("model") or "unknown"
+        print(
+            f"{s.get('session_id') or s['dir']}  {started:19}  {model}  "
+            f"{s['events']} events ({format_size(s['bytes'])})"
+        )
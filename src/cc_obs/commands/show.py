@@ -0,0 +1,27 @@
+import json
+import sys
+from pathlib import Path
+
+from cc_obs.project import obs_dir
+from cc_obs.reader import inline_blobs, lookup_tool_use, resolve_log_dir
+
+
+def run(tool_use_id: str, session: str | None = None) -> None:
+    root = Path.cwd()
+    if not (root / ".claude").is_dir():
+        print("No .claude directory found", file=sys.stderr)
+        sys.exit(1)
+
+    log_dir = resolve_log_dir(obs_dir(root), session)
+    if log_dir is None:
+        print(f"No session matching {session}", file=sys.stderr)
+        sys.exit(1)
+        return
+
+    events = lookup_tool_use(log_dir, tool_use_id)
+    if not events:
+        print(f"No events for tool use {tool_use_id}", file=sys.stderr)
+        sys.exit(1)
+
+    for ev in events:
+        print(json.dumps(inline_blobs(log_dir, ev), indent=2))
@@ -0,0 +1,11 @@
+from cc_obs.trace import end_span, start_span
+
+
+def run(
+    action: str, target: str, parent: str | None = None, error: bool = False
+) -> None:
+    # Outside cc-obs wrap both actions are no-ops, so hooks run unchanged
+    if action == "start":
+        print(start_span(target, parent=parent) or "")
+    else:
+        end_span(target or None, error=error)
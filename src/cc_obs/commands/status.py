@@ -1,57 +1,82 @@
-import json
 import sys
-from collections import Counter
-from datetime import datetime
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from cc_obs.project import events_path
+from cc_obs.project import obs_dir
+from cc_obs.reader import (
+    ReadStats,
+    blob_usage,
+    elapsed_ns,
+    event_counts,
+    format_size,
+    iter_events,
+    log_files,
+    log_size,
+    open_tool_uses,
+    overhead_stats,
+    read_dropped,
+    read_tool_index,
+    resolve_log_dir,
+)
 
+# All that status reads of each event
+SUMMARY_FIELDS = [
+    "session_id",
+    "model",
+    "hook_event_name",
+    "tool_name",
+    "_sample",
+    "_ts",
+    "_ts_ns",
+    "_mono_ns",
+    "_overhead_us",
+    "_wrap",
+]
 
-def run() -> None:
+
+@dataclass
+class _Scan:
+    count: int = 0
+    head: dict | None = None
+    first: dict | None = None
+    last: dict | None = None
+    wraps: list[dict] = field(default_factory=list)
+    timed: list[dict] = field(default_factory=list)
+
+
+def run(session: str | None = None) -> None:
     root = Path.cwd()
     if not (root / ".claude").is_dir():
         print("No .claude directory found", file=sys.stderr)
         sys.exit(1)
 
-    path = events_path(root)
-    if not path.exists():
-        print("No events logged yet")
+    log_dir = resolve_log_dir(obs_dir(root), session)
+    if log_dir is None:
+        print(f"No session matching {session}", file=sys.stderr)
+        sys.exit(1)
         return
-
-    events = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                events.append(json.loads(line))
-
-    if not events:
+    stats = ReadStats()
+    scan = _Scan()
+    events = iter_events(log_files(log_dir), fields=SUMMARY_FIELDS, stats=stats)
+    type_counts, tool_counts = event_counts(_tally(events, scan), read_dropped(log_dir))
+    if not scan.count:
         print("No events logged yet")
         return
 
-    session_id = events[0].get("session_id", "unknown")
-    model = events[0].get("model", "unknown")
-
-    event_counts = Counter(e.get("hook_event_name", "unknown") for e in events)
-    tool_counts = Counter(e["tool_name"] for e in events if "tool_name" in e)
-
-    timestamps = [e["_ts"] for e in events if "_ts" in e]
-    first = timestamps[0] if timestamps else None
-    last = timestamps[-1] if timestamps else None
+    head = scan.head or {}
+    session_id = head.get("session_id", "unknown")
+    model = head.get("model", "unknown")
+    seen = sum(type_counts.values())
+    first, last = scan.first, scan.last
 
-    file_size = path.stat().st_size
-    if file_size < 1024:
-        size_str = f"{file_size} B"
-    elif file_size < 1024 * 1024:
-        size_str = f"{file_size / 1024:.1f} KB"
-    else:
-        size_str = f"{file_size / (1024 * 1024):.1f} MB"
+    size_str = format_size(log_size(log_dir))
+    blob_count, blob_bytes = blob_usage(log_dir)
 
+    span = elapsed_ns(first, last) if first and last else None
     duration_str = ""
-    if first and last:
-        t0 = datetime.fromisoformat(first)
-        t1 = datetime.fromisoformat(last)
-        secs = (t1 - t0).total_seconds()
+    if span is not None:
+        secs = span / 1e9
         if secs < 60:
             duration_str = f"{secs:.1f}s"
         elif secs < 3600:
@@ -61,13 +86,24 @@ def run() -> None:
 
     print(f"Session: {session_id}")
     print(f"Model:   {model}")
-    print(f"Events:  {len(events)} ({size_str})")
-    if duration_str:
-        print(f"Span:    {duration_str} ({first} → {last})")
+    print(f"Events:  {scan.count} ({size_str})")
+    if seen != scan.count:
+        print(f"Seen:    ~{seen} before ingestion rules")
+    if stats.skipped:
+        parts = []
+        if stats.corrupt:
+            parts.append(f"{stats.corrupt} corrupt")
+        if stats.torn:
+            parts.append(f"{stats.torn} partially written")
+        print(f"Skipped: {', '.join(parts)} line{'s' if stats.skipped != 1 else ''}")
+    if blob_count:
+        print(f"Blobs:   {blob_count} ({format_size(blob_bytes)})")
+    if first and last and duration_str:
+        print(f"Span:    {duration_str} ({first['_ts']} → {last['_ts']})")
 
     print()
     print("Events by type:")
-    for name, count in event_counts.most_common():
+    for name, count in type_counts.most_common():
         print(f"  {name}: {count}")
 
     if tool_counts:
@@ -76,8 +112,101 @@ def run() -> None:
         for name, count in tool_counts.most_common():
             print(f"  {name}: {count}")
 
-    wrap_events = [e for e in events if "_wrap" in e]
-    if wrap_events:
-        total_ms = sum(e["_wrap"]["duration_ms"] for e in wrap_events)
+    wraps = scan.wraps
+    if wraps:
+        total_ms = sum(w["duration_ms"] for w in wraps)
         print()
-        print(f"Wrapped hooks: {len(wrap_events)} ({total_ms:.0f}ms total)")
+        print(f"Wrapped hooks: {len(wraps)} ({total_ms:.0f}ms total)")
+        by_hook: dict[str, list[dict]] = {}
+        for wrap in wraps:
+            by_hook.setdefault(wrap.get("name") or wrap["command"], []).append(wrap)
+        for label, runs in by_hook.items():
+            print(f"  {label}: {_hook_summary(runs)}")
+
+        # Hooks that blew their budget or timeout most often first
+        over = []
+        for label, runs in by_hook.items():
+            budgeted = [r for r in runs if "budget_ms" in r]
+            violations = sum(1 for r in budgeted if r["over_budget"])
+            timeouts = sum(1 for r in runs if r.get("timed_out"))
+            if violations or timeouts:
+                parts = []
+                if budgeted:
+                    budget = budgeted[-1]["budget_ms"]
+                    parts.append(
+                        f"{violations} of {len(budgeted)} runs over {budget:g}ms"
+                    )
+                if timeouts:
+                    parts.append(f"{timeouts} of {len(runs)} timed out")
+                over.append(((violations, timeouts), label, ", ".join(parts)))
+        if over:
+            print()
+            print("Over budget:")
+            for _, label, summary in sorted(over, key=lambda o: o[0], reverse=True):
+                print(f"  {label}: {summary}")
+
+    overhead = overhead_stats(scan.timed)
+    if overhead:
+        total_ms = sum(o["total_ms"] for o in overhead.values())
+        count = sum(o["count"] for o in overhead.values())
+        print()
+        print(f"Observer overhead: {total_ms:.0f}ms total over {count} events")
+        for name, o in sorted(overhead.items(), key=lambda kv: -kv[1]["total_ms"]):
+            print(
+                f"  {name}: {o['total_ms']:.0f}ms (p50 {o['p50_ms']:.1f}ms, "
+                f"p95 {o['p95_ms']:.1f}ms, max {o['max_ms']:.1f}ms)"
+            )
+
+    open_calls = open_tool_uses(read_tool_index(log_dir))
+    if open_calls:
+        print()
+        print(f"Open tool calls: {len(open_calls)}")
+
+
+def _tally(events: Iterable[dict], scan: _Scan) -> Iterator[dict]:
+    # Passes events through while keeping what status needs besides counts,
+    # so the log is read once and never held in memory
+    for e in events:
+        scan.count += 1
+        if scan.head is None:
+            scan.head = e
+        if "_ts" in e:
+            if scan.first is None:
+                scan.first = e
+            scan.last = e
+        if "_wrap" in e:
+            scan.wraps.append(e["_wrap"])
+        if "_overhead_us" in e:
+            scan.timed.append(e)
+        yield e
+
+
+def _hook_summary(runs: list[dict]) -> str:
+    n = len(runs)
+    parts = [f"{n} run{'s' if n != 1 else ''}"]
+    parts.append(f"avg {sum(r['duration_ms'] for r in runs) / n:.0f}ms")
+    # Older events predate spawn/first-output timing and rusage
+    spawn = [r["spawn_ms"] for r in runs if r.get("spawn_ms") is not None]
+    if spawn:
+        parts.append(f"spawn {sum(spawn) / len(spawn):.1f}ms")
+    first = [r["first_output_ms"] for r in runs if r.get("first_output_ms") is not None]
+    if first:
+        parts.append(f"first output {sum(first) / len(first):.0f}ms")
+    for mode, served in [("warm", True), ("cold", False)]:
+        durations = [r["duration_ms"] for r in runs if r.get("warm") is served]
+        if durations:
+            avg = sum(durations) / len(durations)
+            parts.append(f"{mode} avg {avg:.0f}ms ({len(durations)})")
+    hits = [r for r in runs if r.get("cache") == "hit"]
+    if hits:
+        saved = sum(r["saved_ms"] for r in hits)
+        parts.append(f"{len(hits)} cache hits (saved {saved:.0f}ms)")
+    usage = [r["rusage"] for r in runs if r.get("rusage")]
+    if usage:
+        cpu = sum(u["user_ms"] + u["sys_ms"] for u in usage) / len(usage)
+        rss = max(u["max_rss_kb"] for u in usage)
+        blocks = sum(u["in_blocks"] + u["out_blocks"] for u in usage) / len(usage)
+        parts.append(f"cpu {cpu:.0f}ms")
+        parts.append(f"max RSS {format_size(rss * 1024)}")
+        parts.append(f"{blocks:.0f} blocks I/O")
+    return ", ".join(parts)
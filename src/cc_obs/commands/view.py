@@ -1,53 +1,65 @@
-import json
 import sys
 import tempfile
 import webbrowser
 from pathlib import Path
 
-from cc_obs.project import events_path, view_path
+from cc_obs.project import obs_dir, view_path
+from cc_obs.reader import (
+    ReadStats,
+    inline_blobs,
+    read_dropped,
+    read_events,
+    read_log,
+    resolve_log_dir,
+)
 from cc_obs.viewer import render_html
 
 
-def run(no_open: bool = False, log_file: str | None = None) -> None:
+def run(
+    no_open: bool = False,
+    log_file: str | None = None,
+    from_seq: int | None = None,
+    to_seq: int | None = None,
+    session: str | None = None,
+    inline: bool = False,
+) -> None:
+    stats = ReadStats()
     if log_file:
         lf = Path(log_file)
         if not lf.exists():
             print(f"File not found: {log_file}", file=sys.stderr)
             sys.exit(1)
             return
-        events = _read_events(lf)
+        events = read_events(lf, stats)
         if not events:
             print("No events in file")
             return
+        if inline:
+            events = inline_blobs(lf.parent, events)
         vp = Path(tempfile.gettempdir()) / "cc-obs-view.html"
-        vp.write_text(render_html(events))
+        vp.write_text(render_html(events, read_dropped(lf.parent)))
         print(f"Generated {vp}")
     else:
         root = Path.cwd()
         if not (root / ".claude").is_dir():
             print("No .claude directory found", file=sys.stderr)
             sys.exit(1)
-        ep = events_path(root)
-        if not ep.exists():
-            print("No events logged yet")
+        log_dir = resolve_log_dir(obs_dir(root), session)
+        if log_dir is None:
+            print(f"No session matching {session}", file=sys.stderr)
+            sys.exit(1)
             return
-        events = _read_events(ep)
+        events = read_log(log_dir, min_seq=from_seq, max_seq=to_seq, stats=stats)
         if not events:
             print("No events logged yet")
             return
+        if inline:
+            events = inline_blobs(log_dir, events)
         vp = view_path(root)
-        vp.write_text(render_html(events))
+        vp.write_text(render_html(events, read_dropped(log_dir)))
         print(f"Generated {vp.relative_to(root)}")
+    if stats.skipped:
+        print(f"Skipped {stats.skipped} unreadable log lines", file=sys.stderr)
 
     if not no_open:
         webbrowser.open(vp.as_uri())
-
-
-def _read_events(path: Path) -> list[dict]:
-    events = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                events.append(json.loads(line))
-    return events
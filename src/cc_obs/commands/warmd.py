@@ -0,0 +1,227 @@
+import atexit
+import contextlib
+import importlib
+import io
+import json
+import os
+import runpy
+import shutil
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from pathlib import Path
+
+from cc_obs.commands.collectord import is_live
+from cc_obs.commands.wrap import WARM_SOCKET, rusage_dict
+from cc_obs.config import load_config
+from cc_obs.project import obs_dir
+
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "WarmServer"
+
+    def handle(self) -> None:
+        # One JSON line (argv, cwd, env) with the hook's stdin, stdout and
+        # stderr pipe ends attached as SCM_RIGHTS
+        try:
+            data, fds, _, _ = socket.recv_fds(self.request, 64 * 1024, 3)
+        except OSError:
+            return
+        try:
+            while not data.endswith(b"\n") and len(data) < MAX_REQUEST_BYTES:
+                chunk = self.request.recv(64 * 1024)
+                if not chunk:
+                    break
+                data += chunk
+            try:
+                request = json.loads(data)
+                target = python_target(
+                    request["argv"], request["cwd"], request["env"].get("PATH")
+                )
+            except (ValueError, KeyError, TypeError):
+                target = None
+            if len(fds) != 3 or target is None:
+                self._reply({"error": "not a warmable python command"})
+                return
+            pid = os.fork()
+            if pid == 0:
+                _child(request, target, fds)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+        self._reply({"pid": pid})
+        _, status, rusage = os.wait4(pid, 0)
+        self._reply(
+            {
+                "exit_code": os.waitstatus_to_exitcode(status),
+                "rusage": rusage_dict(rusage),
+            }
+        )
+
+    def _reply(self, message: dict) -> None:
+        try:
+            self.request.sendall(json.dumps(message).encode() + b"\n")
+        except OSError:
+            pass
+
+
+class WarmServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    # Each request is handled in a forked, single-threaded copy of the server,
+    # which forks again for the hook and waits on it. Forking from a threaded
+    # server could leave the hook with a lock another thread held.
+    request_queue_size = 128
+    # Shutting down doesn't wait for running hooks
+    block_on_close = False
+
+    def __init__(self, log_dir: str, preload: list[str]) -> None:
+        self.log_dir = log_dir
+        self.sock_path = os.path.join(log_dir, WARM_SOCKET)
+        # The point of the server: pay for these imports once, and let every
+        # forked hook start with them already in sys.modules
+        self.loaded = []
+        for name in preload:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"cc-obs warmd: cannot preload {name}: {e}", file=sys.stderr)
+                continue
+            self.loaded.append(name)
+        os.makedirs(log_dir, exist_ok=True)
+        super().__init__(self.sock_path, _Handler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.sock_path)
+        except FileNotFoundError:
+            pass
+
+
+def python_target(
+    argv: list[str], cwd: str = ".", path: str | None = None
+) -> tuple[str, str, list[str]] | None:
+    # `python -m module args...` or `python script.py args...` run by the
+    # server's own interpreter, found as the hook would with its cwd and PATH.
+    # Anything else (another python or venv, interpreter flags) runs cold.
+    if len(argv) < 2 or not os.path.basename(argv[0]).startswith("python"):
+        return None
+    exe = argv[0]
+    if os.sep in exe:
+        exe = os.path.join(cwd, exe)
+    exe = shutil.which(exe, path=path)
+    if exe is None or _interpreter(exe) != _interpreter(sys.executable):
+        return None
+    if argv[1] == "-m":
+        if len(argv) < 3:
+            return None
+        return "module", argv[2], argv[3:]
+    if argv[1].startswith("-"):
+        return None
+    return "path", argv[1], argv[2:]
+
+
+def _interpreter(exe: str) -> tuple[str, str | None]:
+    # The binary, and the venv it belongs to: a venv's python is usually a
+    # symlink to the base interpreter, with different packages
+    venv = os.path.dirname(os.path.dirname(os.path.abspath(exe)))
+    if not os.path.exists(os.path.join(venv, "pyvenv.cfg")):
+        return os.path.realpath(exe), None
+    return os.path.realpath(exe), os.path.realpath(venv)
+
+
+def _child(request: dict, target: tuple[str, str, list[str]], fds: list[int]) -> None:
+    code = 1
+    try:
+        os.setsid()
+        for fd, std in zip(fds, (0, 1, 2)):
+            os.dup2(fd, std)
+        # Drop the listening socket and any other request's pipes, which would
+        # otherwise hold those hooks' output open
+        os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False))
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False))
+        sys.stderr = io.TextIOWrapper(
+            io.FileIO(2, "w", closefd=False),
+            errors="backslashreplace",
+            write_through=True,
+        )
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = _run_hook(request, target)
+    except BaseException:
+        # Report it like the interpreter would; the finally still exits
+        traceback.print_exc()
+        raise
+    finally:
+        # The interpreter's own shutdown, short of tearing it down: wait for
+        # the hook's threads and run its atexit handlers before flushing
+        try:
+            threading._shutdown()  # ty: ignore[unresolved-attribute]
+            atexit._run_exitfuncs()
+        except BaseException:  # noqa: BLE001
+            traceback.print_exc()
+        for stream in (sys.stdout, sys.stderr):
+            with contextlib.suppress(OSError, ValueError):
+                stream.flush()
+        os._exit(code)
+
+
+def _run_hook(request: dict, target: tuple[str, str, list[str]]) -> int:
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    kind, name, args = target
+    try:
+        if kind == "module":
+            sys.argv = [name, *args]
+            sys.path.insert(0, os.getcwd())
+            runpy.run_module(name, run_name="__main__", alter_sys=True)
+        else:
+            sys.argv = [name, *args]
+            sys.path.insert(0, os.path.dirname(os.path.abspath(name)))
+            runpy.run_path(name, run_name="__main__")
+    except SystemExit as e:
+        # Same conversions the interpreter does at exit
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    return 0
+
+
+def run() -> None:
+    root = Path.cwd()
+    if not (root / ".claude").is_dir():
+        print("No .claude directory found", file=sys.stderr)
+        sys.exit(1)
+
+    log_dir = obs_dir(root)
+    sock_path = log_dir / WARM_SOCKET
+    if sock_path.exists():
+        if is_live(str(sock_path)):
+            print("cc-obs warmd is already running", file=sys.stderr)
+            sys.exit(1)
+        sock_path.unlink()
+
+    # Project modules import the same way `python -m` would from the root
+    sys.path.insert(0, str(root))
+    config = load_config(str(log_dir))
+    server = WarmServer(str(log_dir), config["warm"]["preload"])
+    # No thread to call shutdown() from: unwind serve_forever() instead
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    preloaded = f" (preloaded {', '.join(server.loaded)})" if server.loaded else ""
+    print(f"Listening on {sock_path.relative_to(root)}{preloaded}")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,63 +1,447 @@
 import json
+import os
+import selectors
+import signal
 import subprocess
 import sys
 import time
-from datetime import datetime, timezone
 from pathlib import Path
 
-from cc_obs.project import events_path, obs_dir
+from cc_obs.cache import CACHE_DIR, cache_key, lookup, store
+from cc_obs.codec import loads, set_backend
+from cc_obs.config import DEFAULTS, load_config
+from cc_obs.eventlog import append_event, open_session, stamp_event, utc_timestamp
+from cc_obs.project import obs_dir
+from cc_obs.trace import LOG_DIR_ENV, SPAN_ID_ENV, TRACE_ID_ENV, new_id
 
+# Per stream, how much output is kept for the _wrap record (half from the
+# start, half from the end); everything is still passed through
+DEFAULT_CAPTURE_BYTES = 64 * 1024
+CHUNK_BYTES = 64 * 1024
+# Exit code when --timeout-ms kills the hook, as with timeout(1)
+TIMEOUT_EXIT_CODE = 124
+WARM_SOCKET = "warmd.sock"
+WARM_TIMEOUT_S = 2.0
+# Once the hook has closed its output, how often to check whether it exited
+# before its timeout (backing off from the first to the second)
+REAP_POLL_S = (0.001, 0.05)
 
-def run(cmd: list[str], name: str = "") -> None:
+
+class _Capture:
+    def __init__(self, limit: int) -> None:
+        self.head_limit = limit - limit // 2
+        self.tail_limit = limit // 2
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self.first_at: float | None = None
+
+    def add(self, chunk: bytes) -> None:
+        if self.first_at is None:
+            self.first_at = time.monotonic()
+        self.total += len(chunk)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk and self.tail_limit:
+            self.tail += chunk
+            del self.tail[: -self.tail_limit]
+
+    def complete(self) -> bytes | None:
+        # The full output, if none of it had to be dropped
+        if self.total == len(self.head) + len(self.tail):
+            return bytes(self.head + self.tail)
+        return None
+
+    def text(self) -> str:
+        dropped = self.total - len(self.head) - len(self.tail)
+        if dropped <= 0:
+            return (self.head + self.tail).decode(errors="replace")
+        marker = f"\n[... {dropped} bytes truncated ...]\n"
+        return (
+            self.head.decode(errors="replace")
+            + marker
+            + self.tail.decode(errors="replace")
+        )
+
+
+class _WarmProcess:
+    # A hook forked by cc-obs warmd, with the parts of Popen that _pump uses
+    def __init__(self, sock, pid: int, stdin, stdout, stderr) -> None:
+        self.sock = sock
+        self.pid = pid
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def reap(self, deadline: float | None) -> tuple[int, dict | None, bool]:
+        # warmd reaps the hook and reports its exit code and rusage; past the
+        # deadline the hook is killed and that report is still waited for
+        line = bytearray()
+        timed_out = False
+        try:
+            if deadline is not None:
+                self.sock.settimeout(max(deadline - time.monotonic(), 0.001))
+                try:
+                    _recv_line(self.sock, line)
+                except TimeoutError:
+                    _kill_group(self.pid)
+                    timed_out = True
+            self.sock.settimeout(WARM_TIMEOUT_S if deadline is not None else None)
+            _recv_line(self.sock, line)
+            result = json.loads(line)
+        except (OSError, ValueError):
+            result = {}
+        finally:
+            self.sock.close()
+        if "exit_code" not in result:
+            print("cc-obs wrap: lost connection to cc-obs warmd", file=sys.stderr)
+            return 1, None, timed_out
+        return result["exit_code"], result["rusage"], timed_out
+
+
+def run(
+    cmd: list[str],
+    name: str = "",
+    capture_bytes: int = DEFAULT_CAPTURE_BYTES,
+    budget_ms: float | None = None,
+    timeout_ms: float | None = None,
+    cache: bool = False,
+    warm: bool = False,
+) -> None:
     if not cmd:
         print("Usage: cc-obs wrap -- <command>", file=sys.stderr)
         sys.exit(1)
 
+    # Like cc-obs-log, a wrapped hook handles one event per process
+    set_backend("json")
     raw = sys.stdin.buffer.read()
+    event: dict = {}
+    if raw:
+        try:
+            parsed = loads(raw)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict):
+            event = parsed
+    # The event is only logged when its cwd is a project
+    cwd = event.get("cwd")
+    root = Path(cwd) if cwd else None
+    if root is not None and not (root / ".claude").is_dir():
+        root = None
+    config = load_config(str(obs_dir(root))) if root is not None else None
 
-    start = time.monotonic()
-    result = subprocess.run(cmd, input=raw, capture_output=True)
-    duration_ms = round((time.monotonic() - start) * 1000, 1)
+    # Trace context for cc-obs span / cc_obs.trace inside the hook. The session
+    # is opened first so its spans land in the same log as this record; a wrap
+    # nested in a traced hook joins that trace as a child.
+    trace: dict = {}
+    env = dict(os.environ)
+    log_dir = None
+    if root is not None and config is not None:
+        log_dir = open_session(
+            str(obs_dir(root)), {**event, "_ts": utc_timestamp()}, config
+        )
+        trace = {"trace_id": os.environ.get(TRACE_ID_ENV) or new_id()}
+        if os.environ.get(TRACE_ID_ENV) and os.environ.get(SPAN_ID_ENV):
+            trace["parent_span_id"] = os.environ[SPAN_ID_ENV]
+        trace["span_id"] = new_id()
+        env[TRACE_ID_ENV] = trace["trace_id"]
+        env[SPAN_ID_ENV] = trace["span_id"]
+        env[LOG_DIR_ENV] = log_dir
+
+    # Flags override the limits configured for this hook's --name
+    limits = dict(config["hooks"].get(name, {})) if config and name else {}
+    if budget_ms is not None:
+        limits["budget_ms"] = budget_ms
+    if timeout_ms is not None:
+        limits["timeout_ms"] = timeout_ms
+    timeout_ms = limits.get("timeout_ms")
+
+    settings = {**DEFAULTS["cache"], **(config or {}).get("cache", {})}
+    cache_dir = key = None
+    if cache and root is not None:
+        cache_dir = str(obs_dir(root) / CACHE_DIR)
+        key = cache_key(cmd, raw, settings["ignore"])
 
-    # Pass through stdout/stderr exactly
-    sys.stdout.buffer.write(result.stdout)
-    sys.stdout.buffer.flush()
-    sys.stderr.buffer.write(result.stderr)
-    sys.stderr.buffer.flush()
+    start = time.monotonic()
+    hit = lookup(cache_dir, key, settings["ttl_s"]) if cache_dir and key else None
+    if hit is not None:
+        returncode = hit["exit_code"]
+        for data, sink in [
+            (hit["stdout"], sys.stdout.buffer),
+            (hit["stderr"], sys.stderr.buffer),
+        ]:
+            sink.write(data)
+            sink.flush()
+        duration_ms = _ms_since(start)
+        timed_out = False
+        wrap_data = {
+            "command": " ".join(cmd),
+            "exit_code": returncode,
+            "duration_ms": duration_ms,
+            "cache": "hit",
+            "saved_ms": round(max(hit["duration_ms"] - duration_ms, 0), 1),
+            "stdout": hit["stdout"].decode(errors="replace"),
+            "stderr": hit["stderr"].decode(errors="replace"),
+            "stdout_bytes": len(hit["stdout"]),
+            "stderr_bytes": len(hit["stderr"]),
+        }
+    else:
+        warm_sock = str(obs_dir(root) / WARM_SOCKET) if warm and root else None
+        returncode, timed_out, wrap_data, captures = _execute(
+            cmd, raw, capture_bytes, timeout_ms, start, env, warm_sock
+        )
+        duration_ms = wrap_data["duration_ms"]
+        if timed_out:
+            print(
+                f"cc-obs wrap: {name or cmd[0]} killed after {timeout_ms:g}ms timeout",
+                file=sys.stderr,
+            )
+        if cache_dir and key:
+            wrap_data["cache"] = "miss"
+            stdout, stderr = (c.complete() for c in captures)
+            # Only whole results are replayable, and a timeout isn't a result
+            if not timed_out and stdout is not None and stderr is not None:
+                store(
+                    cache_dir,
+                    key,
+                    returncode,
+                    duration_ms,
+                    stdout=stdout,
+                    stderr=stderr,
+                    max_bytes=settings["max_bytes"],
+                )
 
     # Log the wrapped event
-    if raw:
-        try:
-            event = json.loads(raw)
-        except json.JSONDecodeError:
-            event = {}
-
-        cwd = event.get("cwd")
-        root = Path(cwd) if cwd else None
-        if root is not None and (root / ".claude").is_dir():
-            out_dir = obs_dir(root)
-            out_dir.mkdir(parents=True, exist_ok=True)
-            out_file = events_path(root)
-
-            seq = 1
-            if out_file.exists():
-                with open(out_file, "rb") as f:
-                    seq = sum(1 for _ in f) + 1
-
-            event["_ts"] = datetime.now(timezone.utc).isoformat()
-            event["_seq"] = seq
-            wrap_data = {
-                "command": " ".join(cmd),
-                "exit_code": result.returncode,
-                "duration_ms": duration_ms,
-                "stdout": result.stdout.decode(errors="replace"),
-                "stderr": result.stderr.decode(errors="replace"),
-            }
-            if name:
-                wrap_data["name"] = name
-            event["_wrap"] = wrap_data
-
-            with open(out_file, "a") as f:
-                f.write(json.dumps(event, separators=(",", ":")) + "\n")
-
-    sys.exit(result.returncode)
+    if log_dir is not None:
+        stamp_event(event)
+        if name:
+            wrap_data["name"] = name
+        if "budget_ms" in limits:
+            wrap_data["budget_ms"] = limits["budget_ms"]
+            wrap_data["over_budget"] = duration_ms > limits["budget_ms"]
+        if timeout_ms is not None:
+            wrap_data["timeout_ms"] = timeout_ms
+            wrap_data["timed_out"] = timed_out
+        wrap_data.update(trace)
+        event["_wrap"] = wrap_data
+        append_event(log_dir, event, config)
+
+    sys.exit(returncode)
+
+
+def _execute(
+    cmd: list[str],
+    raw: bytes,
+    capture_bytes: int,
+    timeout_ms: float | None,
+    start: float,
+    env: dict[str, str],
+    warm_sock: str | None = None,
+) -> tuple[int, bool, dict, tuple[_Capture, _Capture]]:
+    proc = _start_warm(cmd, warm_sock, env) if warm_sock else None
+    served_warm = proc is not None
+    if proc is None:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            # Own process group, so a timeout also kills anything the hook started
+            start_new_session=timeout_ms is not None,
+        )
+    # Popen returns once the child has exec'd (or failed to); warmd replies
+    # once it has forked
+    spawn_ms = _ms_since(start)
+    deadline = start + timeout_ms / 1000 if timeout_ms is not None else None
+    stdout, stderr = _pump(proc, raw, capture_bytes, deadline)
+    # The deadline is for the hook's exit, not its output: it can close its
+    # output and keep running, or exit in time leaving a child that holds it
+    if isinstance(proc, _WarmProcess):
+        returncode, usage, timed_out = proc.reap(deadline)
+    else:
+        returncode, usage, timed_out = _reap(proc, deadline)
+    if timed_out:
+        returncode = TIMEOUT_EXIT_CODE
+    first_output = [c.first_at for c in (stdout, stderr) if c.first_at is not None]
+    wrap_data = {
+        "command": " ".join(cmd),
+        "exit_code": returncode,
+        "duration_ms": _ms_since(start),
+        "spawn_ms": spawn_ms,
+        "first_output_ms": (
+            round((min(first_output) - start) * 1000, 1) if first_output else None
+        ),
+        "rusage": usage,
+        "stdout": stdout.text(),
+        "stderr": stderr.text(),
+        "stdout_bytes": stdout.total,
+        "stderr_bytes": stderr.total,
+    }
+    if warm_sock:
+        wrap_data["warm"] = served_warm
+    return returncode, timed_out, wrap_data, (stdout, stderr)
+
+
+def _start_warm(
+    cmd: list[str], sock_path: str, env: dict[str, str]
+) -> _WarmProcess | None:
+    # Hand the hook to cc-obs warmd: it forks a preloaded interpreter that
+    # reads and writes our pipes directly. None means run it cold.
+    if not os.path.exists(sock_path):
+        return None
+
+    import socket
+
+    request = json.dumps({"argv": cmd, "cwd": os.getcwd(), "env": env}).encode()
+    stdin_r, stdin_w = os.pipe()
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(WARM_TIMEOUT_S)
+    try:
+        sock.connect(sock_path)
+        sent = socket.send_fds(sock, [request + b"\n"], [stdin_r, stdout_w, stderr_w])
+        sock.sendall((request + b"\n")[sent:])
+        reply = json.loads(_recv_line(sock, bytearray()))
+    except (OSError, ValueError):
+        reply = {}
+    finally:
+        for fd in (stdin_r, stdout_w, stderr_w):
+            os.close(fd)
+    if "pid" not in reply:
+        sock.close()
+        for fd in (stdin_w, stdout_r, stderr_r):
+            os.close(fd)
+        return None
+    return _WarmProcess(
+        sock,
+        reply["pid"],
+        os.fdopen(stdin_w, "wb"),
+        os.fdopen(stdout_r, "rb"),
+        os.fdopen(stderr_r, "rb"),
+    )
+
+
+def _recv_line(sock, line: bytearray) -> bytearray:
+    # A byte at a time into line, which survives a timeout part way through;
+    # warmd's replies are a few hundred bytes
+    while not line.endswith(b"\n"):
+        byte = sock.recv(1)
+        if not byte:
+            break
+        line += byte
+    return line
+
+
+def _reap(proc: subprocess.Popen, deadline: float | None) -> tuple[int, dict, bool]:
+    # wait4 instead of proc.wait(): same reaping, plus the child's rusage
+    timed_out = False
+    poll = REAP_POLL_S[0]
+    while True:
+        if deadline is None or timed_out:
+            _, status, rusage = os.wait4(proc.pid, 0)
+            break
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _kill_group(proc.pid)
+            timed_out = True
+            continue
+        time.sleep(min(poll, remaining))
+        poll = min(poll * 2, REAP_POLL_S[1])
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, rusage_dict(rusage), timed_out
+
+
+def _kill_group(pid: int) -> None:
+    # The hook leads its own process group (start_new_session, or setsid in
+    # warmd), so this also kills anything it started
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _ms_since(start: float) -> float:
+    return round((time.monotonic() - start) * 1000, 1)
+
+
+def rusage_dict(ru) -> dict:
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    max_rss_kb = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+    return {
+        "user_ms": round(ru.ru_utime * 1000, 1),
+        "sys_ms": round(ru.ru_stime * 1000, 1),
+        "max_rss_kb": max_rss_kb,
+        "in_blocks": ru.ru_inblock,
+        "out_blocks": ru.ru_oublock,
+        "vol_ctx_switches": ru.ru_nvcsw,
+        "invol_ctx_switches": ru.ru_nivcsw,
+    }
+
+
+def _pump(
+    proc: subprocess.Popen | _WarmProcess,
+    raw: bytes,
+    capture_bytes: int,
+    deadline: float | None,
+) -> tuple[_Capture, _Capture]:
+    # Feed stdin and forward stdout/stderr as they arrive, so Claude Code sees
+    # the hook's output without waiting for it to exit and memory stays bounded
+    stdin, stdout, stderr = proc.stdin, proc.stdout, proc.stderr
+    assert stdin is not None and stdout is not None and stderr is not None
+    captures = {}
+    sinks = {}
+    sel = selectors.DefaultSelector()
+    for stream, sink in [(stdout, sys.stdout.buffer), (stderr, sys.stderr.buffer)]:
+        captures[stream] = _Capture(capture_bytes)
+        sinks[stream] = sink
+        sel.register(stream, selectors.EVENT_READ, stream)
+
+    pending = memoryview(raw)
+    if pending:
+        os.set_blocking(stdin.fileno(), False)
+        sel.register(stdin, selectors.EVENT_WRITE, stdin)
+    else:
+        stdin.close()
+
+    while sel.get_map():
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                # Keep what was captured so far and stop reading: the pipes may
+                # be held open by the hook or by children it left running.
+                # Whether the hook itself timed out is up to the reap.
+                for key in list(sel.get_map().values()):
+                    sel.unregister(key.data)
+                    key.data.close()
+                break
+        for key, _ in sel.select(timeout):
+            stream = key.data
+            if stream is stdin:
+                try:
+                    written = os.write(stream.fileno(), pending[:CHUNK_BYTES])
+                except BrokenPipeError:
+                    # The hook exited without reading all of its input
+                    written = len(pending)
+                pending = pending[written:]
+                if not pending:
+                    sel.unregister(stream)
+                    stream.close()
+                continue
+            chunk = os.read(stream.fileno(), CHUNK_BYTES)
+            if not chunk:
+                sel.unregister(stream)
+                stream.close()
+                continue
+            captures[stream].add(chunk)
+            sinks[stream].write(chunk)
+            sinks[stream].flush()
+    sel.close()
+    return captures[stdout], captures[stderr]
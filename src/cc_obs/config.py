@@ -0,0 +1,55 @@
+import json
+import os
+
+# Project-level settings live next to the log in .claude/cc-obs/config.json.
+# This module is on the hook path, so it only uses os and json.
+CONFIG_FILE = "config.json"
+
+DEFAULTS: dict = {
+    # Roll events.jsonl over into a numbered segment once it reaches this size
+    "segment_bytes": 16 * 1024 * 1024,
+    # Codec for closed segments: "gzip", "zstd" (needs the zstandard package;
+    # falls back to gzip) or "none"
+    "compress": "gzip",
+    # Optional limits: max_bytes and max_age_days per session's segments at
+    # rollover; max_sessions and max_age_days for whole sessions
+    "retention": {},
+    # String fields longer than this (UTF-8 bytes) are moved into the session's
+    # blob store and replaced by a reference with a preview; 0 disables
+    "blob_threshold": 8192,
+    # Write per-session constants (HEADER_FIELDS) once in a _header record
+    # instead of on every event
+    "compact": False,
+    # Ingestion rules, first match wins:
+    # {"event": regex, "matcher": regex, "action": "drop" | "sample" | "strip",
+    #  "every": N (sample), "fields": ["tool_response", "_wrap.stdout"] (strip)}
+    "rules": [],
+    # Record each hook's own processing time (process start to append) as
+    # _overhead_us
+    "self_timing": True,
+    # Per-hook limits for cc-obs wrap, keyed by --name:
+    # {"lint": {"budget_ms": 500, "timeout_ms": 10000}}
+    "hooks": {},
+    # Result cache for cc-obs wrap --cache: input fields left out of the key,
+    # entry lifetime and total size (least recently used entries go first)
+    "cache": {
+        "ignore": ["session_id", "transcript_path", "tool_use_id"],
+        "ttl_s": 24 * 60 * 60,
+        "max_bytes": 64 * 1024 * 1024,
+    },
+    # cc-obs warmd: modules imported once by the server, so hooks it forks for
+    # wrap --warm start with them loaded
+    "warm": {"preload": []},
+}
+
+
+def load_config(obs_dir: str) -> dict:
+    config = dict(DEFAULTS)
+    try:
+        with open(os.path.join(obs_dir, CONFIG_FILE)) as f:
+            user = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return config
+    if isinstance(user, dict):
+        config.update(user)
+    return config
@@ -0,0 +1,525 @@
+import fcntl
+import os
+import time
+
+from cc_obs.codec import dumps, loads
+from cc_obs.config import DEFAULTS
+
+EVENTS_FILE = "events.jsonl"
+STATE_FILE = "state.json"
+# Append-only map of tool_use_id -> (segment, byte offset) of each event carrying
+# it. Rotates with the active segment, into segments/tool_index-NNNNNN.jsonl.
+TOOL_INDEX_FILE = "tool_index.jsonl"
+# Closed segments and their seq/time ranges
+MANIFEST_FILE = "manifest.json"
+SEGMENTS_DIR = "segments"
+# Each session gets its own log directory under sessions/, listed in index.jsonl
+SESSIONS_DIR = "sessions"
+SESSION_INDEX_FILE = "index.jsonl"
+NO_SESSION = "_nosession"
+# Content-addressed store for large string fields: blobs/<sha256[:2]>/<sha256>
+BLOBS_DIR = "blobs"
+BLOB_PREVIEW_CHARS = 200
+# Fields the compact format moves into {"_header": {...}} records; events omit
+# them while they match the latest header in the same file
+HEADER_FIELDS = ("session_id", "transcript_path", "cwd", "permission_mode")
+
+_STATE_KEYS = {"seq", "size", "segment"}
+
+# Like CLOCK_MONOTONIC, but keeps counting through suspend; both are shared by
+# every process on the host, so stamps from different hooks are comparable
+_MONO_CLOCK = getattr(time, "CLOCK_BOOTTIME", time.CLOCK_MONOTONIC)
+
+_TAIL_CHUNK = 64 * 1024
+
+
+def log_dir_for(project_root: str) -> str:
+    # str-based twin of project.obs_dir, kept here so the hook path never
+    # has to import pathlib
+    return os.path.join(project_root, ".claude", "cc-obs")
+
+
+def session_log_dir(obs_dir: str, session_id: str | None) -> str:
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in session_id or "")
+    if not name.strip("."):
+        name = NO_SESSION
+    return os.path.join(obs_dir, SESSIONS_DIR, name)
+
+
+def open_session(obs_dir: str, event: dict, config: dict | None = None) -> str:
+    log_dir = session_log_dir(obs_dir, event.get("session_id"))
+    if os.path.isdir(log_dir):
+        return log_dir
+
+    os.makedirs(os.path.dirname(log_dir), exist_ok=True)
+    try:
+        os.mkdir(log_dir)
+    except FileExistsError:
+        # Another hook for the same session won the race and registers it
+        return log_dir
+
+    entry = {
+        "session_id": event.get("session_id"),
+        "dir": os.path.basename(log_dir),
+        "started": event.get("_ts"),
+        "model": event.get("model"),
+    }
+    index_file = os.path.join(obs_dir, SESSIONS_DIR, SESSION_INDEX_FILE)
+    _append_line(index_file, dumps(entry) + b"\n")
+
+    retention = {**DEFAULTS, **(config or {})}["retention"]
+    if retention.get("max_sessions") is not None or retention.get("max_age_days"):
+        from cc_obs.segments import prune_sessions
+
+        prune_sessions(obs_dir, retention, keep=os.path.basename(log_dir))
+    return log_dir
+
+
+def stamp_event(event: dict) -> None:
+    # One clock read for both wall-clock fields, plus a monotonic stamp for
+    # durations that NTP adjustments can't skew
+    ns = time.time_ns()
+    event["_ts"] = utc_timestamp(ns)
+    event["_ts_ns"] = ns
+    event["_mono_ns"] = time.clock_gettime_ns(_MONO_CLOCK)
+
+
+def process_start_ns() -> int | None:
+    # When this process started, on the _MONO_CLOCK scale: field 22 of
+    # /proc/self/stat, in clock ticks since boot (so only tick resolution)
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name (field 2) may contain spaces; fields resume after ")"
+    fields = stat[stat.rindex(b")") + 2 :].split()
+    return int(fields[19]) * 1_000_000_000 // os.sysconf("SC_CLK_TCK")
+
+
+def utc_timestamp(ns: int | None = None) -> str:
+    us = (time.time_ns() if ns is None else ns) // 1000
+    secs, frac = divmod(us, 1_000_000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(secs)) + f".{frac:06d}+00:00"
+
+
+def append_event(log_dir: str, event: dict, config: dict | None = None) -> int:
+    # 0 when an ingestion rule dropped the event
+    seqs = append_events(log_dir, [event], config)
+    return seqs[0] if seqs else 0
+
+
+def append_events(
+    log_dir: str, events: list[dict], config: dict | None = None
+) -> list[int]:
+    return _commit(log_dir, events, {**DEFAULTS, **(config or {})}, assign_seq=True)
+
+
+def append_side_records(
+    log_dir: str, records: list[dict], config: dict | None = None
+) -> None:
+    # Side records (e.g. agent attribution) annotate earlier events; they
+    # don't consume sequence numbers and readers fold them into the events.
+    _commit(log_dir, records, {**DEFAULTS, **(config or {})}, assign_seq=False)
+
+
+def segment_file(number: int) -> str:
+    return f"events-{number:06d}.jsonl"
+
+
+def segment_index_file(number: int) -> str:
+    return f"tool_index-{number:06d}.jsonl"
+
+
+def read_manifest(log_dir: str) -> dict:
+    try:
+        with open(os.path.join(log_dir, MANIFEST_FILE), "rb") as f:
+            manifest = loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return {"segments": []}
+    manifest.setdefault("segments", [])
+    return manifest
+
+
+def _commit(
+    log_dir: str, records: list[dict], config: dict, assign_seq: bool
+) -> list[int]:
+    os.makedirs(log_dir, exist_ok=True)
+    events_file = os.path.join(log_dir, EVENTS_FILE)
+
+    fd = os.open(os.path.join(log_dir, STATE_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        # The sidecar doubles as the lock file: concurrent hooks serialize on it
+        # for the whole read-allocate-append-update cycle.
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        state = read_state(fd)
+        size = _file_size(events_file)
+        # The sidecar is only trusted if it describes the log as it is on disk;
+        # a crash between append and state update (or an external edit) shows
+        # up as a size mismatch and triggers recovery from the log itself.
+        if state.get("size") != size or not _STATE_KEYS <= state.keys():
+            # A writer killed mid-append (or out of disk) leaves a line with no
+            # newline; end it so the next record isn't glued onto the fragment
+            if _ends_mid_line(events_file, size):
+                _append_line(events_file, b"\n")
+                size += 1
+            counters = {k: state[k] for k in ("dropped", "sampled") if k in state}
+            state = {**_recover_state(log_dir, size), **counters}
+            # Without reading the file, any content may include side records
+            if size:
+                state["side"] = True
+
+        seq = state["seq"]
+        segment = state["segment"]
+        compact = config["compact"]
+        # Header in effect at the end of the active file, with its offset
+        header = state.get("header") or {}
+        header_off = state.get("header_off")
+        rules = config["rules"] if assign_seq else []
+        dropped = state.get("dropped") or {}
+        sampled = state.get("sampled") or {}
+        # Whether the active file holds side records, recorded per segment so
+        # readers know which segments past a range can still annotate it
+        side = state.get("side", False)
+        seqs = []
+        lines = []
+        index = []
+        offset = size
+        threshold = config["blob_threshold"]
+        for record in records:
+            # Internal hand-off from the hook process; becomes _overhead_us
+            started = record.pop("_start_ns", None)
+            if started and config["self_timing"]:
+                now = time.clock_gettime_ns(_MONO_CLOCK)
+                record["_overhead_us"] = (now - started) // 1000
+            if rules:
+                record = _apply_rules(rules, record, dropped, sampled)
+                if record is None:
+                    continue
+            if assign_seq:
+                seq += 1
+                record["_seq"] = seq
+                seqs.append(seq)
+            out = record
+            if compact and assign_seq:
+                fields = {k: record[k] for k in HEADER_FIELDS if k in record}
+                if any(header.get(k) != v for k, v in fields.items()):
+                    header = {**header, **fields}
+                    lines.append(dumps({"_header": header}) + b"\n")
+                    header_off = offset
+                    offset += len(lines[-1])
+                out = {k: v for k, v in record.items() if k not in header}
+                absent = [k for k in header if k not in record]
+                if absent:
+                    out["_absent"] = absent
+            line = dumps(out) + b"\n"
+            # Only events whose whole line is over the threshold can contain a
+            # field that is, so small events never get walked
+            if threshold and len(line) > threshold:
+                out = _externalize(log_dir, out, threshold)
+                line = dumps(out) + b"\n"
+            tool_use_id = record.get("tool_use_id")
+            if tool_use_id:
+                entry = {
+                    "id": tool_use_id,
+                    "seg": segment,
+                    "off": offset,
+                    "ev": record.get("hook_event_name"),
+                }
+                if compact and header_off is not None:
+                    entry["hdr"] = header_off
+                index.append(dumps(entry) + b"\n")
+            lines.append(line)
+            offset += len(line)
+        # A batch is committed with one write(), same as a single event
+        data = b"".join(lines)
+        if data:
+            _append_line(events_file, data)
+            side = side or not assign_seq
+        if index:
+            index_file = os.path.join(log_dir, TOOL_INDEX_FILE)
+            _append_line(index_file, b"".join(index))
+
+        size += len(data)
+        rotated = size >= config["segment_bytes"]
+        if rotated:
+            _rotate(log_dir, segment, seq, size, side)
+            segment += 1
+            size = 0
+            side = False
+            # Every file starts with its own header so segments stay self-contained
+            header, header_off = {}, None
+
+        state = {"seq": seq, "size": size, "segment": segment}
+        if header:
+            state["header"] = header
+            state["header_off"] = header_off
+        if dropped:
+            state["dropped"] = dropped
+        if sampled:
+            state["sampled"] = sampled
+        if side:
+            state["side"] = True
+        write_state(fd, state)
+    finally:
+        os.close(fd)
+    if rotated:
+        # Scanning, compressing and retention read whole segments, so they run
+        # once the lock is released rather than holding up the session's hooks.
+        # Their imports stay off the per-event hook path too.
+        from cc_obs.segments import finish_segments
+
+        finish_segments(log_dir, config)
+    return seqs
+
+
+def _apply_rules(
+    rules: list[dict], record: dict, dropped: dict, sampled: dict
+) -> dict | None:
+    # The first matching rule decides. Dropped events are only counted (per
+    # event type and tool) so readers can still report true totals; sampled
+    # events that are kept carry their weight in _sample.
+    for i, rule in enumerate(rules):
+        if not _rule_matches(rule, record):
+            continue
+        action = rule.get("action")
+        if action == "drop":
+            by_tool = dropped.setdefault(record.get("hook_event_name") or "", {})
+            tool = record.get("tool_name") or ""
+            by_tool[tool] = by_tool.get(tool, 0) + 1
+            return None
+        if action == "sample":
+            try:
+                every = max(int(rule.get("every", 1)), 1)
+            except (TypeError, ValueError, OverflowError):
+                # Like an invalid regex, an invalid rate makes the rule match nothing
+                continue
+            seen = sampled.get(str(i), 0)
+            sampled[str(i)] = seen + 1
+            if seen % every:
+                return None
+            return {**record, "_sample": every} if every > 1 else record
+        if action == "strip":
+            fields = rule.get("fields", [])
+            stripped = strip_fields(record, fields)
+            return {**stripped, "_stripped": fields} if stripped != record else record
+        return record
+    return record
+
+
+def _rule_matches(rule: dict, record: dict) -> bool:
+    # "event" and "matcher" are regexes like Claude Code hook matchers; the
+    # matcher is tested against the tool name (or source/trigger for events
+    # without one)
+    event = rule.get("event")
+    if event and not _fullmatch(event, record.get("hook_event_name")):
+        return False
+    matcher = rule.get("matcher")
+    if matcher:
+        target = (
+            record.get("tool_name") or record.get("source") or record.get("trigger")
+        )
+        if not _fullmatch(matcher, target):
+            return False
+    return True
+
+
+def _fullmatch(pattern: str, value) -> bool:
+    # json already imports re, so this costs the hook path nothing
+    import re
+
+    if not isinstance(value, str):
+        return False
+    try:
+        return re.fullmatch(pattern, value) is not None
+    except re.error:
+        return False
+
+
+def strip_fields(value: dict, fields: list[str]) -> dict:
+    out = dict(value)
+    for field in fields:
+        head, _, rest = field.partition(".")
+        if head not in out:
+            continue
+        if rest:
+            if isinstance(out[head], dict):
+                out[head] = strip_fields(out[head], [rest])
+        else:
+            del out[head]
+    return out
+
+
+def _externalize(log_dir: str, value, threshold: int):
+    if isinstance(value, dict):
+        return {k: _externalize(log_dir, v, threshold) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_externalize(log_dir, v, threshold) for v in value]
+    if isinstance(value, str) and len(value) * 4 > threshold:
+        data = value.encode()
+        if len(data) > threshold:
+            return {
+                "_blob": _store_blob(log_dir, data),
+                "bytes": len(data),
+                "preview": value[:BLOB_PREVIEW_CHARS],
+            }
+    return value
+
+
+def _store_blob(log_dir: str, data: bytes) -> str:
+    import hashlib
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(log_dir, BLOBS_DIR, digest[:2], digest)
+    # Same content (e.g. a Write's input in PreToolUse and PostToolUse) is
+    # stored once
+    if os.path.exists(path):
+        return digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return digest
+
+
+def _recover_state(log_dir: str, size: int) -> dict:
+    segments = read_manifest(log_dir)["segments"]
+    last = max(segments, key=lambda s: s["n"]) if segments else None
+    seq = recover_seq(os.path.join(log_dir, EVENTS_FILE))
+    if not seq and last:
+        seq = last["seq"][1] or 0
+    return {"seq": seq, "size": size, "segment": last["n"] + 1 if last else 1}
+
+
+def _rotate(log_dir: str, number: int, last_seq: int, size: int, side: bool) -> None:
+    events_file = os.path.join(log_dir, EVENTS_FILE)
+    with open(events_file, "rb") as f:
+        first = _first_event(iter(f))
+        last = _first_event(_iter_lines_reversed(f))
+
+    name = segment_file(number)
+    entry = {
+        "n": number,
+        "file": name,
+        "seq": [first.get("_seq"), last_seq],
+        "ts": [first.get("_ts"), last.get("_ts")],
+        "bytes": size,
+        "side": side,
+        # Until finish_segments records its blobs and compresses it
+        "pending": True,
+    }
+    manifest = read_manifest(log_dir)
+    manifest["segments"] = [s for s in manifest["segments"] if s["n"] != number]
+    manifest["segments"].append(entry)
+
+    # Manifest first: after a crash in between, readers skip the listed-but-
+    # missing file and the next rotation of the same number replaces the entry.
+    write_manifest(log_dir, manifest)
+    seg_dir = os.path.join(log_dir, SEGMENTS_DIR)
+    os.makedirs(seg_dir, exist_ok=True)
+    os.rename(events_file, os.path.join(seg_dir, name))
+    # Entries name their segment, so after a crash in between, those left in
+    # the active index still resolve and move with the next rotation
+    index_file = os.path.join(log_dir, TOOL_INDEX_FILE)
+    if os.path.exists(index_file):
+        os.rename(index_file, os.path.join(seg_dir, segment_index_file(number)))
+
+
+def _first_event(lines) -> dict:
+    for line in lines:
+        try:
+            ev = loads(line)
+        except ValueError:
+            continue
+        if isinstance(ev, dict) and "_seq" in ev:
+            return ev
+    return {}
+
+
+def write_manifest(log_dir: str, manifest: dict) -> None:
+    path = os.path.join(log_dir, MANIFEST_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(dumps(manifest))
+    os.replace(tmp, path)
+
+
+def recover_seq(events_file: str) -> int:
+    if not os.path.exists(events_file):
+        return 0
+    with open(events_file, "rb") as f:
+        for line in _iter_lines_reversed(f):
+            try:
+                ev = loads(line)
+            except ValueError:
+                continue
+            if isinstance(ev, dict) and isinstance(ev.get("_seq"), int):
+                return ev["_seq"]
+    return 0
+
+
+def _append_line(path: str, line: bytes) -> None:
+    # O_APPEND plus one write() of the whole record keeps lines intact even for
+    # writers that don't take the lock (e.g. older cc-obs versions).
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        written = os.write(fd, line)
+        while written < len(line):
+            written += os.write(fd, line[written:])
+    finally:
+        os.close(fd)
+
+
+def _ends_mid_line(path: str, size: int) -> bool:
+    if not size:
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, 1, size - 1) != b"\n"
+    finally:
+        os.close(fd)
+
+
+def _iter_lines_reversed(f):
+    pos = f.seek(0, os.SEEK_END)
+    tail = b""
+    while pos > 0:
+        step = min(_TAIL_CHUNK, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + tail
+        lines = buf.split(b"\n")
+        # The first piece may be the end of a line that starts in an earlier chunk
+        tail = lines.pop(0)
+        for line in reversed(lines):
+            if line.strip():
+                yield line
+    if tail.strip():
+        yield tail
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def read_state(fd: int) -> dict:
+    os.lseek(fd, 0, os.SEEK_SET)
+    data = b""
+    while chunk := os.read(fd, 4096):
+        data += chunk
+    try:
+        state = loads(data)
+    except ValueError:
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def write_state(fd: int, state: dict) -> None:
+    data = dumps(state)
+    os.lseek(fd, 0, os.SEEK_SET)
+    os.write(fd, data)
+    os.ftruncate(fd, len(data))
@@ -5,10 +5,38 @@ def obs_dir(project_root: Path) -> Path:
     return project_root / ".claude" / "cc-obs"
 
 
+def cache_dir(project_root: Path) -> Path:
+    return obs_dir(project_root) / "cache"
+
+
 def events_path(project_root: Path) -> Path:
     return obs_dir(project_root) / "events.jsonl"
 
 
+def manifest_path(project_root: Path) -> Path:
+    return obs_dir(project_root) / "manifest.json"
+
+
+def segments_dir(project_root: Path) -> Path:
+    return obs_dir(project_root) / "segments"
+
+
+def sessions_dir(project_root: Path) -> Path:
+    return obs_dir(project_root) / "sessions"
+
+
+def state_path(project_root: Path) -> Path:
+    return obs_dir(project_root) / "state.json"
+
+
+def tool_index_path(project_root: Path) -> Path:
+    return obs_dir(project_root) / "tool_index.jsonl"
+
+
+def transcript_cache_path(project_root: Path) -> Path:
+    return obs_dir(project_root) / "transcripts.json"
+
+
 def view_path(project_root: Path) -> Path:
     return obs_dir(project_root) / "view.html"
 
@@ -0,0 +1,646 @@
+import json
+import os
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from cc_obs.codec import loads
+from cc_obs.eventlog import (
+    BLOBS_DIR,
+    EVENTS_FILE,
+    SEGMENTS_DIR,
+    SESSION_INDEX_FILE,
+    SESSIONS_DIR,
+    STATE_FILE,
+    TOOL_INDEX_FILE,
+    read_manifest,
+    segment_index_file,
+)
+from cc_obs.segments import open_segment
+
+TOOL_CLOSE_EVENTS = {"PostToolUse", "PostToolUseFailure"}
+# Logs at least this big on disk are parsed in a process pool, in chunks of
+# about PARALLEL_CHUNK_BYTES
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+PARALLEL_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class ReadStats:
+    # Lines skipped while reading: unparseable ones, and a last line without
+    # its newline (usually a hook that is still writing it)
+    corrupt: int = 0
+    torn: int = 0
+
+    @property
+    def skipped(self) -> int:
+        return self.corrupt + self.torn
+
+
+def read_events(
+    path: Path, stats: ReadStats | None = None, workers: int | None = None
+) -> list[dict]:
+    return _read_files([path], stats=stats, workers=workers)
+
+
+def read_log(
+    log_dir: Path,
+    min_seq: int | None = None,
+    max_seq: int | None = None,
+    since_ns: int | None = None,
+    until_ns: int | None = None,
+    stats: ReadStats | None = None,
+    workers: int | None = None,
+) -> list[dict]:
+    paths = log_files(log_dir, min_seq, max_seq, since_ns, until_ns)
+    return _read_files(paths, (min_seq, max_seq, since_ns, until_ns), stats, workers)
+
+
+def iter_events(
+    paths: list[Path],
+    min_seq: int | None = None,
+    max_seq: int | None = None,
+    since_ns: int | None = None,
+    until_ns: int | None = None,
+    fields: list[str] | None = None,
+    offsets: bool = False,
+    stats: ReadStats | None = None,
+) -> Iterator[dict]:
+    # Streams events one at a time, so memory is bounded by the largest event
+    # rather than the log. Side records are skipped: streamed events carry no
+    # agent attribution or child spans (read_log folds those in). With
+    # offsets, each event gets _file and _off, where its line starts.
+    bounds = (min_seq, max_seq, since_ns, until_ns)
+    for path, offset, event in _iter_hydrated(paths, stats):
+        if not _in_range(event, bounds):
+            continue
+        if fields is not None:
+            event = {k: event[k] for k in fields if k in event}
+        if offsets:
+            event["_file"] = path.name
+            event["_off"] = offset
+        yield event
+
+
+def iter_records(
+    path: Path, stats: ReadStats | None = None
+) -> Iterator[tuple[int, dict]]:
+    # Every record in one log file with the byte offset of its line (in the
+    # decompressed stream for compressed segments, as lookup_tool_use seeks)
+    offset = 0
+    with open_segment(path) as f:
+        for line in f:
+            start = offset
+            offset += len(line)
+            record = _parse_line(line, stats)
+            if record is not None:
+                yield start, record
+
+
+def _parse_line(line: bytes, stats: ReadStats | None) -> dict | None:
+    if not line.strip():
+        return None
+    try:
+        record = loads(line)
+    except ValueError:
+        record = None
+    if not isinstance(record, dict):
+        if stats is not None:
+            if line.endswith(b"\n"):
+                stats.corrupt += 1
+            else:
+                stats.torn += 1
+        return None
+    return record
+
+
+def log_files(
+    log_dir: Path,
+    min_seq: int | None = None,
+    max_seq: int | None = None,
+    since_ns: int | None = None,
+    until_ns: int | None = None,
+) -> list[Path]:
+    # Closed segments in order, then the active file. Segments whose seq or
+    # time range lies entirely outside the requested one are skipped without
+    # opening them. Side records annotate earlier events, so a segment past
+    # the range is only skipped if the manifest says it holds none.
+    files = []
+    segments = sorted(read_manifest(str(log_dir))["segments"], key=lambda s: s["n"])
+    for seg in segments:
+        first, last = seg["seq"]
+        if min_seq is not None and last is not None and last < min_seq:
+            continue
+        ts_first, ts_last = seg.get("ts") or (None, None)
+        if since_ns is not None and ts_last:
+            ns = event_time_ns({"_ts": ts_last})
+            if ns is not None and ns < since_ns:
+                continue
+        if seg.get("side") is False:
+            if max_seq is not None and first is not None and first > max_seq:
+                continue
+            if until_ns is not None and ts_first:
+                ns = event_time_ns({"_ts": ts_first})
+                if ns is not None and ns > until_ns:
+                    continue
+        path = log_dir / SEGMENTS_DIR / seg["file"]
+        if path.exists():
+            files.append(path)
+    active = log_dir / EVENTS_FILE
+    if active.exists():
+        files.append(active)
+    return files
+
+
+def log_size(log_dir: Path) -> int:
+    return sum(path.stat().st_size for path in log_files(log_dir))
+
+
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+# Monotonic and wall-clock deltas further apart than this mean the stamps
+# straddle a reboot, where the monotonic clock restarted
+_MONO_SKEW_NS = 1_000_000_000
+
+
+def event_time_ns(event: dict) -> int | None:
+    ns = event.get("_ts_ns")
+    if isinstance(ns, int):
+        return ns
+    ts = event.get("_ts")
+    if not ts:
+        return None
+    # Events logged before _ts_ns existed; a hand-edited or corrupt stamp
+    # counts as untimed rather than failing the whole read
+    try:
+        return int(datetime.fromisoformat(ts).timestamp() * 1_000_000) * 1000
+    except (ValueError, TypeError):
+        return None
+
+
+def elapsed_ns(start: dict, end: dict) -> int | None:
+    t0, t1 = event_time_ns(start), event_time_ns(end)
+    if t0 is None or t1 is None:
+        return None
+    wall = t1 - t0
+    m0, m1 = start.get("_mono_ns"), end.get("_mono_ns")
+    if isinstance(m0, int) and isinstance(m1, int):
+        mono = m1 - m0
+        if mono >= 0 and abs(mono - wall) < _MONO_SKEW_NS:
+            return mono
+    return wall
+
+
+def overhead_stats(events: list[dict]) -> dict[str, dict]:
+    # Observer self-time per event type: count, total and percentiles in ms
+    samples: dict[str, list[float]] = {}
+    for e in events:
+        us = e.get("_overhead_us")
+        if isinstance(us, int):
+            name = e.get("hook_event_name", "unknown")
+            samples.setdefault(name, []).append(us / 1000)
+    stats = {}
+    for name, values in samples.items():
+        values.sort()
+        stats[name] = {
+            "count": len(values),
+            "total_ms": sum(values),
+            "p50_ms": _percentile(values, 50),
+            "p95_ms": _percentile(values, 95),
+            "max_ms": values[-1],
+        }
+    return stats
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def read_dropped(log_dir: Path) -> dict[str, dict[str, int]]:
+    # Per event type and tool name, events discarded by ingestion rules
+    try:
+        state = loads((log_dir / STATE_FILE).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return state.get("dropped") or {}
+
+
+def event_counts(
+    events: Iterable[dict], dropped: dict[str, dict[str, int]] | None = None
+) -> tuple[Counter, Counter]:
+    # Counts by event type and by tool, scaled back up for sampled events and
+    # including events dropped at ingestion
+    types: Counter = Counter()
+    tools: Counter = Counter()
+    for e in events:
+        weight = e.get("_sample", 1)
+        types[e.get("hook_event_name", "unknown")] += weight
+        if "tool_name" in e:
+            tools[e["tool_name"]] += weight
+    for name, by_tool in (dropped or {}).items():
+        for tool, count in by_tool.items():
+            types[name or "unknown"] += count
+            if tool:
+                tools[tool] += count
+    return types, tools
+
+
+def read_blob(log_dir: Path, digest: str) -> str | None:
+    path = log_dir / BLOBS_DIR / digest[:2] / digest
+    try:
+        return path.read_bytes().decode(errors="replace")
+    except FileNotFoundError:
+        return None
+
+
+def inline_blobs(log_dir: Path, value):
+    # Replaces blob references with their content; a missing blob keeps its
+    # reference (and preview)
+    if isinstance(value, dict):
+        if "_blob" in value:
+            content = read_blob(log_dir, value["_blob"])
+            return value if content is None else content
+        return {k: inline_blobs(log_dir, v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [inline_blobs(log_dir, v) for v in value]
+    return value
+
+
+def blob_usage(log_dir: Path) -> tuple[int, int]:
+    count = size = 0
+    blobs = log_dir / BLOBS_DIR
+    if blobs.is_dir():
+        for path in blobs.glob("*/*"):
+            count += 1
+            size += path.stat().st_size
+    return count, size
+
+
+def list_sessions(obs_dir: Path) -> list[dict]:
+    # Sessions in order of last activity, oldest first. Directories missing from
+    # the index (e.g. its line was lost in a crash) are still listed.
+    sessions_dir = obs_dir / SESSIONS_DIR
+    if not sessions_dir.is_dir():
+        return []
+    entries: dict[str, dict] = {}
+    index = sessions_dir / SESSION_INDEX_FILE
+    if index.exists():
+        for line in index.read_text().splitlines():
+            try:
+                entry = loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries.setdefault(entry["dir"], entry)
+
+    sessions = []
+    for path in sessions_dir.iterdir():
+        if not path.is_dir():
+            continue
+        entry = dict(entries.get(path.name) or {"session_id": path.name})
+        entry["dir"] = path.name
+        state_file = path / STATE_FILE
+        try:
+            state = loads(state_file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        entry["events"] = state.get("seq", 0)
+        entry["bytes"] = log_size(path)
+        entry["last_active"] = (
+            (state_file if state_file.exists() else path).stat().st_mtime
+        )
+        sessions.append(entry)
+    sessions.sort(key=lambda s: s["last_active"])
+    return sessions
+
+
+def resolve_log_dir(obs_dir: Path, session: str | None = None) -> Path | None:
+    sessions = list_sessions(obs_dir)
+    if session is None:
+        if sessions:
+            return obs_dir / SESSIONS_DIR / sessions[-1]["dir"]
+        # Logs written before per-session directories
+        return obs_dir
+
+    for s in sessions:
+        if session in (s.get("session_id"), s["dir"]):
+            return obs_dir / SESSIONS_DIR / s["dir"]
+    matches = [s for s in sessions if (s.get("session_id") or "").startswith(session)]
+    if len(matches) == 1:
+        return obs_dir / SESSIONS_DIR / matches[0]["dir"]
+    return None
+
+
+def _read_files(
+    paths: list[Path],
+    bounds: tuple[int | None, ...] = (None, None, None, None),
+    stats: ReadStats | None = None,
+    workers: int | None = None,
+) -> list[dict]:
+    events = []
+    attribution: dict[str, tuple[str, str | None]] = {}
+    spans: dict[str, dict] = {}
+
+    def side(record: dict) -> None:
+        if "_attr" in record:
+            for tool_use_id in record.get("tool_use_ids", []):
+                attribution[tool_use_id] = (record["_attr"], record.get("_agent_type"))
+        else:
+            _add_span(spans, record)
+
+    if workers is None:
+        workers = _pool_size(paths)
+    records = (
+        _parallel_records(paths, stats, workers)
+        if workers > 1
+        else _sequential_records(paths, stats)
+    )
+    for _, _, event in _hydrated(records, side):
+        if _in_range(event, bounds):
+            events.append(event)
+    if attribution:
+        apply_attribution(events, attribution)
+    if spans:
+        attach_spans(events, spans)
+    return events
+
+
+def _iter_hydrated(
+    paths: list[Path],
+    stats: ReadStats | None,
+    side: Callable[[dict], None] | None = None,
+) -> Iterator[tuple[Path, int, dict]]:
+    return _hydrated(_sequential_records(paths, stats), side)
+
+
+def _hydrated(
+    records: Iterator[tuple[Path, int, dict]],
+    side: Callable[[dict], None] | None = None,
+) -> Iterator[tuple[Path, int, dict]]:
+    # A _header applies to the events after it in the same file
+    header: dict = {}
+    current = None
+    for path, offset, record in records:
+        if path != current:
+            header, current = {}, path
+        if "_header" in record:
+            header = record["_header"]
+            continue
+        if "_attr" in record or "_span" in record:
+            if side is not None:
+                side(record)
+            continue
+        if header:
+            hydrate(record, header)
+        yield path, offset, record
+
+
+def _sequential_records(
+    paths: list[Path], stats: ReadStats | None
+) -> Iterator[tuple[Path, int, dict]]:
+    for path in paths:
+        for offset, record in iter_records(path, stats):
+            yield path, offset, record
+
+
+def _pool_size(paths: list[Path]) -> int:
+    # Worker start-up and shipping parsed records back cost more than they
+    # save on small logs
+    cpus = os.cpu_count() or 1
+    if cpus < 2:
+        return 1
+    total = _parse_bytes(paths)
+    if total < PARALLEL_MIN_BYTES:
+        return 1
+    return min(cpus, -(-total // PARALLEL_CHUNK_BYTES))
+
+
+def _parse_bytes(paths: list[Path]) -> int:
+    # How much there is to parse: compressed segments by their uncompressed
+    # size from the manifest, as that, not their size on disk, is the work
+    total = 0
+    sizes: dict[Path, dict[str, int]] = {}
+    for path in paths:
+        if path.suffix in (".gz", ".zst"):
+            log_dir = path.parent.parent
+            if log_dir not in sizes:
+                segments = read_manifest(str(log_dir))["segments"]
+                sizes[log_dir] = {s["file"]: s["bytes"] for s in segments}
+            if path.name in sizes[log_dir]:
+                total += sizes[log_dir][path.name]
+                continue
+        total += path.stat().st_size
+    return total
+
+
+def _parallel_records(
+    paths: list[Path], stats: ReadStats | None, workers: int
+) -> Iterator[tuple[Path, int, dict]]:
+    # Chunks are parsed out of order across the pool; map() hands results back
+    # in submission order, so the merge is just concatenation
+    chunks = _chunks(paths)
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(_parse_chunk, *zip(*chunks)) if chunks else []
+        for (path, _, _), (records, chunk_stats) in zip(chunks, results):
+            if stats is not None:
+                stats.corrupt += chunk_stats.corrupt
+                stats.torn += chunk_stats.torn
+            for offset, record in records:
+                yield path, offset, record
+
+
+def _chunks(paths: list[Path]) -> list[tuple[Path, int, int | None]]:
+    # Newline-aligned byte ranges of PARALLEL_CHUNK_BYTES or so. Compressed
+    # segments can't be entered mid-stream, so each is a single chunk (end None).
+    chunks = []
+    for path in paths:
+        if path.suffix in (".gz", ".zst"):
+            chunks.append((path, 0, None))
+            continue
+        size = path.stat().st_size
+        start = 0
+        with open(path, "rb") as f:
+            while start < size:
+                f.seek(start + PARALLEL_CHUNK_BYTES)
+                f.readline()
+                end = min(f.tell(), size)
+                chunks.append((path, start, end))
+                start = end
+    return chunks
+
+
+def _parse_chunk(
+    path: Path, start: int, end: int | None
+) -> tuple[list[tuple[int, dict]], ReadStats]:
+    stats = ReadStats()
+    if end is None:
+        return list(iter_records(path, stats)), stats
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    records = []
+    offset = start
+    for line in data.splitlines(keepends=True):
+        record = _parse_line(line, stats)
+        if record is not None:
+            records.append((offset, record))
+        offset += len(line)
+    return records, stats
+
+
+def _in_range(event: dict, bounds: tuple[int | None, ...]) -> bool:
+    min_seq, max_seq, since_ns, until_ns = bounds
+    if min_seq is not None or max_seq is not None:
+        seq = event.get("_seq", 0)
+        if min_seq is not None and seq < min_seq:
+            return False
+        if max_seq is not None and seq > max_seq:
+            return False
+    if since_ns is not None or until_ns is not None:
+        ns = event_time_ns(event)
+        if ns is None:
+            return False
+        if since_ns is not None and ns < since_ns:
+            return False
+        if until_ns is not None and ns > until_ns:
+            return False
+    return True
+
+
+def _add_span(spans: dict[str, dict], record: dict) -> None:
+    # start and end records of one span merge into a single dict: the start's
+    # timestamps at the top level (like an event) and the end's under "end"
+    info = record["_span"]
+    stamps = {k: record[k] for k in ("_ts", "_ts_ns", "_mono_ns") if k in record}
+    span = spans.setdefault(info["id"], {"id": info["id"], "end": None})
+    span["trace"] = info.get("trace") or span.get("trace")
+    if info.get("phase") == "start":
+        span.update(stamps)
+        span["parent"] = info.get("parent")
+        span["name"] = info.get("name")
+    else:
+        span["end"] = stamps
+        if info.get("error"):
+            span["error"] = True
+    if info.get("attrs"):
+        span["attrs"] = {**span.get("attrs", {}), **info["attrs"]}
+
+
+def attach_spans(events: list[dict], spans: dict[str, dict]) -> None:
+    # Child spans hang off the wrap record that started their trace
+    by_trace: dict[str, list[dict]] = {}
+    for span in spans.values():
+        if "name" in span:
+            by_trace.setdefault(span["trace"], []).append(span)
+    for ev in events:
+        wrap = ev.get("_wrap")
+        if not wrap or "trace_id" not in wrap or "parent_span_id" in wrap:
+            continue
+        children = by_trace.get(wrap["trace_id"])
+        if children:
+            # A span without a usable stamp sorts first rather than failing
+            wrap["spans"] = sorted(children, key=lambda s: event_time_ns(s) or 0)
+
+
+def hydrate(event: dict, header: dict) -> None:
+    absent = event.pop("_absent", ())
+    for key, value in header.items():
+        if key not in event and key not in absent:
+            event[key] = value
+
+
+def apply_attribution(
+    events: list[dict], attribution: dict[str, tuple[str, str | None]]
+) -> None:
+    for ev in events:
+        tool_use_id = ev.get("tool_use_id")
+        agent = attribution.get(tool_use_id) if tool_use_id else None
+        if agent is not None:
+            ev["_agent_id"], ev["_agent_type"] = agent
+
+
+def read_tool_index(
+    log_dir: Path, tool_use_id: str | None = None
+) -> dict[str, list[dict]]:
+    # Closed segments' indexes (deleted along with them) then the active one
+    index: dict[str, list[dict]] = {}
+    segments = sorted(read_manifest(str(log_dir))["segments"], key=lambda s: s["n"])
+    paths = [log_dir / SEGMENTS_DIR / segment_index_file(s["n"]) for s in segments]
+    paths.append(log_dir / TOOL_INDEX_FILE)
+    for path in paths:
+        if not path.exists():
+            continue
+        with open(path) as f:
+            for line in f:
+                # Cheap prefilter so a single lookup doesn't parse every entry
+                if tool_use_id is not None and tool_use_id not in line:
+                    continue
+                try:
+                    entry = loads(line)
+                except json.JSONDecodeError:
+                    continue
+                index.setdefault(entry["id"], []).append(entry)
+    return index
+
+
+def open_tool_uses(index: dict[str, list[dict]]) -> list[str]:
+    return [
+        tool_use_id
+        for tool_use_id, entries in index.items()
+        if not any(e.get("ev") in TOOL_CLOSE_EVENTS for e in entries)
+    ]
+
+
+def lookup_tool_use(log_dir: Path, tool_use_id: str) -> list[dict]:
+    entries = read_tool_index(log_dir, tool_use_id).get(tool_use_id, [])
+    events = []
+    if not entries:
+        return events
+    closed = {s["n"]: s["file"] for s in read_manifest(str(log_dir))["segments"]}
+    for entry in entries:
+        # Entries for the active segment point into events.jsonl until it rolls over
+        name = closed.get(entry.get("seg"))
+        path = log_dir / SEGMENTS_DIR / name if name else log_dir / EVENTS_FILE
+        try:
+            with open_segment(path) as f:
+                header = None
+                pos = 0
+                if "hdr" in entry:
+                    line, pos = _line_at(f, entry["hdr"], pos)
+                    header = loads(line).get("_header")
+                line, pos = _line_at(f, entry["off"], pos)
+                ev = loads(line)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        if isinstance(ev, dict) and isinstance(header, dict):
+            hydrate(ev, header)
+        # Guard against an index that no longer matches the log (e.g. cleared)
+        if isinstance(ev, dict) and ev.get("tool_use_id") == tool_use_id:
+            events.append(ev)
+    return events
+
+
+def _line_at(f, offset: int, pos: int) -> tuple[bytes, int]:
+    # The line starting at offset, with the position after it. Plain and gzip
+    # files seek (gzip by decompressing up to the offset); zstd readers can't,
+    # so they skip forward from pos by reading and discarding.
+    if f.seekable():
+        f.seek(offset)
+    else:
+        while pos < offset:
+            chunk = f.read(min(offset - pos, 1024 * 1024))
+            if not chunk:
+                break
+            pos += len(chunk)
+    line = f.readline()
+    return line, offset + len(line)
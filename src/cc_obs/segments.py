@@ -0,0 +1,327 @@
+import contextlib
+import fcntl
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+
+from cc_obs.eventlog import (
+    BLOBS_DIR,
+    EVENTS_FILE,
+    SEGMENTS_DIR,
+    SESSION_INDEX_FILE,
+    SESSIONS_DIR,
+    STATE_FILE,
+    read_manifest,
+    segment_index_file,
+    write_manifest,
+)
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Held (never waited on) by the process finishing a session's closed segments
+MAINTENANCE_LOCK = "segments.lock"
+
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+# A blob reference as dumps() writes it
+_BLOB_REF = re.compile(rb'"_blob":"([0-9a-f]{64})"')
+
+
+def finish_segments(log_dir: str, config: dict) -> None:
+    # Rollover work that reads or rewrites whole segments, run after the
+    # rotating hook releases the session lock. A process that finds another
+    # already at it leaves the work to that one, or to the next rollover.
+    fd = os.open(os.path.join(log_dir, MAINTENANCE_LOCK), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        for entry in read_manifest(log_dir)["segments"]:
+            if entry.get("pending"):
+                _finish_segment(log_dir, entry, config["compress"])
+        enforce_retention(log_dir, config["retention"])
+    finally:
+        os.close(fd)
+
+
+def _finish_segment(log_dir: str, entry: dict, codec: str) -> None:
+    seg_dir = os.path.join(log_dir, SEGMENTS_DIR)
+    src = os.path.join(seg_dir, entry["file"])
+    if not os.path.exists(src):
+        # Listed by a rotation that crashed before the rename; the next
+        # rotation of the same number replaces the entry
+        return
+    # Blobs are stored before the events that use them, so with no blob store
+    # yet, the closed segment references none
+    if os.path.isdir(os.path.join(log_dir, BLOBS_DIR)):
+        blobs = blob_refs(src)
+    else:
+        blobs = []
+    name = compress_segment(src, codec)
+
+    with _session_lock(log_dir):
+        manifest = read_manifest(log_dir)
+        seg = next(
+            (
+                s
+                for s in manifest["segments"]
+                if s["n"] == entry["n"] and s.get("pending")
+            ),
+            None,
+        )
+        if seg is not None:
+            del seg["pending"]
+            seg["blobs"] = blobs
+            if name is not None:
+                seg["file"] = name
+                seg["stored_bytes"] = os.path.getsize(os.path.join(seg_dir, name))
+            write_manifest(log_dir, manifest)
+    # Manifest first, so a crash in between leaves a readable segment either
+    # way. A segment dropped meanwhile leaves only its compressed copy behind.
+    if name is not None:
+        os.unlink(src if seg is not None else os.path.join(seg_dir, name))
+
+
+def compress_segment(path: str, codec: str) -> str | None:
+    # Writes a compressed copy beside the segment and returns its file name,
+    # or None for "none"
+    if codec == "zstd" and _zstd() is None:
+        codec = "gzip"
+    if codec not in _SUFFIXES:
+        return None
+
+    dst = path + _SUFFIXES[codec]
+    tmp = dst + ".tmp"
+    with open(path, "rb") as fin, _open_writer(tmp, codec) as fout:
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+    os.replace(tmp, dst)
+    return os.path.basename(dst)
+
+
+def blob_refs(path: str) -> list[str]:
+    # Digests of the blobs a log file references. Closed segments keep theirs
+    # in the manifest, so retention knows which blobs a dropped segment frees.
+    refs, _ = _scan_refs(path)
+    return sorted(refs)
+
+
+def _scan_refs(
+    path: str, since: tuple[int, int] | None = None
+) -> tuple[set[str], tuple[int, int] | None]:
+    # Also returns where the scan stopped, as (inode, offset past the last
+    # complete line), so a later scan of the same file can pick up from there
+    refs = set()
+    try:
+        with open(path, "rb") as f:
+            ino = os.fstat(f.fileno()).st_ino
+            pos = 0
+            if since is not None and since[0] == ino:
+                pos = since[1]
+                f.seek(pos)
+            for line in f:
+                if b'"_blob":"' in line:
+                    refs.update(m.decode() for m in _BLOB_REF.findall(line))
+                if line.endswith(b"\n"):
+                    pos += len(line)
+    except FileNotFoundError:
+        return refs, None
+    return refs, (ino, pos)
+
+
+def enforce_retention(log_dir: str, retention: dict) -> None:
+    # Decides from the manifest and blob sizes only: no segment is opened.
+    segments = sorted(read_manifest(log_dir)["segments"], key=lambda s: s["n"])
+    drop = set()
+
+    max_age_days = retention.get("max_age_days")
+    if max_age_days is not None:
+        cutoff = time.strftime(
+            "%Y-%m-%dT%H:%M:%S", time.gmtime(time.time() - max_age_days * 86400)
+        )
+        for seg in segments:
+            last_ts = seg["ts"][1]
+            # _ts values are UTC ISO strings, so a prefix compare orders them
+            if last_ts and last_ts[:19] < cutoff:
+                drop.add(seg["n"])
+
+    max_bytes = retention.get("max_bytes")
+    if max_bytes is not None:
+        active = os.path.join(log_dir, EVENTS_FILE)
+        total = os.path.getsize(active) if os.path.exists(active) else 0
+        total += sum(_stored_bytes(s) for s in segments if s["n"] not in drop)
+        # Blobs count too, and are freed with the last segment referencing them
+        blob_sizes = _blob_sizes(log_dir)
+        total += sum(blob_sizes.values())
+        refs = Counter(
+            digest
+            for s in segments
+            if s["n"] not in drop
+            for digest in s.get("blobs", ())
+        )
+        for seg in segments:
+            if total <= max_bytes:
+                break
+            if seg["n"] not in drop:
+                drop.add(seg["n"])
+                total -= _stored_bytes(seg)
+                for digest in seg.get("blobs", ()):
+                    refs[digest] -= 1
+                    if not refs[digest]:
+                        total -= blob_sizes.get(digest, 0)
+
+    if not drop:
+        return
+    # The active file can be as large as a segment, so its blob references
+    # are read before taking the lock, which then covers only what was
+    # appended since. Blobs are deleted under the lock: a hook storing one
+    # that already exists reuses it.
+    active = os.path.join(log_dir, EVENTS_FILE)
+    live, scanned = _scan_refs(active)
+    with _session_lock(log_dir):
+        manifest = read_manifest(log_dir)
+        segments = manifest["segments"]
+        manifest["segments"] = [s for s in segments if s["n"] not in drop]
+        write_manifest(log_dir, manifest)
+        # Segments listed before blob references were recorded, or not yet
+        # finished, may use any blob, so while there are any, all are kept
+        if all("blobs" in s for s in manifest["segments"]):
+            tail, _ = _scan_refs(active, scanned)
+            _drop_blobs(log_dir, segments, drop, live | tail)
+    for seg in segments:
+        if seg["n"] in drop:
+            for name in (seg["file"], segment_index_file(seg["n"])):
+                try:
+                    os.unlink(os.path.join(log_dir, SEGMENTS_DIR, name))
+                except FileNotFoundError:
+                    pass
+
+
+def _drop_blobs(
+    log_dir: str, segments: list[dict], drop: set, active_refs: set[str]
+) -> None:
+    # Deletes the blobs only dropped segments referenced
+    live = {d for s in segments if s["n"] not in drop for d in s["blobs"]}
+    live |= active_refs
+    for seg in segments:
+        if seg["n"] not in drop:
+            continue
+        for digest in seg.get("blobs", ()):
+            if digest not in live:
+                try:
+                    os.unlink(os.path.join(log_dir, BLOBS_DIR, digest[:2], digest))
+                except FileNotFoundError:
+                    pass
+
+
+@contextlib.contextmanager
+def _session_lock(log_dir: str) -> Iterator[None]:
+    # The lock hooks append under (see eventlog._commit), held here only to
+    # update the manifest and delete blobs
+    fd = os.open(os.path.join(log_dir, STATE_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _blob_sizes(log_dir: str) -> dict[str, int]:
+    sizes = {}
+    blobs = os.path.join(log_dir, BLOBS_DIR)
+    if os.path.isdir(blobs):
+        for prefix in os.scandir(blobs):
+            if prefix.is_dir():
+                for entry in os.scandir(prefix.path):
+                    sizes[entry.name] = entry.stat().st_size
+    return sizes
+
+
+def prune_sessions(obs_dir: str, retention: dict, keep: str = "") -> None:
+    # Whole-session retention, run when a new session is registered. Sessions
+    # are ranked by last activity (state sidecar mtime), newest first.
+    sessions_dir = os.path.join(obs_dir, SESSIONS_DIR)
+    activity = []
+    for name in os.listdir(sessions_dir):
+        path = os.path.join(sessions_dir, name)
+        if name == keep or not os.path.isdir(path):
+            continue
+        state = os.path.join(path, STATE_FILE)
+        mtime = os.path.getmtime(state if os.path.exists(state) else path)
+        activity.append((mtime, name))
+    activity.sort(reverse=True)
+
+    drop = set()
+    max_sessions = retention.get("max_sessions")
+    if max_sessions is not None:
+        # The session being registered counts towards the limit
+        drop.update(name for _, name in activity[max(max_sessions - 1, 0) :])
+    max_age_days = retention.get("max_age_days")
+    if max_age_days is not None:
+        cutoff = time.time() - max_age_days * 86400
+        drop.update(name for mtime, name in activity if mtime < cutoff)
+    if not drop:
+        return
+
+    index_file = os.path.join(sessions_dir, SESSION_INDEX_FILE)
+    if os.path.exists(index_file):
+        with open(index_file) as f:
+            kept = [line for line in f if _index_dir(line) not in drop]
+        tmp = index_file + ".tmp"
+        with open(tmp, "w") as f:
+            f.writelines(kept)
+        os.replace(tmp, index_file)
+    for name in drop:
+        shutil.rmtree(os.path.join(sessions_dir, name), ignore_errors=True)
+
+
+def _index_dir(line: str) -> str | None:
+    try:
+        return json.loads(line).get("dir")
+    except ValueError:
+        return None
+
+
+def open_segment(path: Path) -> io.BufferedIOBase:
+    # Binary, like every reader of segments: offsets are byte offsets
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
+        zstd = _zstd()
+        if zstd is None:
+            raise RuntimeError(f"{path.name} needs the zstandard package to read")
+        # The file is closed here if wrapping it fails, and by the reader after
+        with contextlib.ExitStack() as stack:
+            f = stack.enter_context(open(path, "rb"))
+            reader = io.BufferedReader(
+                zstd.ZstdDecompressor().stream_reader(f, closefd=True)
+            )
+            stack.pop_all()
+        return reader
+    return open(path, "rb")
+
+
+def _stored_bytes(seg: dict) -> int:
+    return seg.get("stored_bytes", seg["bytes"])
+
+
+def _open_writer(path: str, codec: str):
+    if codec == "zstd":
+        zstd = _zstd()
+        assert zstd is not None
+        return zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, "wb"))
+    return gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
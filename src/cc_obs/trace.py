@@ -0,0 +1,90 @@
+import contextlib
+import os
+from collections.abc import Iterator
+
+from cc_obs.config import load_config
+from cc_obs.eventlog import append_side_records, stamp_event
+
+# cc-obs wrap exports these to the hook it runs. Spans started from inside the
+# hook are logged to its session as _span side records, and readers attach
+# them to the wrap record sharing their trace id.
+TRACE_ID_ENV = "CC_OBS_TRACE_ID"
+SPAN_ID_ENV = "CC_OBS_SPAN_ID"
+LOG_DIR_ENV = "CC_OBS_LOG_DIR"
+
+
+def new_id() -> str:
+    return os.urandom(8).hex()
+
+
+def start_span(
+    name: str, parent: str | None = None, attrs: dict | None = None
+) -> str | None:
+    # Outside a wrapped hook there is nowhere to log to; callers get None and
+    # end_span(None) is a no-op, so hooks behave the same unwrapped
+    log_dir = os.environ.get(LOG_DIR_ENV)
+    trace = os.environ.get(TRACE_ID_ENV)
+    if not log_dir or not trace:
+        return None
+    span_id = new_id()
+    record = {
+        "phase": "start",
+        "id": span_id,
+        "trace": trace,
+        "parent": parent or os.environ.get(SPAN_ID_ENV),
+        "name": name,
+    }
+    if attrs:
+        record["attrs"] = attrs
+    _append(log_dir, record)
+    return span_id
+
+
+def end_span(
+    span_id: str | None, error: bool = False, attrs: dict | None = None
+) -> None:
+    log_dir = os.environ.get(LOG_DIR_ENV)
+    if not log_dir or not span_id:
+        return
+    record = {"phase": "end", "id": span_id, "trace": os.environ.get(TRACE_ID_ENV)}
+    if error:
+        record["error"] = True
+    if attrs:
+        record["attrs"] = attrs
+    _append(log_dir, record)
+
+
+# Times a step of a wrapped hook. Spans opened inside it, and commands it
+# runs, become its children; an exception marks it as failed and propagates.
+@contextlib.contextmanager
+def span(name: str, **attrs) -> Iterator[str | None]:
+    span_id = start_span(name, attrs=attrs)
+    if span_id is None:
+        yield None
+        return
+    previous = os.environ.get(SPAN_ID_ENV)
+    os.environ[SPAN_ID_ENV] = span_id
+    error = False
+    try:
+        yield span_id
+    except BaseException:
+        error = True
+        raise
+    finally:
+        if previous is None:
+            os.environ.pop(SPAN_ID_ENV, None)
+        else:
+            os.environ[SPAN_ID_ENV] = previous
+        end_span(span_id, error=error)
+
+
+def _append(log_dir: str, span: dict) -> None:
+    record = {"_span": span}
+    stamp_event(record)
+    # Session directories live in <obs dir>/sessions/
+    config = load_config(os.path.dirname(os.path.dirname(log_dir)))
+    try:
+        append_side_records(log_dir, [record], config)
+    except OSError:
+        # Tracing must never break the hook
+        pass
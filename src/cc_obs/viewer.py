@@ -1,4 +1,4 @@
-import json
+from cc_obs.codec import dumps
 
 EVENT_COLORS = {
     "SessionStart": "#22c55e",
@@ -17,9 +17,12 @@ EVENT_COLORS = {
 }
 
 
-def render_html(events: list[dict]) -> str:
-    data_json = json.dumps(events)
-    return HTML_TEMPLATE.replace("__EVENTS_DATA__", data_json)
+def render_html(events: list[dict], dropped: dict | None = None) -> str:
+    # Encoded per event, so one that needs the stdlib fallback doesn't slow
+    # down the whole array
+    data_json = b"[" + b",".join(dumps(event) for event in events) + b"]"
+    html = HTML_TEMPLATE.replace("__DROPPED_DATA__", dumps(dropped or {}).decode())
+    return html.replace("__EVENTS_DATA__", data_json.decode())
 
 
 HTML_TEMPLATE = r"""<!DOCTYPE html>
@@ -94,6 +97,9 @@ h3 { font-size: 1rem; margin: 12px 0 6px; color: #94a3b8; }
 .span-row:hover { background: #1a2744; }
 .span-label { width: 200px; flex-shrink: 0; font-size: 0.8rem; color: #94a3b8; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; padding-right: 8px; }
 .span-label.depth-1 { padding-left: 20px; }
+.span-label.depth-2 { padding-left: 40px; }
+.span-label.depth-3 { padding-left: 60px; }
+.span-label.depth-4 { padding-left: 80px; }
 .span-bar-area { flex: 1; position: relative; height: 20px; }
 .span-bar { position: absolute; height: 16px; top: 2px; border-radius: 3px; min-width: 3px; cursor: pointer; opacity: 0.85; transition: opacity 0.1s; }
 .span-bar:hover { opacity: 1; }
@@ -133,6 +139,8 @@ h3 { font-size: 1rem; margin: 12px 0 6px; color: #94a3b8; }
 
 <script>
 const EVENTS = __EVENTS_DATA__;
+// Events discarded by ingestion rules, by event type then tool name
+const DROPPED = __DROPPED_DATA__;
 const COLORS = {
   SessionStart:"#22c55e", Stop:"#6b7280", UserPromptSubmit:"#a855f7",
   PreToolUse:"#3b82f6", PermissionRequest:"#3b82f6", PostToolUse:"#14b8a6",
@@ -171,27 +179,53 @@ function renderDashboard() {
 
   const typeCounts = {};
   const toolCounts = {};
+  // Sampled events stand for _sample events each
   EVENTS.forEach(e => {
     const t = e.hook_event_name || "unknown";
-    typeCounts[t] = (typeCounts[t]||0) + 1;
-    if (e.tool_name) toolCounts[e.tool_name] = (toolCounts[e.tool_name]||0) + 1;
+    const w = e._sample || 1;
+    typeCounts[t] = (typeCounts[t]||0) + w;
+    if (e.tool_name) toolCounts[e.tool_name] = (toolCounts[e.tool_name]||0) + w;
   });
+  Object.entries(DROPPED).forEach(([t, byTool]) => {
+    Object.entries(byTool).forEach(([tool, n]) => {
+      typeCounts[t||"unknown"] = (typeCounts[t||"unknown"]||0) + n;
+      if (tool) toolCounts[tool] = (toolCounts[tool]||0) + n;
+    });
+  });
+  const seen = Object.values(typeCounts).reduce((a, b) => a + b, 0);
 
   let spanStr = "";
   if (first._ts && last._ts) {
-    const secs = (new Date(last._ts) - new Date(first._ts)) / 1000;
+    const secs = elapsedMs(first, last) / 1000;
     spanStr = secs < 60 ? secs.toFixed(1)+"s" : secs < 3600 ? (secs/60).toFixed(1)+"m" : (secs/3600).toFixed(1)+"h";
   }
 
-  let wrapCount = 0, wrapMs = 0;
-  EVENTS.forEach(e => { if(e._wrap) { wrapCount++; wrapMs += e._wrap.duration_ms||0; }});
+  let wrapCount = 0, wrapMs = 0, cacheHits = 0, savedMs = 0;
+  EVENTS.forEach(e => {
+    if (!e._wrap) return;
+    wrapCount++;
+    wrapMs += e._wrap.duration_ms||0;
+    if (e._wrap.cache === "hit") { cacheHits++; savedMs += e._wrap.saved_ms||0; }
+  });
+
+  // cc-obs's own processing time per logged event (_overhead_us)
+  const overhead = {};
+  let overheadMs = 0;
+  EVENTS.forEach(e => {
+    if (e._overhead_us == null) return;
+    const t = e.hook_event_name || "unknown";
+    (overhead[t] = overhead[t] || []).push(e._overhead_us / 1000);
+    overheadMs += e._overhead_us / 1000;
+  });
 
   let html = `<div class="dash-row">
     <div class="dash-item"><div class="dash-label">Session</div><div class="dash-value">${esc(sessionId)}</div></div>
     <div class="dash-item"><div class="dash-label">Model</div><div class="dash-value">${esc(model)}</div></div>
-    <div class="dash-item"><div class="dash-label">Events</div><div class="dash-value">${EVENTS.length}</div></div>
+    <div class="dash-item"><div class="dash-label">Events</div><div class="dash-value">${EVENTS.length}${seen !== EVENTS.length ? ` (~${seen} seen)` : ""}</div></div>
     <div class="dash-item"><div class="dash-label">Span</div><div class="dash-value">${spanStr}</div></div>
     ${wrapCount ? `<div class="dash-item"><div class="dash-label">Hook time</div><div class="dash-value">${wrapMs.toFixed(0)}ms (${wrapCount})</div></div>` : ""}
+    ${cacheHits ? `<div class="dash-item"><div class="dash-label">Cache saved</div><div class="dash-value">${savedMs.toFixed(0)}ms (${cacheHits} hits)</div></div>` : ""}
+    ${overheadMs ? `<div class="dash-item"><div class="dash-label">Observer overhead</div><div class="dash-value">${overheadMs.toFixed(0)}ms</div></div>` : ""}
   </div>`;
 
   html += `<h3>Events</h3><div class="stat-grid">`;
@@ -209,14 +243,49 @@ function renderDashboard() {
     html += `</div>`;
   }
 
+  if (Object.keys(overhead).length) {
+    html += `<h3>Observer overhead</h3><div class="stat-grid">`;
+    Object.entries(overhead).sort((a,b)=>sum(b[1])-sum(a[1])).forEach(([name,ms]) => {
+      ms.sort((a,b)=>a-b);
+      html += `<div class="stat-card"><span class="count">${sum(ms).toFixed(0)}ms</span>${esc(name)} · p50 ${percentile(ms,50).toFixed(1)}ms · p95 ${percentile(ms,95).toFixed(1)}ms</div>`;
+    });
+    html += `</div>`;
+  }
+
   el.innerHTML = html;
 }
 
+// Timing breakdown and resource usage of a wrapped hook, for span tooltips
+function hookDetails(w) {
+  let text = "";
+  if (w.warm != null) text += "\nServed " + (w.warm ? "warm" : "cold");
+  if (w.cache === "hit") text += "\nCache hit (saved " + w.saved_ms + "ms)";
+  if (w.spawn_ms != null) text += "\nSpawn: " + w.spawn_ms + "ms";
+  if (w.first_output_ms != null) text += "\nFirst output: " + w.first_output_ms + "ms";
+  if (w.budget_ms != null) text += "\nBudget: " + w.budget_ms + "ms" + (w.over_budget ? " (exceeded)" : "");
+  if (w.timed_out) text += "\nKilled after " + w.timeout_ms + "ms timeout";
+  const ru = w.rusage;
+  if (ru) {
+    text += "\nCPU: " + ru.user_ms + "ms user, " + ru.sys_ms + "ms sys";
+    text += "\nMax RSS: " + (ru.max_rss_kb / 1024).toFixed(1) + " MB";
+    text += "\nBlock I/O: " + ru.in_blocks + " in, " + ru.out_blocks + " out";
+    text += "\nContext switches: " + ru.vol_ctx_switches + " voluntary, " + ru.invol_ctx_switches + " involuntary";
+  }
+  return text;
+}
+
+function sum(values) { return values.reduce((a, b) => a + b, 0); }
+
+// Nearest-rank percentile of a sorted array
+function percentile(sorted, pct) {
+  return sorted[Math.max(1, Math.ceil(sorted.length * pct / 100)) - 1];
+}
+
 function renderTimeline() {
   const el = document.getElementById("timeline");
   if (!EVENTS.length) { el.innerHTML = "<p>No events</p>"; return; }
 
-  const t0 = EVENTS[0]._ts ? new Date(EVENTS[0]._ts) : null;
+  const first = EVENTS[0];
   let html = "";
 
   EVENTS.forEach((e, i) => {
@@ -225,15 +294,15 @@ function renderTimeline() {
 
     // Gap marker
     if (i > 0 && EVENTS[i-1]._ts && e._ts) {
-      const gap = (new Date(e._ts) - new Date(EVENTS[i-1]._ts)) / 1000;
+      const gap = elapsedMs(EVENTS[i-1], e) / 1000;
       if (gap > 1) {
         html += `<div class="gap-marker">⋯ ${gap.toFixed(1)}s gap ⋯</div>`;
       }
     }
 
     let relTime = "";
-    if (t0 && e._ts) {
-      const rel = (new Date(e._ts) - t0) / 1000;
+    if (first._ts && e._ts) {
+      const rel = elapsedMs(first, e) / 1000;
       relTime = "+" + rel.toFixed(1) + "s";
     }
 
@@ -269,13 +338,13 @@ function summarize(e) {
   const type = e.hook_event_name;
   if (type === "SessionStart") return `source: <code>${esc(e.source||"")}</code>`;
   if (type === "UserPromptSubmit") {
-    const p = e.prompt || "";
+    const p = text(e.prompt);
     return `<code>${esc(p.length > 80 ? p.slice(0,80)+"…" : p)}</code>`;
   }
   if (e.tool_name) {
     let detail = "";
     const inp = e.tool_input || {};
-    if (e.tool_name === "Bash") detail = inp.command || "";
+    if (e.tool_name === "Bash") detail = text(inp.command);
     else if (e.tool_name === "Read" || e.tool_name === "Write" || e.tool_name === "Edit") detail = inp.file_path || "";
     else if (e.tool_name === "Glob") detail = inp.pattern || "";
     else if (e.tool_name === "Grep") detail = inp.pattern || "";
@@ -355,9 +424,8 @@ function renderSpans() {
   const tsEvents = EVENTS.filter(e => e._ts);
   if (tsEvents.length < 2) { el.innerHTML = "<p>Not enough timestamped events for span view</p>"; return; }
 
-  const t0 = new Date(tsEvents[0]._ts).getTime();
-  const t1 = new Date(tsEvents[tsEvents.length - 1]._ts).getTime();
-  const duration = t1 - t0;
+  const t0 = tms(tsEvents[0]);
+  const duration = elapsedMs(tsEvents[0], tsEvents[tsEvents.length - 1]);
   if (duration <= 0) { el.innerHTML = "<p>All events at same timestamp</p>"; return; }
 
   // Build tool spans: match PreToolUse -> PostToolUse/PostToolUseFailure by tool_use_id
@@ -372,8 +440,8 @@ function renderSpans() {
       toolSpans.push({
         type: "tool",
         label: pre.tool_name || "Tool",
-        start: new Date(pre._ts).getTime(),
-        end: new Date(e._ts).getTime(),
+        start: tms(pre),
+        end: tms(pre) + elapsedMs(pre, e),
         color: COLORS[e.hook_event_name] || "#14b8a6",
         agentId: pre._agent_id || null,
         failed: e.hook_event_name === "PostToolUseFailure",
@@ -396,8 +464,8 @@ function renderSpans() {
         label: (start.agent_type || "agent") + " " + start.agent_id,
         shortLabel: start.agent_type || start.agent_id,
         agentId: start.agent_id,
-        start: new Date(start._ts).getTime(),
-        end: new Date(e._ts).getTime(),
+        start: tms(start),
+        end: tms(start) + elapsedMs(start, e),
         color: COLORS.SubagentStart,
         events: [start, e]
       };
@@ -409,7 +477,7 @@ function renderSpans() {
   const hookSpans = [];
   EVENTS.forEach(e => {
     if (e._wrap && e._ts) {
-      const end = new Date(e._ts).getTime();
+      const end = tms(e);
       const start = end - (e._wrap.duration_ms || 0);
       const failed = e._wrap.exit_code !== 0;
       hookSpans.push({
@@ -425,13 +493,44 @@ function renderSpans() {
     }
   });
 
+  // Steps a wrapped hook recorded (cc-obs span, cc_obs.trace) and wraps nested
+  // inside it are rows under that hook, following their parent span ids
+  const nestedHooks = hookSpans.filter(s => s.events[0]._wrap.parent_span_id);
+  const topHooks = hookSpans.filter(s => !s.events[0]._wrap.parent_span_id);
+  function withSteps(hook, depth) {
+    const w = hook.events[0]._wrap;
+    const nodes = (w.spans || []).map(s => ({
+      id: s.id,
+      parent: s.parent,
+      row: {
+        type: "step",
+        label: (s.name || "step") + (s.error ? " (error)" : "") + (s.end ? "" : " (unfinished)"),
+        start: tms(s),
+        end: s.end ? tms(s) + elapsedMs(s, s.end) : hook.end,
+        color: s.error ? COLORS.PostToolUseFailure : "#8b5cf6",
+        failed: !!s.error,
+        events: s.end ? [s, s.end] : [s]
+      }
+    }));
+    nestedHooks.filter(h => h.events[0]._wrap.trace_id === w.trace_id).forEach(h => {
+      nodes.push({ id: h.events[0]._wrap.span_id, parent: h.events[0]._wrap.parent_span_id, row: h });
+    });
+    const out = [{ ...hook, depth }];
+    const walk = (parent, d) => nodes
+      .filter(n => n.parent === parent)
+      .sort((a, b) => a.row.start - b.row.start)
+      .forEach(n => { out.push({ ...n.row, depth: d }); walk(n.id, d + 1); });
+    if (w.span_id) walk(w.span_id, depth + 1);
+    return out;
+  }
+
   // Point events
   const pointTypes = new Set(["SessionStart", "Stop", "UserPromptSubmit", "Notification", "PreCompact"]);
   const pointEvents = EVENTS.filter(e => pointTypes.has(e.hook_event_name) && e._ts).map(e => ({
     type: "point",
     label: e.hook_event_name,
-    start: new Date(e._ts).getTime(),
-    end: new Date(e._ts).getTime(),
+    start: tms(e),
+    end: tms(e),
     color: COLORS[e.hook_event_name] || "#64748b",
     events: [e]
   }));
@@ -441,17 +540,17 @@ function renderSpans() {
 
   // Session-level point events, tools, and hooks without agent
   const sessionTools = toolSpans.filter(s => !s.agentId);
-  const sessionHooks = hookSpans.filter(s => !s.agentId);
+  const sessionHooks = topHooks.filter(s => !s.agentId);
   const sessionItems = [...pointEvents, ...sessionTools, ...sessionHooks].sort((a, b) => a.start - b.start);
-  sessionItems.forEach(s => rows.push({ ...s, depth: 0 }));
+  sessionItems.forEach(s => rows.push(...(s.type === "hook" ? withSteps(s, 0) : [{ ...s, depth: 0 }])));
 
   // Agent spans with nested children (tools + hooks)
   agentSpans.sort((a, b) => a.start - b.start).forEach(agent => {
     rows.push({ ...agent, depth: 0 });
     const childTools = toolSpans.filter(s => s.agentId === agent.agentId);
-    const childHooks = hookSpans.filter(s => s.agentId === agent.agentId);
+    const childHooks = topHooks.filter(s => s.agentId === agent.agentId);
     const children = [...childTools, ...childHooks].sort((a, b) => a.start - b.start);
-    children.forEach(s => rows.push({ ...s, depth: 1, label: s.label }));
+    children.forEach(s => rows.push(...(s.type === "hook" ? withSteps(s, 1) : [{ ...s, depth: 1 }])));
   });
 
   // Render time axis
@@ -470,10 +569,10 @@ function renderSpans() {
   rows.forEach((row, idx) => {
     const leftPct = ((row.start - t0) / duration) * 100;
     const widthPct = Math.max(((row.end - row.start) / duration) * 100, 0.3);
-    const depthClass = row.depth === 1 ? ' depth-1' : '';
-    const displayLabel = row.depth === 1 ? '\u21b3 ' + row.label : row.label;
+    const depthClass = row.depth ? ' depth-' + Math.min(row.depth, 4) : '';
+    const displayLabel = row.depth ? '\u21b3 ' + row.label : row.label;
     const durationMs = row.end - row.start;
-    const durationLabel = durationMs > 0 ? (durationMs < 1000 ? durationMs + "ms" : (durationMs / 1000).toFixed(1) + "s") : "";
+    const durationLabel = durationMs > 0 ? fmtDuration(durationMs) : "";
 
     if (row.type === "point") {
       rowsHtml += `<div class="span-row" data-span-idx="${idx}">
@@ -501,11 +600,13 @@ function renderSpans() {
     bar.addEventListener("mouseenter", function(ev) {
       const row = rows[this.dataset.spanIdx];
       const durationMs = row.end - row.start;
-      const dur = durationMs > 0 ? (durationMs < 1000 ? durationMs + "ms" : (durationMs / 1000).toFixed(1) + "s") : "instant";
+      const dur = durationMs > 0 ? fmtDuration(durationMs) : "instant";
       let text = row.label + "\n";
       text += "Duration: " + dur + "\n";
       if (row.events[0]._ts) text += "Start: " + row.events[0]._ts + "\n";
       if (row.events.length > 1 && row.events[1]._ts) text += "End: " + row.events[1]._ts;
+      if (row.type === "hook") text += hookDetails(row.events[0]._wrap);
+      if (row.type === "step" && row.events[0].attrs) text += "\n" + JSON.stringify(row.events[0].attrs);
       if (row.failed) text += "\nFAILED";
       tooltip.textContent = text;
       tooltip.style.display = "block";
@@ -535,6 +636,36 @@ function renderSpans() {
   });
 }
 
+// Epoch ms, from the integer stamp when present; ISO parsing only for older events
+function tms(e) {
+  if (e._ts_ns != null) return e._ts_ns / 1e6;
+  return e._ts ? new Date(e._ts).getTime() : null;
+}
+
+// Duration between two events, from the monotonic stamps unless they disagree
+// with the wall clock by over a second (a reboot in between)
+function elapsedMs(a, b) {
+  const wall = tms(b) - tms(a);
+  if (a._mono_ns != null && b._mono_ns != null) {
+    const mono = (b._mono_ns - a._mono_ns) / 1e6;
+    if (mono >= 0 && Math.abs(mono - wall) < 1000) return mono;
+  }
+  return wall;
+}
+
+// Nanosecond stamps make fractional milliseconds; a tenth is enough below 10ms
+function fmtDuration(ms) {
+  if (ms < 10) return ms.toFixed(1) + "ms";
+  if (ms < 1000) return Math.round(ms) + "ms";
+  return (ms / 1000).toFixed(1) + "s";
+}
+
+// Large fields are stored as blob references; summaries use their preview
+function text(v) {
+  if (v && typeof v === "object" && v._blob) return v.preview || "";
+  return typeof v === "string" ? v : "";
+}
+
 function esc(s) {
   if (typeof s !== "string") return "";
   return s.replace(/&/g,"&amp;").replace(/</g,"&lt;").replace(/>/g,"&gt;").replace(/"/g,"&quot;");
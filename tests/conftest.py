@@ -13,9 +13,15 @@ def project_dir(tmp_path, monkeypatch):
 
 
 @pytest.fixture
-def events_file(project_dir):
-    """Return the events.jsonl path (doesn't create the file)."""
-    return project_dir / ".claude" / "cc-obs" / "events.jsonl"
+def session_dir(project_dir):
+    """Return the log directory of sample_event's session (doesn't create it)."""
+    return project_dir / ".claude" / "cc-obs" / "sessions" / "test-session-123"
+
+
+@pytest.fixture
+def events_file(session_dir):
+    """Return the session's events.jsonl path (doesn't create the file)."""
+    return session_dir / "events.jsonl"
 
 
 @pytest.fixture
@@ -46,6 +52,7 @@ def write_events(events_file):
 
     def _write(events: list[dict]):
         lines = [json.dumps(e, separators=(",", ":")) for e in events]
+        events_file.parent.mkdir(parents=True, exist_ok=True)
         events_file.write_text("\n".join(lines) + "\n")
 
     return _write
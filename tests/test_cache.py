@@ -0,0 +1,53 @@
+import json
+import os
+import time
+
+from cc_obs.cache import cache_key, evict, lookup, store
+
+
+def test_cache_key_ignores_listed_fields():
+    a = {"tool_input": {"file_path": "a.py"}, "tool_use_id": "t1", "session_id": "s1"}
+    b = {"session_id": "s2", "tool_input": {"file_path": "a.py"}, "tool_use_id": "t2"}
+    ignore = ["tool_use_id", "session_id"]
+    key = cache_key(["lint"], json.dumps(a).encode(), ignore)
+    assert cache_key(["lint"], json.dumps(b).encode(), ignore) == key
+    assert cache_key(["fmt"], json.dumps(a).encode(), ignore) != key
+    c = {**a, "tool_input": {"file_path": "b.py"}}
+    assert cache_key(["lint"], json.dumps(c).encode(), ignore) != key
+
+
+def test_cache_key_raw_input():
+    assert cache_key(["cat"], b"not json", []) != cache_key(["cat"], b"not json!", [])
+
+
+def test_store_and_lookup(tmp_path):
+    store(str(tmp_path), "k", 2, 120.0, b"out\xff", b"err", 0)
+    assert lookup(str(tmp_path), "k", 60) == {
+        "exit_code": 2,
+        "duration_ms": 120.0,
+        "stdout": b"out\xff",
+        "stderr": b"err",
+    }
+    assert lookup(str(tmp_path), "missing", 60) is None
+
+
+def test_lookup_expires_entries(tmp_path):
+    store(str(tmp_path), "k", 0, 1.0, b"", b"", 0)
+    path = tmp_path / "k.json"
+    entry = json.loads(path.read_text())
+    entry["created"] -= 120
+    path.write_text(json.dumps(entry))
+    assert lookup(str(tmp_path), "k", 60) is None
+    assert not path.exists()
+
+
+def test_evict_least_recently_used(tmp_path):
+    for i, key in enumerate(["a", "b", "c"]):
+        store(str(tmp_path), key, 0, 1.0, b"x" * 100, b"", 0)
+        t = time.time() - 100 + i
+        os.utime(tmp_path / f"{key}.json", (t, t))
+    # A hit makes "a" the most recently used
+    lookup(str(tmp_path), "a", 0)
+    size = sum((tmp_path / f"{key}.json").stat().st_size for key in ["a", "c"])
+    assert evict(str(tmp_path), size) == 1
+    assert sorted(p.stem for p in tmp_path.iterdir()) == ["a", "c"]
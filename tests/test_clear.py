@@ -3,14 +3,20 @@ import pytest
 from cc_obs.commands.clear import run
 
 
-def test_clear_deletes_files(project_dir, events_file):
-    events_file.write_text("data\n")
+@pytest.fixture
+def legacy_events(project_dir):
+    # The log from before per-session directories
+    return project_dir / ".claude" / "cc-obs" / "events.jsonl"
+
+
+def test_clear_deletes_files(project_dir, legacy_events):
+    legacy_events.write_text("data\n")
     view_html = project_dir / ".claude" / "cc-obs" / "view.html"
     view_html.write_text("<html></html>")
 
     run()
 
-    assert not events_file.exists()
+    assert not legacy_events.exists()
     assert not view_html.exists()
 
 
@@ -19,10 +25,10 @@ def test_clear_nothing_to_clear(project_dir, capsys):
     assert "Nothing to clear" in capsys.readouterr().out
 
 
-def test_clear_quiet(project_dir, events_file, capsys):
-    events_file.write_text("data\n")
+def test_clear_quiet(project_dir, legacy_events, capsys):
+    legacy_events.write_text("data\n")
     run(quiet=True)
-    assert not events_file.exists()
+    assert not legacy_events.exists()
     assert capsys.readouterr().out == ""
 
 
@@ -38,3 +44,48 @@ def test_clear_quiet_no_project_root(tmp_path, monkeypatch, capsys):
     run(quiet=True)
     # No crash, no output
     assert capsys.readouterr().out == ""
+
+
+def test_clear_removes_segments(project_dir, events_file):
+    segments = project_dir / ".claude" / "cc-obs" / "segments"
+    segments.mkdir()
+    (segments / "events-000001.jsonl").write_text("data\n")
+    manifest = project_dir / ".claude" / "cc-obs" / "manifest.json"
+    manifest.write_text('{"segments":[]}')
+
+    run(quiet=True)
+
+    assert not segments.exists()
+    assert not manifest.exists()
+
+
+def test_clear_removes_sessions_with_all(project_dir, session_dir):
+    session_dir.mkdir(parents=True)
+    (session_dir / "events.jsonl").write_text("data\n")
+
+    run(quiet=True, all_sessions=True)
+
+    assert not session_dir.parent.exists()
+
+
+def test_clear_keeps_sessions(events_file, legacy_events, capsys):
+    # What the SessionStart hook of older installs runs before every session
+    events_file.parent.mkdir(parents=True)
+    events_file.write_text("data\n")
+    legacy_events.write_text("data\n")
+
+    run(quiet=True)
+    assert events_file.exists()
+    assert not legacy_events.exists()
+
+    run()
+    assert "--all" in capsys.readouterr().out
+    assert events_file.exists()
+
+
+def test_clear_deletes_wrap_cache(project_dir):
+    cache = project_dir / ".claude" / "cc-obs" / "cache"
+    cache.mkdir(parents=True)
+    (cache / "abc.json").write_text("{}")
+    run()
+    assert not cache.exists()
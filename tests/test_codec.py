@@ -0,0 +1,105 @@
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from cc_obs import codec
+from cc_obs.eventlog import append_event
+
+FIXTURE = Path(__file__).parent / "fixtures" / "sample_session.jsonl"
+
+EDGE_VALUES = [
+    None,
+    {"empty": {}, "list": [], "none": None, "flags": [True, False]},
+    {"text": "café ☕ naïve \U0001f600   \x7f", "ctrl": "\x00\x01\x0b\x1f\b\f\n\t"},
+    {"quote": '"\\/', "key é": "value"},
+    {"ints": [0, -1, 2**63 - 1, -(2**63), 2**64, 2**70, -(2**70)]},
+    {"floats": [0.0, -0.0, 0.1, 1.5, 1e-4, 9.9e-5, 1e-7, 1e15, 1e16, 1.5e300, 5e-324]},
+    {"special": [math.inf, -math.inf, math.nan]},
+    {"nested": [[[{"a": [1, {"b": None}]}]]]},
+    # Numbers as the whole document
+    1e-05,
+    -9.9e-5,
+    1e16,
+    1e100,
+    -1.5e-300,
+    0.5,
+    42,
+]
+
+DECODE_INPUTS = [
+    b'{"a": 1, "a": 2}',
+    b'{"big": 123456789012345678901234567890, "neg": -9223372036854775809}',
+    b'{"v": NaN, "w": Infinity, "x": -Infinity}',
+    b'{"s": "\\ud800"}',
+    b'{"f": 1E400, "g": -0, "h": -0.0}',
+    '{"text": "café \\u2028"}',
+    b"[1, 2, 3]\n",
+]
+
+
+@pytest.fixture(params=codec.BACKENDS)
+def backend(request):
+    if request.param != "json":
+        pytest.importorskip(request.param)
+    yield codec.set_backend(request.param)
+    codec.set_backend()
+
+
+def _stdlib(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def test_dumps_is_byte_identical_to_stdlib(backend):
+    events = [json.loads(line) for line in FIXTURE.read_text().splitlines()]
+    for value in events + EDGE_VALUES:
+        assert codec.dumps(value) == _stdlib(value)
+
+
+def test_dumps_non_json_keys_like_stdlib(backend):
+    for value in ({1: "a", 2.5: "b"}, {True: 1, None: 2}):
+        assert codec.dumps(value) == _stdlib(value)
+    with pytest.raises(TypeError):
+        codec.dumps({"a": object()})
+
+
+def test_loads_matches_stdlib(backend):
+    # repr() so NaN compares equal to itself
+    for data in [*DECODE_INPUTS, *FIXTURE.read_bytes().splitlines()]:
+        assert repr(codec.loads(data)) == repr(json.loads(data))
+
+
+def test_loads_raises_stdlib_errors(backend):
+    for data in (b'{"a": 1', b"", b"[1,]", b'{"a": "\xff"}'):
+        with pytest.raises(ValueError) as fast:
+            codec.loads(data)
+        with pytest.raises(ValueError) as stdlib:
+            json.loads(data)
+        assert type(fast.value) is type(stdlib.value)
+
+
+def test_logs_are_identical_across_backends(tmp_path, backend):
+    events = [json.loads(line) for line in FIXTURE.read_text().splitlines()]
+    config = {"compact": True, "blob_threshold": 0}
+    codec.set_backend("json")
+    for event in events:
+        append_event(str(tmp_path / "stdlib"), dict(event), config)
+    codec.set_backend(backend)
+    for event in events:
+        append_event(str(tmp_path / "fast"), dict(event), config)
+    for name in ("events.jsonl", "tool_index.jsonl", "state.json"):
+        assert (tmp_path / "fast" / name).read_bytes() == (
+            tmp_path / "stdlib" / name
+        ).read_bytes()
+
+
+def test_backend_from_env(monkeypatch):
+    monkeypatch.setenv(codec.BACKEND_ENV, "json")
+    assert codec.set_backend() == "json"
+    monkeypatch.setenv(codec.BACKEND_ENV, "no-such-backend")
+    assert codec.set_backend() in codec.BACKENDS
+    with pytest.raises(ValueError):
+        codec.set_backend("no-such-backend")
+    monkeypatch.delenv(codec.BACKEND_ENV)
+    codec.set_backend()
@@ -0,0 +1,98 @@
+import json
+import threading
+
+import pytest
+
+from cc_obs.commands import collectord
+from cc_obs.commands.collectord import CollectorServer
+from cc_obs.commands.log import _send_to_collector, run
+
+
+@pytest.fixture
+def collector(project_dir):
+    server = CollectorServer(str(project_dir / ".claude" / "cc-obs"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_log_goes_through_collector(
+    collector, project_dir, sample_event, events_file, feed_stdin, monkeypatch
+):
+    batches = []
+    original = collectord.record_events
+
+    def _record(log_dir, events):
+        batches.append(len(events))
+        original(log_dir, events)
+
+    monkeypatch.setattr(collectord, "record_events", _record)
+    feed_stdin(json.dumps(sample_event).encode())
+    run()
+
+    assert batches == [1]
+    event = json.loads(events_file.read_text().strip())
+    assert event["_seq"] == 1
+    assert "_ts" in event
+
+
+def test_collector_batches_concurrent_events(
+    collector, project_dir, sample_event, events_file
+):
+    n = 20
+    threads = [
+        threading.Thread(
+            target=_send_to_collector,
+            args=(
+                collector.log_dir,
+                json.dumps({**sample_event, "tool_use_id": f"t{i}"}).encode(),
+            ),
+        )
+        for i in range(n)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    events = [json.loads(line) for line in events_file.read_text().splitlines()]
+    assert sorted(e["_seq"] for e in events) == list(range(1, n + 1))
+    assert {e["tool_use_id"] for e in events} == {f"t{i}" for i in range(n)}
+
+
+def test_collector_rejects_invalid_payload(collector, events_file):
+    # No ack, so the hook appends the event itself
+    assert not _send_to_collector(collector.log_dir, b"not json")
+    assert not events_file.exists()
+
+
+def test_collector_survives_failed_batch(
+    collector, project_dir, sample_event, events_file, feed_stdin, capfd
+):
+    bad = json.dumps({**sample_event, "session_id": 123}).encode()
+    assert not _send_to_collector(collector.log_dir, bad)
+    assert "write failed" in capfd.readouterr().err
+
+    assert _send_to_collector(collector.log_dir, json.dumps(sample_event).encode())
+    assert json.loads(events_file.read_text())["_seq"] == 1
+
+
+def test_collector_removes_socket_on_close(project_dir):
+    server = CollectorServer(str(project_dir / ".claude" / "cc-obs"))
+    sock = project_dir / ".claude" / "cc-obs" / "collector.sock"
+    assert sock.exists()
+    server.server_close()
+    assert not sock.exists()
+
+
+def test_log_falls_back_on_stale_socket(
+    project_dir, sample_event, events_file, feed_stdin
+):
+    (project_dir / ".claude" / "cc-obs" / "collector.sock").write_text("")
+    feed_stdin(json.dumps(sample_event).encode())
+    run()
+    event = json.loads(events_file.read_text().strip())
+    assert event["_seq"] == 1
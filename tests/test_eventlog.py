@@ -0,0 +1,281 @@
+import itertools
+import json
+
+from cc_obs.eventlog import append_event, read_manifest, recover_seq
+from cc_obs.reader import ReadStats, read_events
+
+
+def _read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_append_assigns_sequential_seq(tmp_path):
+    assert append_event(str(tmp_path), {"hook_event_name": "A"}) == 1
+    assert append_event(str(tmp_path), {"hook_event_name": "B"}) == 2
+    events = _read_lines(tmp_path / "events.jsonl")
+    assert [e["_seq"] for e in events] == [1, 2]
+
+
+def test_append_writes_state_sidecar(tmp_path):
+    append_event(str(tmp_path), {"hook_event_name": "A"})
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["seq"] == 1
+    assert state["size"] == (tmp_path / "events.jsonl").stat().st_size
+
+
+def test_append_recovers_missing_state(tmp_path):
+    append_event(str(tmp_path), {"hook_event_name": "A"})
+    append_event(str(tmp_path), {"hook_event_name": "B"})
+    (tmp_path / "state.json").unlink()
+    assert append_event(str(tmp_path), {"hook_event_name": "C"}) == 3
+
+
+def test_append_recovers_stale_state(tmp_path):
+    append_event(str(tmp_path), {"hook_event_name": "A"})
+    # Simulate a writer that appended without updating the sidecar
+    with open(tmp_path / "events.jsonl", "a") as f:
+        f.write(json.dumps({"hook_event_name": "B", "_seq": 2}) + "\n")
+    assert append_event(str(tmp_path), {"hook_event_name": "C"}) == 3
+
+
+def test_append_after_torn_tail_starts_a_new_line(tmp_path):
+    config = {"compact": True}
+    event = {"session_id": "s1", "cwd": "/p", "hook_event_name": "A"}
+    append_event(str(tmp_path), dict(event), config)
+    # A writer killed part way through its append
+    with open(tmp_path / "events.jsonl", "a") as f:
+        f.write('{"torn":')
+    append_event(str(tmp_path), {**event, "cwd": "/q"}, config)
+    append_event(str(tmp_path), {**event, "cwd": "/q"}, config)
+
+    stats = ReadStats()
+    events = read_events(tmp_path / "events.jsonl", stats)
+    assert [(e["_seq"], e["cwd"]) for e in events] == [(1, "/p"), (2, "/q"), (3, "/q")]
+    assert stats.corrupt == 1
+
+
+def test_append_recovers_corrupt_state(tmp_path):
+    append_event(str(tmp_path), {"hook_event_name": "A"})
+    (tmp_path / "state.json").write_text("{not json")
+    assert append_event(str(tmp_path), {"hook_event_name": "B"}) == 2
+
+
+def test_recover_seq_missing_file(tmp_path):
+    assert recover_seq(str(tmp_path / "events.jsonl")) == 0
+
+
+def test_recover_seq_skips_torn_last_line(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text(json.dumps({"_seq": 7}) + "\n" + '{"_seq": 8, "trunc')
+    assert recover_seq(str(path)) == 7
+
+
+def test_recover_seq_large_lines(tmp_path):
+    path = tmp_path / "events.jsonl"
+    big = "x" * 200_000
+    path.write_text(
+        json.dumps({"_seq": 1, "data": big})
+        + "\n"
+        + json.dumps({"_seq": 2, "data": big})
+        + "\n"
+    )
+    assert recover_seq(str(path)) == 2
+
+
+def test_append_indexes_tool_use_offsets(tmp_path):
+    append_event(str(tmp_path), {"hook_event_name": "SessionStart"})
+    append_event(str(tmp_path), {"hook_event_name": "PreToolUse", "tool_use_id": "t1"})
+    append_event(str(tmp_path), {"hook_event_name": "PostToolUse", "tool_use_id": "t1"})
+
+    index = _read_lines(tmp_path / "tool_index.jsonl")
+    assert [(e["id"], e["ev"]) for e in index] == [
+        ("t1", "PreToolUse"),
+        ("t1", "PostToolUse"),
+    ]
+    with open(tmp_path / "events.jsonl", "rb") as f:
+        for entry in index:
+            f.seek(entry["off"])
+            event = json.loads(f.readline())
+            assert event["hook_event_name"] == entry["ev"]
+
+
+def test_append_rotates_segments(tmp_path):
+    config = {"segment_bytes": 200, "compress": "none"}
+    for i in range(10):
+        append_event(
+            str(tmp_path),
+            {"hook_event_name": "A", "_ts": f"2025-01-01T00:00:{i:02d}Z", "i": i},
+            config,
+        )
+
+    manifest = read_manifest(str(tmp_path))
+    segments = manifest["segments"]
+    assert len(segments) >= 2
+    assert [s["n"] for s in segments] == list(range(1, len(segments) + 1))
+    assert segments[0]["seq"][0] == 1
+    assert segments[0]["ts"][0] == "2025-01-01T00:00:00Z"
+    for prev, cur in itertools.pairwise(segments):
+        assert cur["seq"][0] == prev["seq"][1] + 1
+    for seg in segments:
+        path = tmp_path / "segments" / seg["file"]
+        assert path.stat().st_size == seg["bytes"] >= 200
+
+
+def test_append_recovers_seq_after_rotation(tmp_path):
+    config = {"segment_bytes": 100}
+    append_event(str(tmp_path), {"hook_event_name": "A", "pad": "x" * 100}, config)
+    assert not (tmp_path / "events.jsonl").exists()
+    (tmp_path / "state.json").unlink()
+    assert append_event(str(tmp_path), {"hook_event_name": "B"}, config) == 2
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["segment"] == 2
+
+
+def test_append_moves_large_fields_to_blobs(tmp_path):
+    content = "line\n" * 5000
+    for name in ["PreToolUse", "PostToolUse"]:
+        append_event(
+            str(tmp_path),
+            {
+                "hook_event_name": name,
+                "tool_input": {"file_path": "a.py", "content": content},
+            },
+            {"blob_threshold": 1024},
+        )
+
+    events = _read_lines(tmp_path / "events.jsonl")
+    refs = [e["tool_input"]["content"] for e in events]
+    assert refs[0] == refs[1]
+    assert refs[0]["bytes"] == len(content)
+    assert refs[0]["preview"] == content[:200]
+    assert events[0]["tool_input"]["file_path"] == "a.py"
+    # Identical content is stored once
+    blobs = list((tmp_path / "blobs").glob("*/*"))
+    assert [p.name for p in blobs] == [refs[0]["_blob"]]
+    assert blobs[0].read_text() == content
+
+
+def test_append_blob_threshold_disabled(tmp_path):
+    append_event(str(tmp_path), {"tool_response": "x" * 20000}, {"blob_threshold": 0})
+    assert _read_lines(tmp_path / "events.jsonl")[0]["tool_response"] == "x" * 20000
+    assert not (tmp_path / "blobs").exists()
+
+
+def test_compact_writes_header_once(tmp_path):
+    config = {"compact": True}
+    base = {"session_id": "s1", "cwd": "/p", "transcript_path": "/t.jsonl"}
+    append_event(str(tmp_path), {**base, "hook_event_name": "A"}, config)
+    append_event(str(tmp_path), {**base, "hook_event_name": "B"}, config)
+    append_event(
+        str(tmp_path), {**base, "cwd": "/p/sub", "hook_event_name": "C"}, config
+    )
+
+    lines = _read_lines(tmp_path / "events.jsonl")
+    assert lines[0] == {"_header": base}
+    assert lines[1] == {"hook_event_name": "A", "_seq": 1}
+    assert lines[2] == {"hook_event_name": "B", "_seq": 2}
+    # A changed constant starts a new header
+    assert lines[3] == {"_header": {**base, "cwd": "/p/sub"}}
+    assert lines[4] == {"hook_event_name": "C", "_seq": 3}
+
+
+def test_compact_rotation_restarts_header(tmp_path):
+    config = {"compact": True, "segment_bytes": 100, "compress": "none"}
+    for i in range(3):
+        append_event(
+            str(tmp_path),
+            {"session_id": "s1", "hook_event_name": "A", "pad": "x" * 80},
+            config,
+        )
+    for path in (tmp_path / "segments").iterdir():
+        assert _read_lines(path)[0] == {"_header": {"session_id": "s1"}}
+
+
+def test_rules_drop_and_count(tmp_path):
+    config = {
+        "rules": [
+            {
+                "event": "PreToolUse|PostToolUse",
+                "matcher": "Read|Glob",
+                "action": "drop",
+            }
+        ]
+    }
+    events = [
+        {"hook_event_name": "PreToolUse", "tool_name": "Read"},
+        {"hook_event_name": "PreToolUse", "tool_name": "Bash"},
+        {"hook_event_name": "PostToolUse", "tool_name": "Glob"},
+        {"hook_event_name": "Stop"},
+    ]
+    assert [append_event(str(tmp_path), ev, config) for ev in events] == [0, 1, 0, 2]
+
+    logged = _read_lines(tmp_path / "events.jsonl")
+    assert [e.get("tool_name") for e in logged] == ["Bash", None]
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["dropped"] == {"PreToolUse": {"Read": 1}, "PostToolUse": {"Glob": 1}}
+
+
+def test_rules_sample_keeps_one_in_n(tmp_path):
+    config = {"rules": [{"matcher": "Grep", "action": "sample", "every": 3}]}
+    for i in range(7):
+        append_event(
+            str(tmp_path),
+            {"hook_event_name": "PreToolUse", "tool_name": "Grep", "i": i},
+            config,
+        )
+    logged = _read_lines(tmp_path / "events.jsonl")
+    assert [(e["i"], e["_sample"]) for e in logged] == [(0, 3), (3, 3), (6, 3)]
+
+
+def test_rules_sample_with_invalid_every_is_skipped(tmp_path):
+    config = {
+        "rules": [
+            {"matcher": "Grep", "action": "sample", "every": "often"},
+            {"matcher": "Grep", "action": "sample", "every": [2]},
+            {"matcher": "Grep", "action": "sample", "every": float("inf")},
+            {"matcher": "Grep", "action": "sample", "every": "2"},
+        ]
+    }
+    for i in range(4):
+        append_event(
+            str(tmp_path),
+            {"hook_event_name": "PreToolUse", "tool_name": "Grep", "i": i},
+            config,
+        )
+    logged = _read_lines(tmp_path / "events.jsonl")
+    assert [(e["i"], e["_sample"]) for e in logged] == [(0, 2), (2, 2)]
+
+
+def test_rules_strip_fields(tmp_path):
+    config = {
+        "rules": [
+            {
+                "event": "PostToolUse",
+                "action": "strip",
+                "fields": ["tool_response", "tool_input.content"],
+            }
+        ]
+    }
+    event = {
+        "hook_event_name": "PostToolUse",
+        "tool_input": {"file_path": "a.py", "content": "..."},
+        "tool_response": "...",
+    }
+    append_event(str(tmp_path), event, config)
+    (logged,) = _read_lines(tmp_path / "events.jsonl")
+    assert logged["tool_input"] == {"file_path": "a.py"}
+    assert "tool_response" not in logged
+    assert logged["_stripped"] == ["tool_response", "tool_input.content"]
+    # The caller's event is left alone
+    assert event["tool_response"] == "..."
+
+
+def test_rules_counters_survive_state_recovery(tmp_path):
+    config = {"rules": [{"event": "A", "action": "drop"}]}
+    append_event(str(tmp_path), {"hook_event_name": "A"}, config)
+    append_event(str(tmp_path), {"hook_event_name": "B"}, config)
+    with open(tmp_path / "events.jsonl", "a") as f:
+        f.write(json.dumps({"hook_event_name": "C", "_seq": 2}) + "\n")
+    append_event(str(tmp_path), {"hook_event_name": "A"}, config)
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["dropped"] == {"A": {"": 2}}
@@ -1,12 +1,15 @@
 import json
 
+import pytest
 
 from cc_obs.commands.install import (
     AgentChoice,
     HookWrapChoice,
     InstallConfig,
     execute_install,
+    profile_matchers,
     run,
+    tool_call_cost,
 )
 
 
@@ -56,7 +59,24 @@ def test_install_preserves_existing(project_dir):
         for h in entry.get("hooks", [])
     ]
     assert "cc-obs wrap -- my-tool" in commands
-    assert any("cc-obs log" in c for c in commands)
+    assert any("cc-obs-log" in c for c in commands)
+
+
+def test_reinstall_replaces_legacy_session_start_clear(project_dir):
+    settings = project_dir / ".claude" / "settings.local.json"
+    legacy = {"type": "command", "command": "cc-obs clear --quiet && cc-obs log"}
+    existing = {"hooks": {"SessionStart": [{"matcher": "startup", "hooks": [legacy]}]}}
+    settings.write_text(json.dumps(existing))
+
+    execute_install(project_dir, InstallConfig())
+
+    data = json.loads(settings.read_text())
+    commands = [
+        h["command"]
+        for entry in data["hooks"]["SessionStart"]
+        for h in entry.get("hooks", [])
+    ]
+    assert commands == ["cc-obs-log"]
 
 
 def test_install_idempotent(project_dir):
@@ -93,7 +113,7 @@ def test_reinstall_preserves_wrapped_hooks(project_dir):
         for h in entry.get("hooks", [])
     ]
     assert "cc-obs wrap -- my-tool" in commands
-    assert any("cc-obs log" in c for c in commands)
+    assert any("cc-obs-log" in c for c in commands)
 
 
 def test_uninstall_removes_hooks(project_dir):
@@ -149,7 +169,7 @@ def test_install_cc_obs_hooks_come_first(project_dir):
     data = json.loads(settings.read_text())
     entries = data["hooks"]["PostToolUse"]
     first_commands = [h["command"] for h in entries[0].get("hooks", [])]
-    assert any("cc-obs log" in c for c in first_commands)
+    assert any("cc-obs-log" in c for c in first_commands)
 
 
 def test_install_wraps_existing_hooks(project_dir):
@@ -312,7 +332,7 @@ def test_execute_default_config_matches_current_behavior(project_dir):
         for h in entry.get("hooks", [])
     ]
     assert "cc-obs wrap -- my-tool" in commands
-    assert any("cc-obs log" in c for c in commands)
+    assert any("cc-obs-log" in c for c in commands)
 
 
 def test_execute_install_no_settings_file(project_dir):
@@ -399,3 +419,65 @@ def test_uninstall_unwraps_named_hooks(project_dir):
     ]
     assert "my-tool check" in commands
     assert not any("cc-obs" in c for c in commands)
+
+
+def _observer_matchers(settings):
+    data = json.loads(settings.read_text())
+    return {
+        event: entry["matcher"]
+        for event, entries in data.get("hooks", {}).items()
+        for entry in entries
+        if any(h["command"] == "cc-obs-log" for h in entry["hooks"])
+    }
+
+
+def test_install_tools_profile(project_dir, capsys):
+    execute_install(project_dir, InstallConfig(profile="tools:Bash,Task"))
+    matchers = _observer_matchers(project_dir / ".claude" / "settings.local.json")
+    assert matchers["PreToolUse"] == "Bash|Task"
+    assert matchers["PostToolUse"] == "Bash|Task"
+    assert matchers["SessionStart"] == ""
+    assert "Notification" not in matchers
+    assert "2 per Bash, Task call, 0 for other tools" in capsys.readouterr().out
+
+
+def test_install_smaller_profile_removes_observer_hooks(project_dir):
+    settings = project_dir / ".claude" / "settings.local.json"
+    settings.write_text(
+        json.dumps(
+            {
+                "hooks": {
+                    "PreToolUse": [
+                        {
+                            "matcher": "Bash",
+                            "hooks": [{"type": "command", "command": "guard.sh"}],
+                        }
+                    ]
+                }
+            }
+        )
+    )
+    execute_install(project_dir, InstallConfig())
+    execute_install(project_dir, InstallConfig(profile="minimal"))
+
+    matchers = _observer_matchers(settings)
+    assert "PreToolUse" not in matchers
+    assert "PostToolUse" not in matchers
+    assert "SubagentStop" in matchers
+    # The user's own hook survives (wrapped for timing)
+    data = json.loads(settings.read_text())
+    assert data["hooks"]["PreToolUse"][0]["hooks"][0]["command"] == (
+        "cc-obs wrap -- guard.sh"
+    )
+
+
+def test_profile_cost_estimates():
+    assert tool_call_cost(profile_matchers("full")) == "2 per tool call"
+    assert tool_call_cost(profile_matchers("minimal")) == "0 per tool call"
+    assert profile_matchers("agents-only")["PreToolUse"] == "Task"
+
+
+def test_install_unknown_profile(project_dir):
+    with pytest.raises(SystemExit) as exc:
+        run(no_prompt=True, profile="bogus")
+    assert exc.value.code == 1
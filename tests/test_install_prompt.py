@@ -27,6 +27,8 @@ hooks:
 
 def test_gather_choices_project_selection(project_dir):
     def fake_select(message, **kwargs):
+        if "observe" in message:
+            return FakeQuestion("full")
         return FakeQuestion("project")
 
     def fake_confirm(message, **kwargs):
@@ -68,6 +70,8 @@ def test_gather_choices_existing_hooks(project_dir):
     text_answers = iter([FakeQuestion("My Tool")])
 
     def fake_select(message, **kwargs):
+        if "observe" in message:
+            return FakeQuestion("full")
         return FakeQuestion("local")
 
     def fake_confirm(message, **kwargs):
@@ -112,6 +116,8 @@ def test_gather_choices_with_agents(project_dir):
     text_answers = iter([FakeQuestion("Agent Hook")])
 
     def fake_select(message, **kwargs):
+        if "observe" in message:
+            return FakeQuestion("full")
         return FakeQuestion("local")
 
     def fake_confirm(message, **kwargs):
@@ -152,3 +158,49 @@ def test_discover_agents_skips_malformed_frontmatter(project_dir):
     assert valid in agents
     assert no_close not in agents
     assert bad_yaml not in agents
+
+
+def test_gather_choices_tools_profile(project_dir):
+    def fake_select(message, **kwargs):
+        if "observe" in message:
+            return FakeQuestion("tools:")
+        return FakeQuestion("local")
+
+    def fake_text(message, **kwargs):
+        return FakeQuestion("Bash, Task")
+
+    with (
+        patch("cc_obs.commands.install_prompt.questionary.select", fake_select),
+        patch("cc_obs.commands.install_prompt.questionary.text", fake_text),
+        patch(
+            "cc_obs.commands.install_prompt.questionary.checkbox",
+            lambda message, **kwargs: FakeQuestion([]),
+        ),
+    ):
+        config = gather_choices(project_dir)
+
+    assert config.profile == "tools:Bash, Task"
+
+
+def test_gather_choices_tools_profile_reprompts_without_tools(project_dir):
+    def fake_select(message, **kwargs):
+        if "observe" in message:
+            return FakeQuestion("tools:")
+        return FakeQuestion("local")
+
+    answers = iter(["", ",", " , ", "Bash"])
+
+    with (
+        patch("cc_obs.commands.install_prompt.questionary.select", fake_select),
+        patch(
+            "cc_obs.commands.install_prompt.questionary.text",
+            lambda message, **kwargs: FakeQuestion(next(answers)),
+        ),
+        patch(
+            "cc_obs.commands.install_prompt.questionary.checkbox",
+            lambda message, **kwargs: FakeQuestion([]),
+        ),
+    ):
+        config = gather_choices(project_dir)
+
+    assert config.profile == "tools:Bash"
@@ -0,0 +1,295 @@
+import json
+import time
+
+from cc_obs import reader
+from cc_obs.eventlog import (
+    append_event,
+    append_side_records,
+    open_session,
+    read_manifest,
+)
+from cc_obs.reader import (
+    ReadStats,
+    blob_usage,
+    elapsed_ns,
+    event_time_ns,
+    inline_blobs,
+    iter_events,
+    list_sessions,
+    log_files,
+    log_size,
+    lookup_tool_use,
+    open_tool_uses,
+    read_events,
+    read_log,
+    read_tool_index,
+    resolve_log_dir,
+)
+
+
+def test_read_events_skips_blank_lines(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"_seq":1}\n\n{"_seq":2}\n')
+    assert [e["_seq"] for e in read_events(path)] == [1, 2]
+
+
+def test_read_events_skips_corrupt_and_torn_lines(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"_seq":1}\n{"_seq":2, "trunc\n[3]\n{"_seq":4}\n{"_seq":5, "to')
+    stats = ReadStats()
+    assert [e["_seq"] for e in read_events(path, stats)] == [1, 4]
+    assert (stats.corrupt, stats.torn) == (2, 1)
+
+
+def test_iter_events_projects_fields_with_offsets(tmp_path):
+    for i in range(3):
+        append_event(str(tmp_path), {"hook_event_name": "A", "payload": "x" * i})
+    path = tmp_path / "events.jsonl"
+    events = list(iter_events([path], fields=["_seq"], offsets=True, min_seq=2))
+    assert [(e["_seq"], e["_file"]) for e in events] == [(2, path.name), (3, path.name)]
+    assert all(set(e) == {"_seq", "_file", "_off"} for e in events)
+    with open(path, "rb") as f:
+        for e in events:
+            f.seek(e["_off"])
+            assert json.loads(f.readline())["_seq"] == e["_seq"]
+
+
+def test_read_events_applies_attribution(tmp_path):
+    path = tmp_path / "events.jsonl"
+    records = [
+        {"hook_event_name": "PreToolUse", "tool_use_id": "t1", "_seq": 1},
+        {"hook_event_name": "PreToolUse", "tool_use_id": "t2", "_seq": 2},
+        {"_attr": "agent-1", "_agent_type": "Explore", "tool_use_ids": ["t1"]},
+        {"hook_event_name": "PostToolUse", "tool_use_id": "t1", "_seq": 3},
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+
+    events = read_events(path)
+    assert [e["_seq"] for e in events] == [1, 2, 3]
+    assert events[0]["_agent_id"] == "agent-1"
+    assert events[0]["_agent_type"] == "Explore"
+    assert "_agent_id" not in events[1]
+    # Attribution also covers events logged after the side record
+    assert events[2]["_agent_id"] == "agent-1"
+
+
+def test_lookup_and_open_tool_uses(tmp_path):
+    log_dir = str(tmp_path)
+    append_event(log_dir, {"hook_event_name": "PreToolUse", "tool_use_id": "t1"})
+    append_event(log_dir, {"hook_event_name": "PreToolUse", "tool_use_id": "t2"})
+    append_event(log_dir, {"hook_event_name": "PostToolUse", "tool_use_id": "t1"})
+
+    events = lookup_tool_use(tmp_path, "t1")
+    assert [e["hook_event_name"] for e in events] == ["PreToolUse", "PostToolUse"]
+    assert lookup_tool_use(tmp_path, "missing") == []
+    assert open_tool_uses(read_tool_index(tmp_path)) == ["t2"]
+
+
+def test_lookup_tool_use_ignores_stale_index(tmp_path):
+    append_event(str(tmp_path), {"hook_event_name": "PreToolUse", "tool_use_id": "t1"})
+    (tmp_path / "events.jsonl").write_text('{"hook_event_name":"Other"}\n')
+    assert lookup_tool_use(tmp_path, "t1") == []
+
+
+def _segmented_log(log_dir, n=12):
+    config = {"segment_bytes": 150}
+    for i in range(1, n + 1):
+        event = {"hook_event_name": "PreToolUse", "tool_use_id": f"t{i}"}
+        append_event(str(log_dir), event, config)
+    return read_manifest(str(log_dir))["segments"]
+
+
+def test_read_log_spans_segments(tmp_path):
+    segments = _segmented_log(tmp_path)
+    assert len(segments) >= 2
+    assert [e["_seq"] for e in read_log(tmp_path)] == list(range(1, 13))
+    assert log_size(tmp_path) == sum(p.stat().st_size for p in log_files(tmp_path))
+
+
+def test_read_log_skips_segments_outside_range(tmp_path):
+    segments = _segmented_log(tmp_path)
+    last = segments[-1]
+    files = log_files(tmp_path, min_seq=last["seq"][0])
+    assert files[0].name == last["file"]
+    assert not {s["file"] for s in segments[:-1]} & {f.name for f in files}
+
+    events = read_log(tmp_path, min_seq=3, max_seq=5)
+    assert [e["_seq"] for e in events] == [3, 4, 5]
+
+
+def test_read_log_range_folds_in_later_side_records(tmp_path):
+    config = {"segment_bytes": 150}
+    for i in range(12):
+        if i == 6:
+            attr = {
+                "_attr": "agent-1",
+                "_agent_type": "Explore",
+                "tool_use_ids": ["t0"],
+            }
+            append_side_records(str(tmp_path), [attr], config)
+        append_event(
+            str(tmp_path), {"hook_event_name": "A", "tool_use_id": f"t{i}"}, config
+        )
+    segments = read_manifest(str(tmp_path))["segments"]
+    (side,) = [s for s in segments if s["side"]]
+    assert side["seq"][0] > 1
+
+    (event,) = read_log(tmp_path, max_seq=1)
+    assert event["_agent_id"] == "agent-1"
+    # Later segments without side records are still skipped
+    files = {f.name for f in log_files(tmp_path, max_seq=1)}
+    assert files == {segments[0]["file"], side["file"], "events.jsonl"}
+
+
+def test_read_log_filters_by_time(tmp_path):
+    base = 1_735_689_600_000_000_000
+    config = {"segment_bytes": 150, "compress": "none"}
+    for i in range(12):
+        ns = base + i * 1_000_000_000
+        event = {"hook_event_name": "A", "_ts": f"2025-01-01T00:00:{i:02d}+00:00"}
+        append_event(str(tmp_path), {**event, "_ts_ns": ns}, config)
+    since, until = base + 8_000_000_000, base + 10_000_000_000
+
+    events = read_log(tmp_path, since_ns=since, until_ns=until)
+    assert [e["_seq"] for e in events] == [9, 10, 11]
+    # Segments that end before the window are not opened
+    files = log_files(tmp_path, since_ns=since)
+    segments = read_manifest(str(tmp_path))["segments"]
+    assert segments[0]["file"] not in {f.name for f in files}
+
+
+def test_lookup_tool_use_in_closed_segment(tmp_path):
+    _segmented_log(tmp_path)
+    events = lookup_tool_use(tmp_path, "t1")
+    assert [e["_seq"] for e in events] == [1]
+
+
+def _log(obs_dir, session_id, n=1):
+    event = {"hook_event_name": "A", "session_id": session_id, "_ts": "t"}
+    log_dir = open_session(str(obs_dir), event)
+    for _ in range(n):
+        append_event(log_dir, dict(event))
+    time.sleep(0.02)
+
+
+def test_list_sessions_orders_by_activity(tmp_path):
+    _log(tmp_path, "aaa-1", n=2)
+    _log(tmp_path, "bbb-2")
+    sessions = list_sessions(tmp_path)
+    assert [(s["session_id"], s["events"]) for s in sessions] == [
+        ("aaa-1", 2),
+        ("bbb-2", 1),
+    ]
+    assert sessions[0]["started"] == "t"
+
+
+def test_resolve_log_dir(tmp_path):
+    assert resolve_log_dir(tmp_path) == tmp_path
+    _log(tmp_path, "aaa-1")
+    _log(tmp_path, "aab-2")
+    sessions = tmp_path / "sessions"
+    assert resolve_log_dir(tmp_path) == sessions / "aab-2"
+    assert resolve_log_dir(tmp_path, "aaa") == sessions / "aaa-1"
+    # Ambiguous prefix and unknown ids don't resolve
+    assert resolve_log_dir(tmp_path, "aa") is None
+    assert resolve_log_dir(tmp_path, "zzz") is None
+
+
+def test_inline_blobs(tmp_path):
+    event = {"hook_event_name": "PostToolUse", "_wrap": {"stdout": "out" * 5000}}
+    append_event(str(tmp_path), dict(event))
+    (stored,) = read_log(tmp_path)
+    assert "_blob" in stored["_wrap"]["stdout"]
+    assert blob_usage(tmp_path)[0] == 1
+    assert inline_blobs(tmp_path, stored)["_wrap"]["stdout"] == "out" * 5000
+
+
+def test_read_log_hydrates_compact_events(tmp_path):
+    config = {"compact": True}
+    base = {"session_id": "s1", "cwd": "/p", "permission_mode": "default"}
+    events = [
+        {**base, "hook_event_name": "PreToolUse", "tool_use_id": "t1"},
+        {"session_id": "s1", "cwd": "/p", "hook_event_name": "Notification"},
+        {**base, "hook_event_name": "PostToolUse", "tool_use_id": "t1"},
+    ]
+    for ev in events:
+        append_event(str(tmp_path), dict(ev), config)
+
+    assert [
+        {k: v for k, v in e.items() if k != "_seq"} for e in read_log(tmp_path)
+    ] == events
+    # Index lookups seek to the header as well as the event
+    looked_up = lookup_tool_use(tmp_path, "t1")
+    assert [e["permission_mode"] for e in looked_up] == ["default", "default"]
+    assert all(e["cwd"] == "/p" for e in looked_up)
+
+
+def test_parallel_read_matches_serial(tmp_path, monkeypatch):
+    # Tiny chunks so every segment splits, with compact headers carrying over
+    # chunk boundaries and a gzipped segment parsed whole
+    config = {"compact": True, "segment_bytes": 1024}
+    for i in range(60):
+        event = {"session_id": "s1", "cwd": "/p", "hook_event_name": "PreToolUse"}
+        append_event(str(tmp_path), {**event, "tool_use_id": f"t{i}"}, config)
+    with open(tmp_path / "events.jsonl", "a") as f:
+        f.write('{"_seq": 99, "trunc\n{"_seq"')
+    assert any(p.suffix == ".gz" for p in log_files(tmp_path))
+    monkeypatch.setattr(reader, "PARALLEL_CHUNK_BYTES", 256)
+
+    serial_stats, parallel_stats = ReadStats(), ReadStats()
+    serial = read_log(tmp_path, stats=serial_stats, workers=1)
+    parallel = read_log(tmp_path, stats=parallel_stats, workers=2)
+    assert parallel == serial
+    assert [e["tool_use_id"] for e in parallel] == [f"t{i}" for i in range(60)]
+    assert all(e["cwd"] == "/p" for e in parallel)
+    assert parallel_stats == serial_stats == ReadStats(corrupt=1, torn=1)
+
+
+def test_small_logs_stay_single_process(tmp_path):
+    append_event(str(tmp_path), {"hook_event_name": "A"})
+    assert reader._pool_size(log_files(tmp_path)) == 1
+
+
+def test_pool_size_uses_uncompressed_segment_size(tmp_path, monkeypatch):
+    config = {"segment_bytes": 4096}
+    for i in range(20):
+        append_event(str(tmp_path), {"hook_event_name": "A", "pad": "x" * 1000}, config)
+    paths = log_files(tmp_path)
+    on_disk = sum(p.stat().st_size for p in paths)
+    monkeypatch.setattr(reader.os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(reader, "PARALLEL_MIN_BYTES", on_disk * 2)
+    monkeypatch.setattr(reader, "PARALLEL_CHUNK_BYTES", 1024)
+    assert any(p.suffix == ".gz" for p in paths)
+    assert reader._pool_size(paths) == 4
+
+
+def test_elapsed_prefers_monotonic_stamps():
+    start = {"_ts": "2025-01-01T00:00:00+00:00", "_ts_ns": 1_000_000_000_000}
+    end = {"_ts": "2025-01-01T00:00:01+00:00", "_ts_ns": 1_000_250_000_000}
+    assert elapsed_ns(start, end) == 250_000_000
+    # Wall clock stepped by NTP: the monotonic delta wins
+    start["_mono_ns"], end["_mono_ns"] = 5_000_000, 205_000_000
+    assert elapsed_ns(start, end) == 200_000_000
+    # Monotonic clock restarted (reboot): fall back to the wall clock
+    end["_mono_ns"] = 1_000
+    assert elapsed_ns(start, end) == 250_000_000
+
+
+def test_event_time_falls_back_to_iso():
+    assert event_time_ns({"_ts": "1970-01-01T00:00:01.5+00:00"}) == 1_500_000_000
+    assert event_time_ns({}) is None
+    assert event_time_ns({"_ts": "yesterday"}) is None
+    assert event_time_ns({"_ts": 1700000000}) is None
+
+
+def test_read_log_time_range_skips_corrupt_ts(tmp_path):
+    lines = [
+        {"_seq": 1, "_ts": "1970-01-01T00:00:01+00:00"},
+        {"_seq": 2, "_ts": "not a time"},
+        {"_seq": 3, "_ts": ["1970"]},
+        {"_seq": 4, "_ts": "1970-01-01T00:00:03+00:00"},
+    ]
+    (tmp_path / "events.jsonl").write_text("".join(json.dumps(e) + "\n" for e in lines))
+    events = read_log(tmp_path, since_ns=0, until_ns=5_000_000_000)
+    assert [e["_seq"] for e in events] == [1, 4]
+    assert elapsed_ns(lines[0], lines[1]) is None
@@ -0,0 +1,200 @@
+import fcntl
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+from cc_obs import segments
+from cc_obs.eventlog import append_event, open_session, read_manifest, write_manifest
+from cc_obs.reader import inline_blobs, lookup_tool_use, read_log, read_tool_index
+from cc_obs.segments import enforce_retention
+
+
+def _ts(days_ago: float) -> str:
+    return time.strftime(
+        "%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(time.time() - days_ago * 86400)
+    )
+
+
+def test_closed_segments_are_gzipped(tmp_path):
+    config = {"segment_bytes": 150}
+    for i in range(8):
+        append_event(
+            str(tmp_path), {"hook_event_name": "A", "tool_use_id": f"t{i}"}, config
+        )
+
+    segments = read_manifest(str(tmp_path))["segments"]
+    assert segments
+    for seg in segments:
+        assert seg["file"].endswith(".jsonl.gz")
+        assert "pending" not in seg
+        path = tmp_path / "segments" / seg["file"]
+        assert path.stat().st_size == seg["stored_bytes"]
+        assert len(gzip.decompress(path.read_bytes())) == seg["bytes"]
+    assert not list((tmp_path / "segments").glob("events-*.jsonl"))
+
+    assert [e["_seq"] for e in read_log(tmp_path)] == list(range(1, 9))
+    assert [e["_seq"] for e in lookup_tool_use(tmp_path, "t0")] == [1]
+
+
+def test_zstd_segments_lookup(tmp_path):
+    pytest.importorskip("zstandard")
+    config = {"compact": True, "segment_bytes": 150, "compress": "zstd"}
+    for i in range(8):
+        event = {"session_id": "s1", "hook_event_name": "A", "tool_use_id": f"t{i}"}
+        append_event(str(tmp_path), event, config)
+
+    segments = read_manifest(str(tmp_path))["segments"]
+    assert segments and all(s["file"].endswith(".jsonl.zst") for s in segments)
+    assert [e["_seq"] for e in read_log(tmp_path)] == list(range(1, 9))
+    for i in (0, 3):
+        (event,) = lookup_tool_use(tmp_path, f"t{i}")
+        assert (event["_seq"], event["session_id"]) == (i + 1, "s1")
+
+
+def test_segments_are_compressed_outside_the_session_lock(tmp_path, monkeypatch):
+    locked = []
+    compress = segments.compress_segment
+
+    def probe(path, codec):
+        fd = os.open(tmp_path / "state.json", os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            locked.append(False)
+        except BlockingIOError:
+            locked.append(True)
+        finally:
+            os.close(fd)
+        return compress(path, codec)
+
+    monkeypatch.setattr(segments, "compress_segment", probe)
+    append_event(
+        str(tmp_path), {"hook_event_name": "A", "pad": "x" * 50}, {"segment_bytes": 50}
+    )
+
+    assert locked == [False]
+    (seg,) = read_manifest(str(tmp_path))["segments"]
+    assert seg["file"].endswith(".gz") and seg["blobs"] == []
+    assert "pending" not in seg
+
+
+def test_unknown_zstd_falls_back_to_gzip(tmp_path, monkeypatch):
+    monkeypatch.setattr("cc_obs.segments._zstd", lambda: None)
+    config = {"segment_bytes": 50, "compress": "zstd"}
+    append_event(str(tmp_path), {"hook_event_name": "A", "pad": "x" * 50}, config)
+    assert read_manifest(str(tmp_path))["segments"][0]["file"].endswith(".gz")
+
+
+def test_retention_max_bytes_drops_oldest(tmp_path):
+    config = {
+        "segment_bytes": 200,
+        "compress": "none",
+        "retention": {"max_bytes": 600},
+    }
+    for i in range(20):
+        append_event(str(tmp_path), {"hook_event_name": "A", "pad": "x" * 100}, config)
+
+    segments = read_manifest(str(tmp_path))["segments"]
+    total = sum(s["bytes"] for s in segments)
+    active = tmp_path / "events.jsonl"
+    total += active.stat().st_size if active.exists() else 0
+    assert total <= 600
+    # Oldest segments go first; the newest ones survive
+    assert segments[-1]["seq"][1] >= 19
+    on_disk = sorted(p.name for p in (tmp_path / "segments").iterdir())
+    assert on_disk == sorted(s["file"] for s in segments)
+
+
+def test_retention_counts_and_frees_blobs(tmp_path):
+    config = {
+        "segment_bytes": 400,
+        "compress": "none",
+        "blob_threshold": 100,
+        "retention": {"max_bytes": 3000},
+    }
+    shared = "s" * 500
+    for i in range(12):
+        tool_input = {"content": str(i % 10) * 500, "shared": shared}
+        append_event(
+            str(tmp_path), {"hook_event_name": "A", "tool_input": tool_input}, config
+        )
+
+    segments = read_manifest(str(tmp_path))["segments"]
+    assert 0 < len(segments) < 12
+    blobs = {p.name: p.stat().st_size for p in (tmp_path / "blobs").glob("*/*")}
+    total = sum(s["bytes"] for s in segments) + sum(blobs.values())
+    active = tmp_path / "events.jsonl"
+    total += active.stat().st_size if active.exists() else 0
+    assert total <= 3000
+    # Exactly the blobs the surviving segments reference are left
+    assert set(blobs) == {d for s in segments for d in s["blobs"]}
+    for event in read_log(tmp_path):
+        content = inline_blobs(tmp_path, event["tool_input"])
+        assert content["shared"] == shared
+
+
+def test_tool_index_rotates_and_is_dropped_with_segments(tmp_path):
+    config = {
+        "segment_bytes": 200,
+        "compress": "none",
+        "retention": {"max_bytes": 600},
+    }
+    for i in range(20):
+        event = {"hook_event_name": "A", "tool_use_id": f"t{i}", "pad": "x" * 100}
+        append_event(str(tmp_path), event, config)
+
+    segments = read_manifest(str(tmp_path))["segments"]
+    kept = {s["n"] for s in segments}
+    indexes = {p.name for p in (tmp_path / "segments").glob("tool_index-*.jsonl")}
+    assert indexes == {f"tool_index-{n:06d}.jsonl" for n in kept}
+    index = read_tool_index(tmp_path)
+    assert "t0" not in index and "t19" in index
+    assert {e["seg"] for entries in index.values() for e in entries} >= kept
+    assert [e["_seq"] for e in lookup_tool_use(tmp_path, "t18")] == [19]
+
+
+def test_retention_max_age_days(tmp_path):
+    manifest = {
+        "segments": [
+            {"n": 1, "file": "a", "seq": [1, 2], "ts": [_ts(10), _ts(9)], "bytes": 1},
+            {"n": 2, "file": "b", "seq": [3, 4], "ts": [_ts(1), _ts(0)], "bytes": 1},
+        ]
+    }
+    (tmp_path / "segments").mkdir()
+    for name in ("a", "b"):
+        (tmp_path / "segments" / name).write_text("")
+
+    write_manifest(str(tmp_path), manifest)
+    enforce_retention(str(tmp_path), {"max_age_days": 7})
+
+    assert [s["n"] for s in read_manifest(str(tmp_path))["segments"]] == [2]
+    assert not (tmp_path / "segments" / "a").exists()
+
+
+def test_prune_sessions_max_sessions(tmp_path):
+    config = {"retention": {"max_sessions": 2}}
+    for sid in ["s1", "s2", "s3"]:
+        event = {"hook_event_name": "A", "session_id": sid}
+        append_event(open_session(str(tmp_path), event, config), event, config)
+        time.sleep(0.02)
+
+    sessions = tmp_path / "sessions"
+    assert sorted(p.name for p in sessions.iterdir() if p.is_dir()) == ["s2", "s3"]
+    index = [json.loads(line) for line in (sessions / "index.jsonl").open()]
+    assert [e["session_id"] for e in index] == ["s2", "s3"]
+
+
+def test_prune_sessions_max_age(tmp_path):
+    old = {"hook_event_name": "A", "session_id": "old"}
+    append_event(open_session(str(tmp_path), old), old)
+    stale = time.time() - 3 * 86400
+    os.utime(tmp_path / "sessions" / "old" / "state.json", (stale, stale))
+
+    config = {"retention": {"max_age_days": 1}}
+    new = {"hook_event_name": "A", "session_id": "new"}
+    open_session(str(tmp_path), new, config)
+
+    assert not (tmp_path / "sessions" / "old").exists()
+    assert (tmp_path / "sessions" / "new").is_dir()
@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+from cc_obs.commands.log import run as log_run
+from cc_obs.commands.sessions import run
+from cc_obs.commands.status import run as status_run
+
+
+def _log(feed_stdin, project_dir, session_id, **fields):
+    event = {"session_id": session_id, "cwd": str(project_dir), **fields}
+    feed_stdin(json.dumps(event).encode())
+    log_run()
+    # Keep state.json mtimes (last activity) distinct on coarse-clock filesystems
+    time.sleep(0.02)
+
+
+def test_sessions_lists_each_session(project_dir, feed_stdin, capsys):
+    _log(feed_stdin, project_dir, "s-one", hook_event_name="SessionStart", model="m1")
+    _log(feed_stdin, project_dir, "s-two", hook_event_name="SessionStart", model="m2")
+    _log(feed_stdin, project_dir, "s-one", hook_event_name="Stop")
+
+    run()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    # Most recently active last
+    assert lines[0].startswith("s-two") and "m2" in lines[0]
+    assert lines[1].startswith("s-one") and "2 events" in lines[1]
+
+
+def test_sessions_none_logged(project_dir, capsys):
+    run()
+    assert "No sessions logged yet" in capsys.readouterr().out
+
+
+def test_status_selects_session(project_dir, feed_stdin, capsys):
+    _log(feed_stdin, project_dir, "s-one", hook_event_name="SessionStart")
+    _log(feed_stdin, project_dir, "s-two", hook_event_name="SessionStart")
+
+    status_run()
+    assert "Session: s-two" in capsys.readouterr().out
+    status_run(session="s-o")
+    assert "Session: s-one" in capsys.readouterr().out
+    with pytest.raises(SystemExit) as exc:
+        status_run(session="missing")
+    assert exc.value.code == 1
+
+
+def test_log_without_session_id(project_dir, feed_stdin):
+    feed_stdin(json.dumps({"hook_event_name": "A", "cwd": str(project_dir)}).encode())
+    log_run()
+    assert (
+        project_dir / ".claude" / "cc-obs" / "sessions" / "_nosession" / "events.jsonl"
+    ).exists()
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from cc_obs.commands.show import run
+from cc_obs.eventlog import append_event
+
+
+def test_show_prints_tool_call_events(project_dir, capsys):
+    log_dir = str(project_dir / ".claude" / "cc-obs")
+    append_event(log_dir, {"hook_event_name": "PreToolUse", "tool_use_id": "t1"})
+    append_event(log_dir, {"hook_event_name": "PreToolUse", "tool_use_id": "t2"})
+    append_event(log_dir, {"hook_event_name": "PostToolUse", "tool_use_id": "t1"})
+
+    run("t1")
+    out = capsys.readouterr().out
+    assert out.count('"tool_use_id": "t1"') == 2
+    assert "t2" not in out
+    assert "PostToolUse" in out
+
+
+def test_show_unknown_tool_use(project_dir):
+    with pytest.raises(SystemExit) as exc:
+        run("missing")
+    assert exc.value.code == 1
+
+
+def test_show_no_project_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit) as exc:
+        run("t1")
+    assert exc.value.code == 1
+
+
+def test_show_inlines_blobs(project_dir, capsys):
+    log_dir = str(project_dir / ".claude" / "cc-obs")
+    content = "print('hi')\n" * 2000
+    append_event(
+        log_dir,
+        {
+            "hook_event_name": "PreToolUse",
+            "tool_use_id": "t1",
+            "tool_input": {"content": content},
+        },
+    )
+
+    run("t1")
+    out = capsys.readouterr().out
+    assert json.loads(out)["tool_input"]["content"] == content
@@ -0,0 +1,30 @@
+import json
+
+from cc_obs.commands.span import run
+
+
+def test_span_start_and_end(session_dir, monkeypatch, capsys):
+    monkeypatch.setenv("CC_OBS_TRACE_ID", "trace-1")
+    monkeypatch.setenv("CC_OBS_SPAN_ID", "hook-1")
+    monkeypatch.setenv("CC_OBS_LOG_DIR", str(session_dir))
+    run("start", "tests")
+    span_id = capsys.readouterr().out.strip()
+    run("end", span_id, error=True)
+
+    lines = (session_dir / "events.jsonl").read_text().splitlines()
+    start, end = (json.loads(line)["_span"] for line in lines)
+    assert start == {
+        "phase": "start",
+        "id": span_id,
+        "trace": "trace-1",
+        "parent": "hook-1",
+        "name": "tests",
+    }
+    assert end == {"phase": "end", "id": span_id, "trace": "trace-1", "error": True}
+
+
+def test_span_outside_wrap_prints_nothing(monkeypatch, capsys):
+    monkeypatch.delenv("CC_OBS_LOG_DIR", raising=False)
+    run("start", "tests")
+    assert capsys.readouterr().out == "\n"
+    run("end", "")
@@ -1,6 +1,7 @@
 import pytest
 
 from cc_obs.commands.status import run
+from cc_obs.eventlog import append_event
 
 
 def test_status_prints_summary(project_dir, write_events, capsys):
@@ -83,6 +84,145 @@ def test_status_with_wrap_events(project_dir, write_events, capsys):
     assert "Wrapped hooks" in out
 
 
+def test_status_summarizes_wrapped_hooks(project_dir, write_events, capsys):
+    usage = {
+        "user_ms": 30.0,
+        "sys_ms": 10.0,
+        "max_rss_kb": 20480,
+        "in_blocks": 4,
+        "out_blocks": 6,
+        "vol_ctx_switches": 3,
+        "invol_ctx_switches": 1,
+    }
+    write_events(
+        [
+            {
+                "hook_event_name": "PostToolUse",
+                "_ts": f"2025-01-01T00:00:0{i}Z",
+                "_seq": i + 1,
+                "_wrap": {
+                    "command": "lint.sh",
+                    "name": "lint",
+                    "exit_code": 0,
+                    "duration_ms": duration,
+                    "spawn_ms": 2.0,
+                    "first_output_ms": 20.0,
+                    "rusage": usage,
+                },
+            }
+            for i, duration in enumerate([50.0, 70.0])
+        ]
+    )
+    run()
+    out = capsys.readouterr().out
+    assert (
+        "  lint: 2 runs, avg 60ms, spawn 2.0ms, first output 20ms, cpu 40ms, "
+        "max RSS 20.0 MB, 10 blocks I/O"
+    ) in out
+
+
+def test_status_reports_cache_savings(project_dir, write_events, capsys):
+    write_events(
+        [
+            {
+                "hook_event_name": "PostToolUse",
+                "_ts": f"2025-01-01T00:00:0{i}Z",
+                "_seq": i + 1,
+                "_wrap": {
+                    "command": "policy.sh",
+                    "exit_code": 0,
+                    "duration_ms": duration,
+                    **cache,
+                },
+            }
+            for i, (duration, cache) in enumerate(
+                [
+                    (100.0, {"cache": "miss"}),
+                    (2.0, {"cache": "hit", "saved_ms": 98.0}),
+                    (3.0, {"cache": "hit", "saved_ms": 97.0}),
+                ]
+            )
+        ]
+    )
+    run()
+    assert "  policy.sh: 3 runs, avg 35ms, 2 cache hits (saved 195ms)" in (
+        capsys.readouterr().out
+    )
+
+
+def test_status_splits_warm_and_cold_runs(project_dir, write_events, capsys):
+    write_events(
+        [
+            {
+                "hook_event_name": "PostToolUse",
+                "_ts": f"2025-01-01T00:00:0{i}Z",
+                "_seq": i + 1,
+                "_wrap": {
+                    "command": "python check.py",
+                    "exit_code": 0,
+                    "duration_ms": duration,
+                    "warm": warm,
+                },
+            }
+            for i, (duration, warm) in enumerate(
+                [(90.0, False), (10.0, True), (14.0, True)]
+            )
+        ]
+    )
+    run()
+    assert "warm avg 12ms (2), cold avg 90ms (1)" in capsys.readouterr().out
+
+
+def test_status_lists_hooks_over_budget(project_dir, write_events, capsys):
+    runs = [
+        ("lint", {"budget_ms": 100, "over_budget": True}),
+        ("lint", {"budget_ms": 100, "over_budget": False}),
+        ("fmt", {"budget_ms": 50, "over_budget": True}),
+        ("fmt", {"budget_ms": 50, "over_budget": True}),
+        ("fmt", {"timeout_ms": 1000, "timed_out": True}),
+        ("test", {"budget_ms": 500, "over_budget": False}),
+    ]
+    write_events(
+        [
+            {
+                "hook_event_name": "PostToolUse",
+                "_ts": f"2025-01-01T00:00:0{i}Z",
+                "_seq": i + 1,
+                "_wrap": {
+                    "command": f"{name}.sh",
+                    "name": name,
+                    "exit_code": 0,
+                    "duration_ms": 10.0,
+                    **limits,
+                },
+            }
+            for i, (name, limits) in enumerate(runs)
+        ]
+    )
+    run()
+    out = capsys.readouterr().out
+    section = out[out.index("Over budget:") :].splitlines()
+    assert section[1:3] == [
+        "  fmt: 2 of 2 runs over 50ms, 1 of 3 timed out",
+        "  lint: 1 of 2 runs over 100ms",
+    ]
+    assert "test:" not in out[out.index("Over budget:") :]
+
+
+def test_status_tolerates_partially_written_line(
+    project_dir, write_events, events_file, capsys
+):
+    write_events(
+        [{"session_id": "s1", "hook_event_name": "Stop", "_seq": 1}],
+    )
+    with open(events_file, "a") as f:
+        f.write('{"session_id": "s1", "hook_event_name": "Sto')
+    run()
+    out = capsys.readouterr().out
+    assert "Events:  1 " in out
+    assert "Skipped: 1 partially written line" in out
+
+
 def test_status_no_events(project_dir, capsys):
     run()
     assert "No events logged yet" in capsys.readouterr().out
@@ -93,3 +233,67 @@ def test_status_no_project_root(tmp_path, monkeypatch):
     with pytest.raises(SystemExit) as exc:
         run()
     assert exc.value.code == 1
+
+
+def test_status_reports_open_tool_calls(project_dir, capsys):
+    log_dir = str(project_dir / ".claude" / "cc-obs")
+    append_event(log_dir, {"hook_event_name": "PreToolUse", "tool_use_id": "t1"})
+    append_event(log_dir, {"hook_event_name": "PreToolUse", "tool_use_id": "t2"})
+    append_event(log_dir, {"hook_event_name": "PostToolUse", "tool_use_id": "t1"})
+    run()
+    assert "Open tool calls: 1" in capsys.readouterr().out
+
+
+def test_status_scales_sampled_and_dropped(project_dir, capsys):
+    log_dir = str(project_dir / ".claude" / "cc-obs")
+    config = {
+        "rules": [
+            {"matcher": "Read", "action": "drop"},
+            {"matcher": "Grep", "action": "sample", "every": 2},
+        ]
+    }
+    for tool in ["Read", "Read", "Grep", "Grep", "Grep", "Grep", "Bash"]:
+        append_event(
+            log_dir, {"hook_event_name": "PreToolUse", "tool_name": tool}, config
+        )
+    run()
+    out = capsys.readouterr().out
+    assert "Events:  3" in out
+    assert "Seen:    ~7 before ingestion rules" in out
+    assert "PreToolUse: 7" in out
+    assert "Read: 2" in out
+    assert "Grep: 4" in out
+
+
+def test_status_reports_observer_overhead(project_dir, write_events, capsys):
+    write_events(
+        [
+            {"hook_event_name": "PreToolUse", "_overhead_us": us}
+            for us in [10_000, 20_000, 30_000, 40_000]
+        ]
+        + [{"hook_event_name": "Stop", "_overhead_us": 5_000}]
+    )
+    run()
+    out = capsys.readouterr().out
+    assert "Observer overhead: 105ms total over 5 events" in out
+    assert "PreToolUse: 100ms (p50 20.0ms, p95 40.0ms, max 40.0ms)" in out
+
+
+def test_status_reads_compact_segments(project_dir, capsys):
+    log_dir = str(project_dir / ".claude" / "cc-obs")
+    config = {"compact": True, "segment_bytes": 150}
+    for tool in ["Read", "Bash", "Read"]:
+        event = {
+            "session_id": "sess-1",
+            "model": "claude-opus-4-6",
+            "hook_event_name": "PreToolUse",
+            "tool_name": tool,
+        }
+        append_event(log_dir, event, config)
+    assert list((project_dir / ".claude" / "cc-obs" / "segments").iterdir())
+    run()
+    out = capsys.readouterr().out
+    assert "Session: sess-1" in out
+    assert "Model:   claude-opus-4-6" in out
+    assert "Events:  3" in out
+    assert "Read: 2" in out
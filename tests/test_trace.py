@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from cc_obs import trace
+from cc_obs.eventlog import append_event
+from cc_obs.reader import read_log
+
+
+@pytest.fixture
+def traced(session_dir, monkeypatch):
+    monkeypatch.setenv(trace.TRACE_ID_ENV, "trace-1")
+    monkeypatch.setenv(trace.SPAN_ID_ENV, "hook-1")
+    monkeypatch.setenv(trace.LOG_DIR_ENV, str(session_dir))
+    return session_dir
+
+
+def _records(session_dir):
+    lines = (session_dir / "events.jsonl").read_text().splitlines()
+    return [json.loads(line)["_span"] for line in lines]
+
+
+def test_span_noop_outside_wrap(session_dir, monkeypatch):
+    monkeypatch.delenv(trace.LOG_DIR_ENV, raising=False)
+    with trace.span("lint") as span_id:
+        pass
+    assert span_id is None
+    assert trace.start_span("lint") is None
+    trace.end_span(None)
+    assert not session_dir.exists()
+
+
+def test_span_nests_and_restores_parent(traced):
+    with trace.span("checks", files=3) as outer:
+        with trace.span("lint") as inner:
+            assert trace.os.environ[trace.SPAN_ID_ENV] == inner
+        assert trace.os.environ[trace.SPAN_ID_ENV] == outer
+    assert trace.os.environ[trace.SPAN_ID_ENV] == "hook-1"
+
+    records = _records(traced)
+    assert [(r["phase"], r["id"]) for r in records] == [
+        ("start", outer),
+        ("start", inner),
+        ("end", inner),
+        ("end", outer),
+    ]
+    assert records[0]["parent"] == "hook-1"
+    assert records[0]["attrs"] == {"files": 3}
+    assert records[1]["parent"] == outer
+    assert {r["trace"] for r in records} == {"trace-1"}
+
+
+def test_span_marks_exception_as_error(traced):
+    with pytest.raises(RuntimeError), trace.span("tests"):
+        raise RuntimeError("boom")
+    assert _records(traced)[-1]["error"] is True
+
+
+def test_spans_attach_to_wrap_record(traced):
+    with trace.span("lint"):
+        pass
+    span_id = trace.start_span("git")
+    wrap = {"command": "stop.sh", "trace_id": "trace-1", "span_id": "hook-1"}
+    append_event(str(traced), {"hook_event_name": "Stop", "_wrap": wrap})
+
+    (event,) = read_log(traced)
+    spans = event["_wrap"]["spans"]
+    assert [(s["name"], s["parent"]) for s in spans] == [
+        ("lint", "hook-1"),
+        ("git", "hook-1"),
+    ]
+    assert spans[0]["end"]["_ts_ns"] >= spans[0]["_ts_ns"]
+    # Never ended: the hook exited or crashed first
+    assert spans[1]["id"] == span_id and spans[1]["end"] is None
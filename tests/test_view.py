@@ -157,3 +157,20 @@ def test_view_log_file_with_sample_fixture(monkeypatch):
     assert "sample-abc-123" in html
     assert "Grep" in html
     assert "SubagentStart" in html
+
+
+def test_view_seq_range(project_dir, write_events, monkeypatch):
+    write_events(
+        [
+            {"session_id": "s1", "hook_event_name": "SessionStart", "_seq": 1},
+            {"session_id": "s1", "hook_event_name": "Notification", "_seq": 2},
+            {"session_id": "s1", "hook_event_name": "Stop", "_seq": 3},
+        ]
+    )
+    captured = []
+    monkeypatch.setattr(
+        "cc_obs.commands.view.render_html",
+        lambda events, dropped: captured.extend(events) or "<html></html>",
+    )
+    run(no_open=True, from_seq=2, to_seq=2)
+    assert [e["hook_event_name"] for e in captured] == ["Notification"]
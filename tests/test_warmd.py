@@ -0,0 +1,194 @@
+import json
+import os
+import signal
+import sys
+
+import pytest
+
+from cc_obs.commands.warmd import WarmServer, python_target
+from cc_obs.commands.wrap import run
+
+HOOK = """\
+import json, sys
+event = json.load(sys.stdin)
+print("checked", event["hook_event_name"], sys.argv[1:])
+sys.stderr.write("note\\n")
+sys.exit(2)
+"""
+
+
+@pytest.fixture
+def warmd(project_dir):
+    # In a process of its own, as when run: the handlers it forks would
+    # otherwise inherit the test's ends of the hook's pipes
+    server = WarmServer(str(project_dir / ".claude" / "cc-obs"), ["json"])
+    pid = os.fork()
+    if pid == 0:
+        try:
+            server.serve_forever()
+        finally:
+            os._exit(0)
+    server.socket.close()
+    yield server
+    os.kill(pid, signal.SIGTERM)
+    os.waitpid(pid, 0)
+    server.server_close()
+
+
+def test_python_target(tmp_path):
+    python = sys.executable
+    assert python_target([python, "-m", "hooks.lint", "-v"]) == (
+        "module",
+        "hooks.lint",
+        ["-v"],
+    )
+    assert python_target([python, "check.py"]) == ("path", "check.py", [])
+    assert python_target([python, "-u", "check.py"]) is None
+    assert python_target(["node", "check.js"]) is None
+    # Found on the hook's PATH, as the hook's shell would
+    name = os.path.basename(python)
+    assert python_target([name, "check.py"], path=os.path.dirname(python))
+    # Another interpreter, or the same one in another venv, runs cold
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "python").write_text("#!/bin/sh\n")
+    (bin_dir / "python").chmod(0o755)
+    assert python_target(["python", "check.py"], path=str(bin_dir)) is None
+    assert python_target(["bin/python", "check.py"], cwd=str(tmp_path)) is None
+    (bin_dir / "python3").symlink_to(os.path.realpath(python))
+    (tmp_path / "pyvenv.cfg").write_text("")
+    assert python_target(["python3", "check.py"], path=str(bin_dir)) is None
+
+
+def test_wrap_warm_runs_hook_in_server(
+    warmd, project_dir, sample_event, events_file, feed_stdin, capfd, monkeypatch
+):
+    (project_dir / "check.py").write_text(HOOK)
+    monkeypatch.chdir(project_dir)
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "check.py", "--fix"], warm=True)
+
+    assert exc.value.code == 2
+    out, err = capfd.readouterr()
+    assert out == "checked PostToolUse ['--fix']\n"
+    assert err == "note\n"
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["warm"] is True
+    assert wrap["exit_code"] == 2
+    assert wrap["stdout"] == out
+    assert wrap["rusage"]["max_rss_kb"] > 0
+
+
+def test_wrap_warm_module_target(
+    warmd, project_dir, sample_event, events_file, feed_stdin, capfd, monkeypatch
+):
+    (project_dir / "hooks").mkdir()
+    (project_dir / "hooks" / "__init__.py").write_text("")
+    (project_dir / "hooks" / "check.py").write_text(HOOK)
+    monkeypatch.chdir(project_dir)
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "-m", "hooks.check"], warm=True)
+    assert exc.value.code == 2
+    assert capfd.readouterr().out == "checked PostToolUse []\n"
+
+
+def test_wrap_warm_timeout_kills_hook(
+    warmd, project_dir, sample_event, events_file, feed_stdin, monkeypatch
+):
+    (project_dir / "slow.py").write_text(
+        "import time\nprint('partial', flush=True)\ntime.sleep(30)\n"
+    )
+    monkeypatch.chdir(project_dir)
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "slow.py"], warm=True, timeout_ms=500)
+    assert exc.value.code == 124
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["warm"] is True
+    assert wrap["timed_out"] is True
+    assert wrap["stdout"] == "partial\n"
+
+
+def test_wrap_warm_timeout_applies_after_output_closes(
+    warmd, project_dir, sample_event, events_file, feed_stdin, monkeypatch
+):
+    (project_dir / "quiet.py").write_text(
+        "import os, time\nos.close(1)\nos.close(2)\ntime.sleep(30)\n"
+    )
+    monkeypatch.chdir(project_dir)
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "quiet.py"], warm=True, timeout_ms=500)
+    assert exc.value.code == 124
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["warm"] is True
+    assert wrap["timed_out"] is True
+    assert wrap["duration_ms"] < 5000
+
+
+def test_wrap_warm_timeout_spares_hook_that_exited(
+    warmd, project_dir, sample_event, events_file, feed_stdin, monkeypatch
+):
+    (project_dir / "spawn.py").write_text(
+        "import subprocess, sys\nsubprocess.Popen(['sleep', '5'])\nsys.exit(3)\n"
+    )
+    monkeypatch.chdir(project_dir)
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "spawn.py"], warm=True, timeout_ms=500)
+    assert exc.value.code == 3
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["warm"] is True
+    assert wrap["timed_out"] is False
+    assert wrap["duration_ms"] < 4000
+
+
+def test_wrap_warm_runs_exit_handlers(
+    warmd, project_dir, sample_event, events_file, feed_stdin, capfd, monkeypatch
+):
+    (project_dir / "report.py").write_text(
+        "import atexit, threading, time\n"
+        "atexit.register(print, 'report written')\n"
+        "threading.Thread(target=lambda: (time.sleep(0.2), print('thread done')))"
+        ".start()\n"
+    )
+    monkeypatch.chdir(project_dir)
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "report.py"], warm=True)
+    assert exc.value.code == 0
+    assert capfd.readouterr().out == "thread done\nreport written\n"
+    assert json.loads(events_file.read_text())["_wrap"]["warm"] is True
+
+
+def test_wrap_warm_falls_back_to_cold(
+    warmd, project_dir, sample_event, events_file, feed_stdin
+):
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run(["echo", "hi"], warm=True)
+    assert exc.value.code == 0
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["warm"] is False
+    assert wrap["stdout"] == "hi\n"
+
+
+def test_wrap_warm_without_server(project_dir, sample_event, events_file, feed_stdin):
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit):
+        run([sys.executable, "-c", "print('cold')"], warm=True)
+    assert json.loads(events_file.read_text())["_wrap"]["warm"] is False
+
+
+def test_wrap_warm_reports_uncaught_exception(
+    warmd, project_dir, sample_event, events_file, feed_stdin, capfd, monkeypatch
+):
+    (project_dir / "broken.py").write_text("raise ValueError('bad input')\n")
+    monkeypatch.chdir(project_dir)
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "broken.py"], warm=True)
+    assert exc.value.code == 1
+    assert "ValueError: bad input" in capfd.readouterr().err
@@ -1,9 +1,12 @@
 import json
 import sys
+from pathlib import Path
 
 import pytest
 
+import cc_obs
 from cc_obs.commands.wrap import run
+from cc_obs.reader import read_log
 
 
 def test_wrap_runs_command(project_dir, sample_event, events_file, feed_stdin):
@@ -68,3 +71,211 @@ def test_wrap_empty_stdin(project_dir, events_file, feed_stdin):
     assert exc.value.code == 0
     # No event logged when stdin is empty
     assert not events_file.exists()
+
+
+def test_wrap_bounds_captured_output(
+    project_dir, sample_event, events_file, feed_stdin, capfd
+):
+    feed_stdin(json.dumps(sample_event).encode())
+    script = "import sys; sys.stdout.write('a' * 1000 + 'b' * 1000 + 'c' * 1000)"
+    with pytest.raises(SystemExit):
+        run([sys.executable, "-c", script], capture_bytes=200)
+
+    # Everything is passed through
+    assert capfd.readouterr().out == "a" * 1000 + "b" * 1000 + "c" * 1000
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["stdout_bytes"] == 3000
+    assert (
+        wrap["stdout"] == "a" * 100 + "\n[... 2800 bytes truncated ...]\n" + "c" * 100
+    )
+    assert wrap["stderr"] == "" and wrap["stderr_bytes"] == 0
+
+
+def test_wrap_streams_large_stdin(project_dir, sample_event, events_file, feed_stdin):
+    # Bigger than a pipe buffer in both directions: would deadlock if stdin
+    # were written before the output is drained
+    event = {**sample_event, "tool_response": "x" * 300_000}
+    feed_stdin(json.dumps(event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read())"])
+    assert exc.value.code == 0
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["stdout_bytes"] == len(json.dumps(event))
+
+
+def test_wrap_records_resource_usage(
+    project_dir, sample_event, events_file, feed_stdin
+):
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit):
+        run([sys.executable, "-c", "print('hi')"])
+    wrap = json.loads(events_file.read_text().strip())["_wrap"]
+    assert 0 < wrap["spawn_ms"] <= wrap["duration_ms"]
+    assert wrap["spawn_ms"] <= wrap["first_output_ms"] <= wrap["duration_ms"]
+    usage = wrap["rusage"]
+    assert usage["user_ms"] + usage["sys_ms"] > 0
+    assert usage["max_rss_kb"] > 0
+    assert set(usage) >= {"in_blocks", "out_blocks", "vol_ctx_switches"}
+
+
+def test_wrap_first_output_none_when_silent(
+    project_dir, sample_event, events_file, feed_stdin
+):
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit):
+        run(["true"])
+    wrap = json.loads(events_file.read_text().strip())["_wrap"]
+    assert wrap["first_output_ms"] is None
+
+
+def test_wrap_flags_budget_violation(
+    project_dir, sample_event, events_file, feed_stdin
+):
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "-c", "import time; time.sleep(0.1)"], budget_ms=50)
+    assert exc.value.code == 0
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["budget_ms"] == 50
+    assert wrap["over_budget"] is True
+    assert "timed_out" not in wrap
+
+
+def test_wrap_limits_from_config(project_dir, sample_event, events_file, feed_stdin):
+    (project_dir / ".claude" / "cc-obs" / "config.json").write_text(
+        json.dumps({"hooks": {"lint": {"budget_ms": 60000, "timeout_ms": 60000}}})
+    )
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit):
+        run(["true"], name="lint", budget_ms=30000)
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    # The flag overrides the configured budget
+    assert wrap["budget_ms"] == 30000
+    assert wrap["over_budget"] is False
+    assert wrap["timeout_ms"] == 60000
+    assert wrap["timed_out"] is False
+
+
+def test_wrap_timeout_kills_hook_and_keeps_output(
+    project_dir, sample_event, events_file, feed_stdin, capfd
+):
+    # The grandchild inherits the pipes; the kill must not wait on it
+    script = (
+        "import subprocess, time; print('partial', flush=True); "
+        "subprocess.Popen(['sleep', '30']); time.sleep(30)"
+    )
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "-c", script], timeout_ms=500)
+    assert exc.value.code == 124
+    assert "killed after 500ms timeout" in capfd.readouterr().err
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["timed_out"] is True
+    assert wrap["exit_code"] == 124
+    assert wrap["stdout"] == "partial\n"
+    assert wrap["duration_ms"] < 5000
+
+
+def test_wrap_timeout_applies_after_output_closes(
+    project_dir, sample_event, events_file, feed_stdin
+):
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run(["sh", "-c", "exec >/dev/null 2>&1; sleep 30"], timeout_ms=500)
+    assert exc.value.code == 124
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["timed_out"] is True
+    assert wrap["duration_ms"] < 5000
+
+
+def test_wrap_timeout_spares_hook_that_exited(
+    project_dir, sample_event, events_file, feed_stdin
+):
+    # The background child keeps stdout open past the deadline
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run(["sh", "-c", "echo started; sleep 5 & exit 3"], timeout_ms=500)
+    assert exc.value.code == 3
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["timed_out"] is False
+    assert wrap["exit_code"] == 3
+    assert wrap["stdout"] == "started\n"
+    assert wrap["duration_ms"] < 4000
+
+
+def test_wrap_cache_replays_result(
+    project_dir, sample_event, events_file, feed_stdin, capfd
+):
+    script = (
+        "import sys, time; time.sleep(0.05); print('lint ok'); "
+        "sys.stderr.write('warn\\n'); raise SystemExit(3)"
+    )
+    for tool_use_id in ["t1", "t2"]:
+        feed_stdin(json.dumps({**sample_event, "tool_use_id": tool_use_id}).encode())
+        with pytest.raises(SystemExit) as exc:
+            run([sys.executable, "-c", script], cache=True)
+        assert exc.value.code == 3
+        out, err = capfd.readouterr()
+        assert (out, err) == ("lint ok\n", "warn\n")
+
+    miss, hit = (
+        json.loads(line)["_wrap"] for line in events_file.read_text().splitlines()
+    )
+    assert miss["cache"] == "miss"
+    assert hit["cache"] == "hit"
+    assert hit["exit_code"] == 3
+    assert hit["stdout"] == "lint ok\n"
+    assert hit["saved_ms"] > 0
+    assert "rusage" not in hit
+
+
+def test_wrap_cache_skips_truncated_output(
+    project_dir, sample_event, events_file, feed_stdin
+):
+    for _ in range(2):
+        feed_stdin(json.dumps(sample_event).encode())
+        with pytest.raises(SystemExit):
+            run(
+                [sys.executable, "-c", "print('x' * 1000)"],
+                capture_bytes=100,
+                cache=True,
+            )
+    wraps = [json.loads(line)["_wrap"] for line in events_file.read_text().splitlines()]
+    assert [w["cache"] for w in wraps] == ["miss", "miss"]
+
+
+def test_wrap_exports_trace_context(
+    project_dir, sample_event, events_file, feed_stdin, monkeypatch
+):
+    monkeypatch.setenv("PYTHONPATH", str(Path(cc_obs.__file__).parents[1]))
+    script = (
+        "from cc_obs.trace import span\n"
+        "with span('lint'):\n"
+        "    with span('ruff'):\n"
+        "        pass\n"
+    )
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit) as exc:
+        run([sys.executable, "-c", script])
+    assert exc.value.code == 0
+
+    (event,) = read_log(events_file.parent)
+    wrap = event["_wrap"]
+    assert "parent_span_id" not in wrap
+    lint, ruff = wrap["spans"]
+    assert (lint["name"], lint["parent"]) == ("lint", wrap["span_id"])
+    assert (ruff["name"], ruff["parent"]) == ("ruff", lint["id"])
+    assert lint["trace"] == wrap["trace_id"]
+
+
+def test_wrap_nested_in_traced_hook(
+    project_dir, sample_event, events_file, feed_stdin, monkeypatch
+):
+    monkeypatch.setenv("CC_OBS_TRACE_ID", "outer-trace")
+    monkeypatch.setenv("CC_OBS_SPAN_ID", "outer-span")
+    feed_stdin(json.dumps(sample_event).encode())
+    with pytest.raises(SystemExit):
+        run(["true"])
+    wrap = json.loads(events_file.read_text())["_wrap"]
+    assert wrap["trace_id"] == "outer-trace"
+    assert wrap["parent_span_id"] == "outer-span"